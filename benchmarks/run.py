@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+# NOTE - caches would serve every repeat after the first one from memory or disk,
+# history is stubbed so database & downloads are never touched either
+os.environ["FACTOR_INVESTING_INDICATOR_CACHE_MAX_SIZE_MB"] = "0"
+os.environ["FACTOR_INVESTING_HISTORY_CACHE_DIR"] = ""
+os.environ["FACTOR_INVESTING_TICKER_INFO_CACHE_DIR"] = ""
+os.environ["FACTOR_INVESTING_DATA_SOURCE"] = "yahoo"
+
+import polars as pl  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.markup import escape  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+from investing.api.dependency.utils import ticker_universe, worker_pool  # noqa: E402
+from investing.api.worker_pool import WorkerPool  # noqa: E402
+from investing.core.data import StockData, polars_to_quote  # noqa: E402
+from investing.core.db import prepare_ticker_history_table  # noqa: E402
+from investing.core.indicator.price_trend import SuperTrend  # noqa: E402
+from investing.core.models import IndicatorEngine, Upstream  # noqa: E402
+from investing.core.synthetic import synthetic_history  # noqa: E402
+from investing.core.universe import TickerUniverse  # noqa: E402
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+
+
+@dataclass(frozen=True)
+class Scale:
+    """
+    Size of the synthetic history of a benchmark run.
+
+    Attributes
+    ----------
+        unit_years : int
+            Years of history of single security benchmarks
+        bulk_tickers : int
+            Tickers of bulk indicator & ingest benchmarks
+        bulk_years : int
+            Years of history of every bulk ticker
+        api_tickers : int
+            Tickers of a single API request
+        api_years : int
+            Years of history served to API requests
+    """
+
+    unit_years: int
+    bulk_tickers: int
+    bulk_years: int
+    api_tickers: int
+    api_years: int
+
+
+SCALES = {
+    "small": Scale(
+        unit_years=10, bulk_tickers=100, bulk_years=5, api_tickers=20, api_years=2
+    ),
+    "medium": Scale(
+        unit_years=30, bulk_tickers=1000, bulk_years=10, api_tickers=100, api_years=5
+    ),
+    "large": Scale(
+        unit_years=30, bulk_tickers=5000, bulk_years=30, api_tickers=500, api_years=10
+    ),
+}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], object]
+    rows: int
+
+
+def yahoo_frame(history: pl.DataFrame):
+    """History in the pandas format returned by yahoo, indexed by `Date`."""
+    return (
+        history.rename(str.capitalize)
+        .with_columns(pl.col("Date").cast(pl.Datetime("ns", "Asia/Kolkata")))
+        .to_pandas()
+        .set_index("Date")
+    )
+
+
+def library_benchmarks(scale: Scale) -> list[Benchmark]:
+    unit = synthetic_history(1, scale.unit_years, seed=1)["SYN0001"]
+    bulk = synthetic_history(scale.bulk_tickers, scale.bulk_years, seed=2)
+    bulk_rows = sum(df.height for df in bulk.values())
+    yahoo_unit = yahoo_frame(unit)
+    return [
+        Benchmark("polars_to_quote", lambda: polars_to_quote(unit), unit.height),
+        *(
+            Benchmark(
+                f"super_trend_per_security[{engine.value}]",
+                lambda engine=engine: SuperTrend(unit).calculate_per_security(
+                    engine=engine
+                ),
+                unit.height,
+            )
+            for engine in IndicatorEngine
+        ),
+        Benchmark(
+            "super_trend_bulk[native]",
+            lambda: SuperTrend(bulk).calculate_bulk(engine=IndicatorEngine.native),
+            bulk_rows,
+        ),
+        Benchmark(
+            "prepare_ticker_history_table",
+            lambda: [
+                prepare_ticker_history_table(df, ticker) for ticker, df in bulk.items()
+            ],
+            bulk_rows,
+        ),
+        Benchmark(
+            "transform_history_result",
+            lambda: StockData._transform_history_result(yahoo_unit),
+            unit.height,
+        ),
+    ]
+
+
+def api_benchmarks(scale: Scale) -> tuple[list[Benchmark], Callable[[], None]]:
+    """Benchmarks of router calls with `StockData` history stubbed by synthetic
+    history, along with the teardown of the stubs."""
+    from main import app
+
+    history = synthetic_history(scale.api_tickers, scale.api_years, seed=3)
+    rows = sum(df.height for df in history.values())
+
+    original = StockData.get_ticker_history
+    StockData.get_ticker_history = lambda self, **kwargs: {
+        ticker: history[ticker] for ticker in self._ticker_data
+    }
+    pool = WorkerPool(max_workers=4, upstream_limits={u: 4 for u in Upstream})
+    universe = TickerUniverse()
+    app.dependency_overrides[worker_pool] = lambda: pool
+    app.dependency_overrides[ticker_universe] = lambda: universe
+    body = {"ticker": list(history)}
+    # NOTE - one loop for every call, semaphores of worker pool are bound to it
+    loop = asyncio.new_event_loop()
+
+    def request(path: str, params: dict | None = None, accept: str | None = None):
+        async def call():
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://bench"
+            ) as client:
+                response = await client.post(
+                    path,
+                    params={"period": "max", **(params or {})},
+                    json=body,
+                    headers={"Accept": accept} if accept else None,
+                )
+                response.raise_for_status()
+
+        return lambda: loop.run_until_complete(call())
+
+    def teardown():
+        StockData.get_ticker_history = original
+        app.dependency_overrides.clear()
+        pool.shutdown()
+        loop.close()
+
+    benchmarks = [
+        Benchmark("api_bulk_history", request("/api/bulk/nse/history"), rows),
+        Benchmark(
+            "api_bulk_history[columns]",
+            request("/api/bulk/nse/history", {"orient": "columns"}),
+            rows,
+        ),
+        Benchmark(
+            "api_bulk_super_trend",
+            request("/api/bulk/nse/indicator/super-trend"),
+            rows,
+        ),
+        Benchmark(
+            "api_bulk_super_trend[arrow]",
+            request(
+                "/api/bulk/nse/indicator/super-trend",
+                accept="application/vnd.apache.arrow.stream",
+            ),
+            rows,
+        ),
+        Benchmark(
+            "api_dataset_super_trend",
+            request(
+                "/api/dataset/indicator/nse/indicator/super-trend", {"recent_n": 5}
+            ),
+            rows,
+        ),
+    ]
+    return benchmarks, teardown
+
+
+def measure(benchmark: Benchmark, repeat: int) -> dict:
+    # NOTE - first call is a warm-up, it compiles numba kernels & starts the .NET
+    # runtime of stock indicators
+    benchmark.run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark.run()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        "min": min(timings),
+        "median": median,
+        "max": max(timings),
+        "repeat": repeat,
+        "rows": benchmark.rows,
+        "rows_per_second": benchmark.rows / median if median else None,
+    }
+
+
+def run(scale_name: str, repeat: int, selected: list[str] | None) -> dict:
+    scale = SCALES[scale_name]
+    benchmarks = library_benchmarks(scale)
+    api, teardown = api_benchmarks(scale)
+    benchmarks.extend(api)
+    results = {}
+    try:
+        for benchmark in benchmarks:
+            if selected and not any(s in benchmark.name for s in selected):
+                continue
+            results[benchmark.name] = measure(benchmark, repeat)
+            print(
+                f"{benchmark.name}: {results[benchmark.name]['median'] * 1000:.2f} ms",
+                file=sys.stderr,
+            )
+    finally:
+        teardown()
+    return {
+        "meta": {
+            "scale": scale_name,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "polars": pl.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Print median timings next to baseline ones & get benchmarks slower than
+    `threshold` times their baseline.
+    """
+    if current["meta"]["scale"] != baseline["meta"]["scale"]:
+        print(
+            f"baseline scale is {baseline['meta']['scale']}, comparison is skipped",
+            file=sys.stderr,
+        )
+        return []
+    table = Table(title=f"benchmarks vs baseline of {baseline['meta']['created_at']}")
+    for column in ("benchmark", "baseline ms", "current ms", "ratio"):
+        table.add_column(column, justify="left" if column == "benchmark" else "right")
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            table.add_row(escape(name), "-", f"{result['median'] * 1000:.2f}", "new")
+            continue
+        ratio = result["median"] / base["median"]
+        if ratio > threshold:
+            regressions.append(name)
+        style = "red" if ratio > threshold else "green" if ratio < 1 else None
+        table.add_row(
+            escape(name),
+            f"{base['median'] * 1000:.2f}",
+            f"{result['median'] * 1000:.2f}",
+            f"{ratio:.2f}x",
+            style=style,
+        )
+    Console(stderr=True).print(table)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks over seeded synthetic OHLCV history"
+    )
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="*", help="run benchmarks whose name contains any of these"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="write results as JSON to this file"
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="write results as the new baseline instead of comparing against it",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="median slower than this many times the baseline is a regression",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.repeat, args.only)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}, comparison is skipped", file=sys.stderr)
+        return 0
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.threshold
+    )
+    if regressions:
+        print(f"regressed: {regressions}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,23 @@
 from typing import Annotated
 
-from fastapi import Body, HTTPException, Path, status
+from fastapi import Body, Header, HTTPException, Path, Request, status
 
+from investing.api.worker_pool import WorkerPool
+from investing.core.cache import (
+    HistoryCache,
+    TickerInfoCache,
+    default_history_cache,
+    default_ticker_info_cache,
+)
+from investing.core.config import settings
 from investing.core.models import (
+    DataSource,
+    ResponseFormat,
     StockExchange,
     StockExchangeYahooIdentifier,
     YahooTickerIdentifier,
 )
+from investing.core.universe import TickerUniverse
 
 
 async def yahoo_finance_aware_ticker(
@@ -46,3 +57,65 @@ async def yahoo_finance_aware_exchange_check(
             detail=f"The following exchanges are not supported: {diff}",
         )
     return exchange
+
+
+def history_cache() -> HistoryCache | None:
+    """Dependency to get on-disk history cache, `None` when it is disabled"""
+    return default_history_cache()
+
+
+def ticker_info_cache() -> TickerInfoCache | None:
+    """Dependency to get on-disk ticker info cache, `None` when it is disabled"""
+    return default_ticker_info_cache()
+
+
+def db_connection(request: Request):
+    """Dependency to check out a pooled database connection for the request when
+    history is served from database, `None` otherwise"""
+    if settings.data_source != DataSource.database:
+        yield None
+        return
+    with request.app.state.db_pool.connection() as conn:
+        yield conn
+
+
+def ticker_universe(request: Request) -> TickerUniverse:
+    """Dependency to get in-memory index of ticker universe registry"""
+    return request.app.state.ticker_universe
+
+
+def worker_pool(request: Request) -> WorkerPool:
+    """Dependency to get worker pool running blocking work"""
+    return request.app.state.worker_pool
+
+
+def response_format(
+    accept: Annotated[
+        str | None,
+        Header(
+            description="`application/vnd.apache.arrow.stream` or `application/x-ndjson` "
+            "for Arrow IPC or streamed NDJSON, JSON otherwise",
+        ),
+    ] = None,
+) -> ResponseFormat:
+    """Dependency to negotiate response format from `Accept` header"""
+    if not accept:
+        return ResponseFormat.json
+    media_types = []
+    for position, media_range in enumerate(accept.split(",")):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_types.append((-quality, position, media_type.lower()))
+
+    supported = {f.value: f for f in ResponseFormat}
+    for quality, _, media_type in sorted(media_types):
+        if quality < 0 and media_type in supported:
+            return supported[media_type]
+    return ResponseFormat.json
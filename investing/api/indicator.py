@@ -0,0 +1,197 @@
+import logging
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from investing.api.worker_pool import WorkerPool, history_upstream
+from investing.core.cache import HistoryCache
+from investing.core.data import StockData
+from investing.core.indicator.materialized import read_materialized_super_trend
+from investing.core.indicator.price_trend import SuperTrend
+from investing.core.models import (
+    IndicatorEngine,
+    StockExchangeYahooIdentifier,
+    SuperTrendIndicatorQuery,
+    SuperTrendSweepQuery,
+    TickerHistoryQuery,
+    Upstream,
+)
+from investing.core.timing import record_tickers
+from investing.core.utils import split_ticker_frame, stack_ticker_frames
+
+if TYPE_CHECKING:
+    from adbc_driver_manager.dbapi import Connection
+
+logger = logging.getLogger("factor-investing")
+
+
+async def super_trend_bulk(
+    tickers: list[str],
+    exchange_market: StockExchangeYahooIdentifier,
+    query_param: SuperTrendIndicatorQuery,
+    cache: HistoryCache | None,
+    connection: "Connection | None",
+    pool: WorkerPool,
+) -> dict[str, pl.DataFrame]:
+    """
+    SuperTrend of many tickers, read from `indicator_super_trend` table for the
+    tickers materialized with requested parameters & calculated for the rest.
+
+    Parameters
+    ----------
+    tickers: list[str]
+        ticker symbols without exchange symbol
+    exchange_market: StockExchangeYahooIdentifier
+        Yahoo stock exchange identifier of the tickers
+    query_param: SuperTrendIndicatorQuery
+        history range & indicator parameters of the request
+    cache: HistoryCache | None
+        on-disk history cache
+    connection: Connection | None
+        database connection, nothing is read from database when `None`
+    pool: WorkerPool
+        worker pool running blocking work
+
+    Returns
+    -------
+    dict[str, pl.DataFrame]
+        indicator of each ticker, in the same format as `SuperTrend.calculate_bulk`
+    """
+    result = await _read_materialized(
+        tickers, exchange_market, query_param, cache, connection, pool
+    )
+    missing = [ticker for ticker in tickers if ticker not in result]
+    if missing:
+        history = await _read_history(
+            missing, exchange_market, query_param, cache, connection, pool
+        )
+        indicator_data = SuperTrend(history, query_param.retain_source_column)
+        result.update(
+            await pool.run(
+                Upstream.indicator,
+                indicator_data.calculate_bulk,
+                lookback_periods=query_param.lookback_periods,
+                multiplier=query_param.multiplier,
+                engine=query_param.engine,
+            )
+        )
+    return {ticker: result[ticker] for ticker in tickers}
+
+
+async def super_trend_long(
+    tickers: list[str],
+    exchange_market: StockExchangeYahooIdentifier,
+    query_param: SuperTrendIndicatorQuery,
+    cache: HistoryCache | None,
+    connection: "Connection | None",
+    pool: WorkerPool,
+) -> pl.DataFrame:
+    """
+    Same as `super_trend_bulk`, in the long format of `SuperTrend.calculate_long`
+    without splitting the result per ticker. Tickers without indicator values have
+    no rows.
+    """
+    materialized = await _read_materialized(
+        tickers, exchange_market, query_param, cache, connection, pool
+    )
+    frames = [stack_ticker_frames(materialized)] if materialized else []
+    missing = [ticker for ticker in tickers if ticker not in materialized]
+    if missing:
+        history = await _read_history(
+            missing, exchange_market, query_param, cache, connection, pool
+        )
+        indicator_data = SuperTrend(history, query_param.retain_source_column)
+        frames.append(
+            await pool.run(
+                Upstream.indicator,
+                indicator_data.calculate_long,
+                lookback_periods=query_param.lookback_periods,
+                multiplier=query_param.multiplier,
+                engine=query_param.engine,
+            )
+        )
+    return pl.concat(frames, how="vertical_relaxed")
+
+
+async def super_trend_sweep(
+    tickers: list[str],
+    exchange_market: StockExchangeYahooIdentifier,
+    query_param: SuperTrendSweepQuery,
+    cache: HistoryCache | None,
+    connection: "Connection | None",
+    pool: WorkerPool,
+) -> dict[str, pl.DataFrame]:
+    """
+    SuperTrend of many tickers for every combination of requested lookback periods
+    & multipliers, calculated by `SuperTrend.calculate_grid` over history of all
+    tickers at once.
+
+    Returns
+    -------
+    dict[str, pl.DataFrame]
+        long format indicator of each ticker, with leading `lookback_periods` &
+        `multiplier` columns
+    """
+    history = await _read_history(
+        tickers, exchange_market, query_param, cache, connection, pool
+    )
+    indicator_data = SuperTrend(history, query_param.retain_source_column)
+    result = await pool.run(
+        Upstream.indicator,
+        indicator_data.calculate_grid,
+        lookback_periods=query_param.lookback_periods,
+        multipliers=query_param.multipliers,
+    )
+    split = split_ticker_frame(result)
+    empty = result.clear().drop("ticker")
+    return {ticker: split.get(ticker, empty) for ticker in tickers}
+
+
+async def _read_materialized(
+    tickers: list[str],
+    exchange_market: StockExchangeYahooIdentifier,
+    query_param: SuperTrendIndicatorQuery,
+    cache: HistoryCache | None,
+    connection: "Connection | None",
+    pool: WorkerPool,
+) -> dict[str, pl.DataFrame]:
+    record_tickers(len(tickers))
+    if connection is None or query_param.engine != IndicatorEngine.native:
+        return {}
+    result = await pool.run(
+        Upstream.database,
+        read_materialized_super_trend,
+        connection,
+        tickers,
+        exchange_market,
+        query_param.lookback_periods,
+        query_param.multiplier,
+        period=query_param.period,
+        interval=query_param.interval,
+        start=query_param.start_date,
+        end=query_param.end_date,
+        retain_source_column=query_param.retain_source_column,
+        cache=cache,
+    )
+    if result:
+        logger.debug(f"serving materialized SuperTrend of {list(result)}")
+    return result
+
+
+async def _read_history(
+    tickers: list[str],
+    exchange_market: StockExchangeYahooIdentifier,
+    query_param: TickerHistoryQuery,
+    cache: HistoryCache | None,
+    connection: "Connection | None",
+    pool: WorkerPool,
+) -> dict[str, pl.DataFrame]:
+    stock_data = StockData(tickers, exchange_market, cache=cache, connection=connection)
+    return await pool.run(
+        history_upstream(connection),
+        stock_data.get_ticker_history,
+        period=query_param.period,
+        interval=query_param.interval,
+        start=query_param.start_date,
+        end=query_param.end_date,
+    )
@@ -0,0 +1,159 @@
+import io
+import json
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, TypeVar
+
+import polars as pl
+from fastapi.responses import Response, StreamingResponse
+
+from investing.core.config import settings
+from investing.core.models import ResponseFormat
+from investing.core.timing import stage
+from investing.core.utils import create_batches_list
+
+TickerFrame = tuple[str, str, pl.DataFrame | None]
+"""`(exchange, ticker, frame)` of a single ticker in a bulk response"""
+
+Ticker = TypeVar("Ticker")
+
+FRAME_RESPONSES = {
+    200: {
+        "content": {
+            ResponseFormat.arrow.value: {
+                "schema": {"type": "string", "format": "binary"},
+                "description": "Arrow IPC stream of all tickers in long format, with "
+                "leading `exchange` & `ticker` columns",
+            },
+            ResponseFormat.ndjson.value: {
+                "schema": {"type": "string"},
+                "description": "One JSON object per ticker & line",
+            },
+        }
+    }
+}
+"""Additional OpenAPI response formats of bulk endpoints"""
+
+
+async def frames_response(
+    tickers: list[Ticker],
+    frames_of: Callable[[list[Ticker]], Awaitable[list[TickerFrame]]],
+    key: str,
+    response_format: ResponseFormat,
+) -> Response:
+    """
+    Serialize per ticker frames straight from polars, skipping pydantic models.
+
+    NDJSON is streamed `stream_chunk_size` tickers at a time, each chunk calculated
+    only once the previous one was sent, so memory stays flat & the first line goes
+    out after the first chunk. Arrow IPC is one stream of all the tickers.
+
+    Parameters
+    ----------
+    tickers: list[Ticker]
+        tickers of the response
+    frames_of: Callable[[list[Ticker]], Awaitable[list[TickerFrame]]]
+        calculates `(exchange, ticker, frame)` of a chunk of tickers, tickers
+        without frame are left out of Arrow IPC response & get `null` in NDJSON one
+    key: str
+        Key holding the rows of a ticker in NDJSON objects, e.g. `history`
+    response_format: ResponseFormat
+        Arrow IPC or NDJSON
+
+    Returns
+    -------
+    Response
+        Arrow IPC response or NDJSON streaming response
+    """
+    if response_format == ResponseFormat.arrow:
+        return arrow_response(await frames_of(tickers))
+    if response_format == ResponseFormat.ndjson:
+
+        async def lines() -> AsyncIterator[bytes]:
+            for chunk in create_batches_list(tickers, settings.stream_chunk_size):
+                for line in ndjson_lines(await frames_of(chunk), key):
+                    yield line
+
+        return StreamingResponse(lines(), media_type=ResponseFormat.ndjson.value)
+    raise ValueError(f"{response_format} is not a frame response format")
+
+
+def columns_response(frames: Iterable[TickerFrame], key: str) -> Response:
+    """
+    Encode every ticker's frame as `{column: [values]}` JSON, built & encoded from
+    polars columns without response model validation.
+
+    Parameters
+    ----------
+    frames: Iterable[TickerFrame]
+        `(exchange, ticker, frame)` of every ticker, tickers without frame get `null`
+    key: str
+        Key holding the columns of a ticker, e.g. `history`
+
+    Returns
+    -------
+    Response
+        JSON list with one object per ticker
+    """
+    body = ",".join(_ticker_columns_json(*frame, key) for frame in frames)
+    return Response(f"[{body}]", media_type=ResponseFormat.json.value)
+
+
+def ticker_columns_response(frame: TickerFrame, key: str) -> Response:
+    """Same as `columns_response`, for a single ticker object."""
+    return Response(
+        _ticker_columns_json(*frame, key), media_type=ResponseFormat.json.value
+    )
+
+
+def frame_columns_response(df: pl.DataFrame) -> Response:
+    """Encode a single frame as `{column: [values]}` JSON."""
+    return Response(_columns_json(df), media_type=ResponseFormat.json.value)
+
+
+def _ticker_columns_json(
+    exchange: str, ticker: str, df: pl.DataFrame | None, key: str
+) -> str:
+    return _ticker_json(exchange, ticker, key, _columns_json(df))
+
+
+def _ticker_json(exchange: str, ticker: str, key: str, value: str) -> str:
+    """Object of a ticker holding already encoded JSON `value` under `key`, every
+    string is escaped by the encoder."""
+    head = json.dumps({"exchange": exchange, "ticker": ticker}, separators=(",", ":"))
+    return f"{head[:-1]},{json.dumps(key)}:{value}}}"
+
+
+def _columns_json(df: pl.DataFrame | None) -> str:
+    if df is None:
+        return "null"
+    # NOTE - polars encodes column names & values, a single row of list columns is
+    # written as `[{column: [values]}]`
+    with stage("serialize"):
+        return df.select(pl.all().implode()).write_json()[1:-1]
+
+
+def arrow_response(frames: Iterable[TickerFrame]) -> Response:
+    stacked = [
+        df.select(
+            pl.lit(exchange, dtype=pl.String).alias("exchange"),
+            pl.lit(ticker, dtype=pl.String).alias("ticker"),
+            pl.all(),
+        )
+        for exchange, ticker, df in frames
+        if df is not None
+    ]
+    buffer = io.BytesIO()
+    with stage("serialize"):
+        if stacked:
+            pl.concat(stacked, how="vertical_relaxed").write_ipc_stream(buffer)
+        else:
+            pl.DataFrame(
+                schema={"exchange": pl.String, "ticker": pl.String}
+            ).write_ipc_stream(buffer)
+    return Response(buffer.getvalue(), media_type=ResponseFormat.arrow.value)
+
+
+def ndjson_lines(frames: Iterable[TickerFrame], key: str) -> Iterator[bytes]:
+    """Encode every ticker as one NDJSON line."""
+    for exchange, ticker, df in frames:
+        rows = df.write_json() if df is not None else "null"
+        yield (_ticker_json(exchange, ticker, key, rows) + "\n").encode()
@@ -1,14 +1,30 @@
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 from fastapi import APIRouter, Depends, Path, Query
 
 from investing.api.dependency.utils import (
+    db_connection,
+    history_cache,
+    response_format,
+    ticker_info_cache,
+    ticker_universe,
+    worker_pool,
     yahoo_finance_aware_exchange_check,
 )
+from investing.api.indicator import super_trend_bulk, super_trend_sweep
+from investing.api.response import (
+    FRAME_RESPONSES,
+    TickerFrame,
+    columns_response,
+    frames_response,
+)
+from investing.api.timing import TimedRoute
+from investing.api.worker_pool import WorkerPool, history_upstream
+from investing.core.cache import HistoryCache, TickerInfoCache
 from investing.core.data import StockData
-from investing.core.indicator.price_trend import SuperTrend
 from investing.core.models import (
     APITags,
+    Upstream,
     ExchangeTickers,
     ExchangeTickersHistory,
     ExchangeTickersInfo,
@@ -17,19 +33,31 @@ from investing.core.models import (
     TickerInput,
     StockExchangeYahooIdentifier,
     ExchangeTickersIndicatorSuperTrend,
+    Orient,
+    ResponseFormat,
     SuperTrendIndicatorQuery,
+    SuperTrendSweepQuery,
+    YahooTickerIdentifier,
 )
+from investing.core.universe import TickerUniverse
+
+if TYPE_CHECKING:
+    from adbc_driver_manager.dbapi import Connection
 
-router = APIRouter(prefix="/api/bulk", tags=[APITags.bulk])
+router = APIRouter(prefix="/api/bulk", tags=[APITags.bulk], route_class=TimedRoute)
 
 
 @router.post("/", response_model=list[ExchangeTickers])
 async def tickers_wrt_exchange(
     exchange: Annotated[list[str], Depends(yahoo_finance_aware_exchange_check)],
-) -> dict[str, str]:
-    """Get list of available `Tickers` w.r.t. given `Exchange(s)`."""
-    # TODO - add logic to get list of tickers
-    return {e: None for e in exchange}
+    universe: Annotated[TickerUniverse, Depends(ticker_universe)],
+) -> list[ExchangeTickers]:
+    """Get list of available `Tickers` w.r.t. given `Exchange(s)`, listed in ticker
+    universe registry."""
+    return [
+        ExchangeTickers(exchange=e.upper(), tickers=universe.tickers(e))
+        for e in exchange
+    ]
 
 
 @router.post("/{exchange}", response_model=list[ExchangeTickersInfo])
@@ -41,14 +69,20 @@ async def ticker_info_wrt_exchange(
         ),
     ],
     ticker: TickerInput,
+    info_cache: Annotated[TickerInfoCache | None, Depends(ticker_info_cache)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
 ):
-    """Get information of all`Tickers` w.r.t. given `Exchange(s)`."""
+    """Get information of all`Tickers` w.r.t. given `Exchange(s)`.
+
+    Info is downloaded concurrently & served from ticker info cache while fresh."""
     yahoo_tickers = ticker.get_yahoo_aware_ticker(exchange)
 
     stock_data = StockData(
-        ticker.ticker, getattr(StockExchangeYahooIdentifier, exchange.name)
+        ticker.ticker,
+        getattr(StockExchangeYahooIdentifier, exchange.name),
+        info_cache=info_cache,
     )
-    result = stock_data.get_ticker_info()
+    result = await pool.run(Upstream.yahoo, stock_data.get_ticker_info)
     return [
         ExchangeTickersInfo(
             exchange=t.exchange.upper(),
@@ -59,7 +93,7 @@ async def ticker_info_wrt_exchange(
     ]
 
 
-@router.post("/{exchange}/history")
+@router.post("/{exchange}/history", responses=FRAME_RESPONSES)
 async def ticker_history(
     exchange: Annotated[
         StockExchange,
@@ -69,32 +103,53 @@ async def ticker_history(
     ],
     ticker: TickerInput,
     query_param: Annotated[TickerHistoryQuery, Query()],
+    cache: Annotated[HistoryCache | None, Depends(history_cache)],
+    connection: Annotated["Connection | None", Depends(db_connection)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
+    output_format: Annotated[ResponseFormat, Depends(response_format)],
 ) -> list[ExchangeTickersHistory]:
     """Get stock history data for given `Ticker`"""
     yahoo_tickers = ticker.get_yahoo_aware_ticker(exchange)
 
-    stock_data = StockData(
-        ticker.ticker, getattr(StockExchangeYahooIdentifier, exchange.name)
-    )
-    result = stock_data.get_ticker_history(
-        period=query_param.period,
-        interval=query_param.interval,
-        start=query_param.start_date,
-        end=query_param.end_date,
-    )
-    return [
-        ExchangeTickersHistory(
-            exchange=t.exchange.upper(),
-            ticker=t.symbol.upper(),
-            history=result[t.symbol.upper()].to_dicts(),
+    async def history_frames(
+        tickers: list[YahooTickerIdentifier],
+    ) -> list[TickerFrame]:
+        stock_data = StockData(
+            [t.symbol for t in tickers],
+            getattr(StockExchangeYahooIdentifier, exchange.name),
+            cache=cache,
+            connection=connection,
         )
-        for t in yahoo_tickers
+        result = await pool.run(
+            history_upstream(connection),
+            stock_data.get_ticker_history,
+            period=query_param.period,
+            interval=query_param.interval,
+            start=query_param.start_date,
+            end=query_param.end_date,
+        )
+        return [
+            (t.exchange.upper(), t.symbol.upper(), result[t.symbol.upper()])
+            for t in tickers
+        ]
+
+    if output_format != ResponseFormat.json:
+        return await frames_response(
+            yahoo_tickers, history_frames, "history", output_format
+        )
+    frames = await history_frames(yahoo_tickers)
+    if query_param.orient == Orient.columns:
+        return columns_response(frames, "history")
+    return [
+        ExchangeTickersHistory(exchange=e, ticker=t, history=df.to_dicts())
+        for e, t, df in frames
     ]
 
 
 @router.post(
     "/{exchange}/indicator/super-trend",
     response_model=list[ExchangeTickersIndicatorSuperTrend],
+    responses=FRAME_RESPONSES,
 )
 async def ticker_indicator_super_trend(
     exchange: Annotated[
@@ -105,30 +160,90 @@ async def ticker_indicator_super_trend(
     ],
     ticker: TickerInput,
     query_param: Annotated[SuperTrendIndicatorQuery, Query()],
+    cache: Annotated[HistoryCache | None, Depends(history_cache)],
+    connection: Annotated["Connection | None", Depends(db_connection)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
+    output_format: Annotated[ResponseFormat, Depends(response_format)],
 ) -> list[dict]:
     """SuperTrend attempts to determine the primary trend of Close prices by using
     Average True Range (ATR) band thresholds. It can indicate a buy/ sell signal or a trailing stop
-    when the trend changes."""
+    when the trend changes.
+
+    Tickers with SuperTrend materialized for the requested parameters are read from
+    database, when history is served from it."""
     yahoo_tickers = ticker.get_yahoo_aware_ticker(exchange)
 
-    stock_data = StockData(
-        ticker.ticker, getattr(StockExchangeYahooIdentifier, exchange.name)
-    )
-    history = stock_data.get_ticker_history(
-        period=query_param.period,
-        interval=query_param.interval,
-        start=query_param.start_date,
-        end=query_param.end_date,
-    )
-    indicator_data = SuperTrend(history, query_param.retain_source_column)
-    result = indicator_data.calculate_bulk(
-        lookback_periods=query_param.lookback_periods, multiplier=query_param.multiplier
-    )
+    async def indicator_frames(
+        tickers: list[YahooTickerIdentifier],
+    ) -> list[TickerFrame]:
+        result = await super_trend_bulk(
+            [t.symbol for t in tickers],
+            getattr(StockExchangeYahooIdentifier, exchange.name),
+            query_param,
+            cache,
+            connection,
+            pool,
+        )
+        return [(t.exchange, t.symbol, result[t.symbol]) for t in tickers]
+
+    if output_format != ResponseFormat.json:
+        return await frames_response(
+            yahoo_tickers, indicator_frames, "indicator", output_format
+        )
+    frames = await indicator_frames(yahoo_tickers)
+    if query_param.orient == Orient.columns:
+        return columns_response(frames, "indicator")
+    return [
+        {"exchange": e, "ticker": t, "indicator": df.to_dicts()} for e, t, df in frames
+    ]
+
+
+@router.post(
+    "/{exchange}/indicator/super-trend/sweep",
+    response_model=list[ExchangeTickersIndicatorSuperTrend],
+    responses=FRAME_RESPONSES,
+)
+async def ticker_indicator_super_trend_sweep(
+    exchange: Annotated[
+        StockExchange,
+        Path(
+            description="Exchange symbol to which `Ticker` belongs",
+        ),
+    ],
+    ticker: TickerInput,
+    query_param: Annotated[SuperTrendSweepQuery, Query()],
+    cache: Annotated[HistoryCache | None, Depends(history_cache)],
+    connection: Annotated["Connection | None", Depends(db_connection)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
+    output_format: Annotated[ResponseFormat, Depends(response_format)],
+) -> list[dict]:
+    """SuperTrend for every combination of given lookback periods & multipliers, keyed
+    by `lookback_periods` & `multiplier` columns of each row.
+
+    True range is calculated once & ATR once per lookback period, so a sweep costs far
+    less than separate requests per combination."""
+    yahoo_tickers = ticker.get_yahoo_aware_ticker(exchange)
+
+    async def indicator_frames(
+        tickers: list[YahooTickerIdentifier],
+    ) -> list[TickerFrame]:
+        result = await super_trend_sweep(
+            [t.symbol for t in tickers],
+            getattr(StockExchangeYahooIdentifier, exchange.name),
+            query_param,
+            cache,
+            connection,
+            pool,
+        )
+        return [(t.exchange, t.symbol, result[t.symbol]) for t in tickers]
+
+    if output_format != ResponseFormat.json:
+        return await frames_response(
+            yahoo_tickers, indicator_frames, "indicator", output_format
+        )
+    frames = await indicator_frames(yahoo_tickers)
+    if query_param.orient == Orient.columns:
+        return columns_response(frames, "indicator")
     return [
-        {
-            "exchange": ticker.exchange,
-            "ticker": ticker.symbol,
-            "indicator": result[ticker.symbol].to_dicts(),
-        }
-        for ticker in yahoo_tickers
+        {"exchange": e, "ticker": t, "indicator": df.to_dicts()} for e, t, df in frames
     ]
@@ -1,22 +1,40 @@
 import logging
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 import polars as pl
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 
-from investing.core.data import StockData
-from investing.core.indicator.price_trend import SuperTrend
+from investing.api.dependency.utils import (
+    db_connection,
+    history_cache,
+    ticker_universe,
+    worker_pool,
+)
+from investing.api.indicator import super_trend_long
+from investing.api.response import frame_columns_response
+from investing.api.timing import TimedRoute
+from investing.api.worker_pool import WorkerPool, history_upstream
+from investing.core.cache import HistoryCache
+from investing.core.data import exchange_universe
 from investing.core.models import (
     APITags,
+    Orient,
+    Upstream,
     StockExchange,
     TickerInput,
     StockExchangeYahooIdentifier,
     SuperTrendRecentNDatasetQuery,
     SuperTrendRecentNDatasetFormat,
 )
+from investing.core.universe import TickerUniverse
+
+if TYPE_CHECKING:
+    from adbc_driver_manager.dbapi import Connection
 
 logger = logging.getLogger("factor-investing")
-router = APIRouter(prefix="/api/dataset/indicator", tags=[APITags.dataset])
+router = APIRouter(
+    prefix="/api/dataset/indicator", tags=[APITags.dataset], route_class=TimedRoute
+)
 
 
 @router.post(
@@ -29,8 +47,12 @@ async def super_trend_recent_top_n(
             description="Exchange symbol to which `Ticker` belongs",
         ),
     ],
-    ticker: TickerInput,
     query_param: Annotated[SuperTrendRecentNDatasetQuery, Query()],
+    cache: Annotated[HistoryCache | None, Depends(history_cache)],
+    connection: Annotated["Connection | None", Depends(db_connection)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
+    universe: Annotated[TickerUniverse, Depends(ticker_universe)],
+    ticker: TickerInput | None = None,
 ) -> list[str] | list[dict]:
     """Super Trend attempts to determine the primary trend of Close prices by using
     Average True Range (ATR) band thresholds. It can indicate a buy/ sell signal or a trailing stop
@@ -40,47 +62,100 @@ async def super_trend_recent_top_n(
       - Calculate SuperTrend for each given ticker
       - Get top `n` rows based on `lower` column
       - Filter out tickers which have `null` in recent `n` rows
+
+    With `universe=true` every ticker of the exchange listed in ticker universe
+    registry, or else having stored history, is screened & request body is not
+    needed.
+
+    Tickers with SuperTrend materialized for the requested parameters are read from
+    database, when history is served from it.
     """
-    yahoo_tickers = ticker.get_yahoo_aware_ticker(exchange)
+    exchange_market = getattr(StockExchangeYahooIdentifier, exchange.name)
+    if query_param.universe:
+        # tickers having stored history, when they aren't listed in the registry
+        tickers = universe.tickers(exchange.name) or await pool.run(
+            history_upstream(connection), exchange_universe, exchange_market, connection
+        )
+        if not tickers:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"no stored history found to screen {exchange.name} universe",
+            )
+    elif ticker is not None:
+        ticker.get_yahoo_aware_ticker(exchange)
+        tickers = list(dict.fromkeys(ticker.ticker))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="`ticker` is required unless `universe` is set",
+        )
 
-    stock_data = StockData(
-        ticker.ticker, getattr(StockExchangeYahooIdentifier, exchange.name)
-    )
-    history = stock_data.get_ticker_history(
-        period=query_param.period,
-        interval=query_param.interval,
-        start=query_param.start_date,
-        end=query_param.end_date,
+    result = await super_trend_long(
+        tickers, exchange_market, query_param, cache, connection, pool
     )
-    indicator_data = SuperTrend(history, query_param.retain_source_column)
-    result = indicator_data.calculate_bulk(
-        lookback_periods=query_param.lookback_periods, multiplier=query_param.multiplier
+    dataset, passed = await pool.run(
+        Upstream.indicator, recent_n_screen, result, tickers, query_param.recent_n
     )
 
-    # Transformation for the dataset
-    for ticker in list(result):
-        # adding ticker column
-        cols = result[ticker].columns
-        cols[1:1] = ["ticker"]
-        result[ticker] = result[ticker].with_columns(ticker=pl.lit(ticker))
-        # rearranging columns
-        result[ticker] = result[ticker].select(cols)
-        # getting recent `n` rows
-        result[ticker] = (
-            result[ticker].sort(by="date", descending=True).head(query_param.recent_n)
-        )
-        # removing tickers which have `null` in recent n rows for lower column
-        if result[ticker].select("lower").to_series().has_nulls():
-            logger.debug(f"found null in {ticker}, removing it")
-            result.pop(ticker)
-
     # sending result based on desired format
-    if query_param.result_format == SuperTrendRecentNDatasetFormat.detail:
-        final_result = pl.DataFrame()
-        for ticker in result:
-            final_result = final_result.vstack(result[ticker])
-        final_result = final_result.to_dicts()
-    elif query_param.result_format == SuperTrendRecentNDatasetFormat.ticker_only:
-        final_result = list(result)
+    if query_param.result_format == SuperTrendRecentNDatasetFormat.ticker_only:
+        return passed
+    if query_param.orient == Orient.columns:
+        return frame_columns_response(dataset)
+    return dataset.to_dicts()
 
-    return final_result
+
+def recent_n_screen(
+    result: pl.DataFrame, tickers: list[str], recent_n: int
+) -> tuple[pl.DataFrame, list[str]]:
+    """
+    Screen recent `n` rows of every ticker in one pass over the long result.
+
+    Parameters
+    ----------
+    result: pl.DataFrame
+        long format SuperTrend of all tickers
+    tickers: list[str]
+        screened tickers, output follows their order
+    recent_n: int
+        number of most recent rows of each ticker to evaluate
+
+    Returns
+    -------
+    tuple[pl.DataFrame, list[str]]
+        recent `n` rows of the tickers without `null` lower band in them, with
+        `date` & `ticker` as leading columns, along with these tickers
+    """
+    order = pl.LazyFrame(
+        {"ticker": tickers, "order": range(len(tickers))},
+        schema={"ticker": pl.String, "order": pl.UInt32},
+    )
+    # NOTE - recent rows are picked per ticker first, so only they get sorted
+    recent = (
+        result.lazy()
+        .filter(
+            pl.col("date").rank("ordinal", descending=True).over("ticker") <= recent_n
+        )
+        .join(order, on="ticker")
+    )
+    # NOTE - ticker without indicator rows has no `null` in them, so it passes
+    rejected = (
+        recent.group_by("order")
+        .agg(pl.col("lower").null_count())
+        .filter(pl.col("lower") > 0)
+        .select("order")
+    )
+    columns = [
+        "date",
+        "ticker",
+        *(c for c in result.columns if c not in ("date", "ticker")),
+    ]
+    dataset, passed = pl.collect_all(
+        [
+            recent.join(rejected, on="order", how="anti")
+            .sort("order", "date", descending=[False, True])
+            .select(columns),
+            order.join(rejected, on="order", how="anti").sort("order").select("ticker"),
+        ]
+    )
+    return dataset, passed["ticker"].to_list()
@@ -1,12 +1,24 @@
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 from fastapi import APIRouter, Depends, Path, Query
 
-from investing.api.dependency.utils import yahoo_finance_aware_ticker
+from investing.api.dependency.utils import (
+    db_connection,
+    history_cache,
+    ticker_info_cache,
+    ticker_universe,
+    worker_pool,
+    yahoo_finance_aware_ticker,
+)
+from investing.api.response import ticker_columns_response
+from investing.api.timing import TimedRoute
+from investing.api.worker_pool import WorkerPool, history_upstream
+from investing.core.cache import HistoryCache, TickerInfoCache
 from investing.core.data import StockData
 from investing.core.indicator.price_trend import SuperTrend
 from investing.core.models import (
     APITags,
+    Upstream,
     ExchangeTickers,
     ExchangeTickersHistory,
     StockExchangeFullName,
@@ -15,9 +27,16 @@ from investing.core.models import (
     SuperTrendIndicatorQuery,
     StockExchangeYahooIdentifier,
     ExchangeTickersIndicatorSuperTrend,
+    Orient,
 )
+from investing.core.universe import TickerUniverse
+
+if TYPE_CHECKING:
+    from adbc_driver_manager.dbapi import Connection
 
-router = APIRouter(prefix="/api/per-security", tags=[APITags.per_security])
+router = APIRouter(
+    prefix="/api/per-security", tags=[APITags.per_security], route_class=TimedRoute
+)
 
 
 @router.get("/")
@@ -35,22 +54,37 @@ async def list_ticker(
             examples=["nse", "nyse"],
         ),
     ],
-) -> list[str]:
-    """Get all the available `ticker` in given `exchange`"""
-    return ["INFY", "AAPL"]
+    universe: Annotated[TickerUniverse, Depends(ticker_universe)],
+    index: Annotated[
+        str | None,
+        Query(
+            description="Only members of this index",
+            examples=["NIFTY 500"],
+        ),
+    ] = None,
+) -> ExchangeTickers:
+    """Get all the available `ticker` in given `exchange`, listed in ticker universe
+    registry"""
+    return ExchangeTickers(
+        exchange=exchange.upper(), tickers=universe.tickers(exchange, index)
+    )
 
 
 @router.get("/{exchange}/{ticker}")
 async def ticker_information(
     # exchange: Annotated[StockExchange, Path(description="Exchange symbol to which ticker belongs")],
     ticker: Annotated[YahooTickerIdentifier, Depends(yahoo_finance_aware_ticker)],
+    info_cache: Annotated[TickerInfoCache | None, Depends(ticker_info_cache)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
 ) -> dict:
-    """Get given `Ticker` information"""
+    """Get given `Ticker` information, served from ticker info cache while fresh"""
     # getting data
     stock_data = StockData(
-        ticker.symbol, getattr(StockExchangeYahooIdentifier, ticker.exchange.lower())
+        ticker.symbol,
+        getattr(StockExchangeYahooIdentifier, ticker.exchange.lower()),
+        info_cache=info_cache,
     )
-    result = stock_data.get_ticker_info()
+    result = await pool.run(Upstream.yahoo, stock_data.get_ticker_info)
     return result[ticker.symbol]
 
 
@@ -58,18 +92,30 @@ async def ticker_information(
 async def ticker_history(
     ticker: Annotated[YahooTickerIdentifier, Depends(yahoo_finance_aware_ticker)],
     query_param: Annotated[TickerHistoryQuery, Query()],
+    cache: Annotated[HistoryCache | None, Depends(history_cache)],
+    connection: Annotated["Connection | None", Depends(db_connection)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
 ) -> ExchangeTickersHistory:
     """Get stock history data for given `Ticker`"""
     # getting data
     stock_data = StockData(
-        ticker.symbol, getattr(StockExchangeYahooIdentifier, ticker.exchange.lower())
+        ticker.symbol,
+        getattr(StockExchangeYahooIdentifier, ticker.exchange.lower()),
+        cache=cache,
+        connection=connection,
     )
-    result = stock_data.get_ticker_history(
+    result = await pool.run(
+        history_upstream(connection),
+        stock_data.get_ticker_history,
         period=query_param.period,
         interval=query_param.interval,
         start=query_param.start_date,
         end=query_param.end_date,
     )
+    if query_param.orient == Orient.columns:
+        return ticker_columns_response(
+            (ticker.exchange, ticker.symbol, result[ticker.symbol]), "history"
+        )
     return ExchangeTickersHistory(
         ticker=ticker.symbol,
         exchange=ticker.exchange,
@@ -84,15 +130,23 @@ async def ticker_history(
 async def ticker_indicator_super_trend(
     ticker: Annotated[YahooTickerIdentifier, Depends(yahoo_finance_aware_ticker)],
     query_param: Annotated[SuperTrendIndicatorQuery, Query()],
+    cache: Annotated[HistoryCache | None, Depends(history_cache)],
+    connection: Annotated["Connection | None", Depends(db_connection)],
+    pool: Annotated[WorkerPool, Depends(worker_pool)],
 ) -> dict:
     """SuperTrend attempts to determine the primary trend of Close prices by using
     Average True Range (ATR) band thresholds. It can indicate a buy/ sell signal or a trailing stop
     when the trend changes."""
     # getting data
     stock_data = StockData(
-        ticker.symbol, getattr(StockExchangeYahooIdentifier, ticker.exchange.lower())
+        ticker.symbol,
+        getattr(StockExchangeYahooIdentifier, ticker.exchange.lower()),
+        cache=cache,
+        connection=connection,
     )
-    history = stock_data.get_ticker_history(
+    history = await pool.run(
+        history_upstream(connection),
+        stock_data.get_ticker_history,
         period=query_param.period,
         interval=query_param.interval,
         start=query_param.start_date,
@@ -101,9 +155,17 @@ async def ticker_indicator_super_trend(
     indicator_data = SuperTrend(
         history[ticker.symbol], query_param.retain_source_column
     )
-    result = indicator_data.calculate_per_security(
-        lookback_periods=query_param.lookback_periods, multiplier=query_param.multiplier
+    result = await pool.run(
+        Upstream.indicator,
+        indicator_data.calculate_per_security,
+        lookback_periods=query_param.lookback_periods,
+        multiplier=query_param.multiplier,
+        engine=query_param.engine,
     )
+    if query_param.orient == Orient.columns:
+        return ticker_columns_response(
+            (ticker.exchange, ticker.symbol, result), "indicator"
+        )
     return {
         "exchange": ticker.exchange,
         "ticker": ticker.symbol,
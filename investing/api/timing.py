@@ -0,0 +1,108 @@
+import functools
+import inspect
+import time
+from typing import Callable
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from investing.core.models import StockExchangeYahooIdentifier
+from investing.core.timing import (
+    RequestTiming,
+    current_request_timing,
+    default_stage_metrics,
+    start_request_timing,
+    stop_request_timing,
+)
+
+
+class TimingMiddleware:
+    """
+    Time stages of every request when metrics are enabled, reported by the
+    `Server-Timing` response header & added to process wide stage histograms.
+
+    Besides the stages timed by the library, `serialize` is the time from the return
+    of the endpoint until the response starts & `total` the time until then since
+    the request arrived. Streamed response bodies are sent after both.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        Wrapped ASGI application
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        metrics = default_stage_metrics()
+        if metrics is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing, token = start_request_timing()
+        arrived_at = time.perf_counter()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                started_at = time.perf_counter()
+                if timing.endpoint_returned_at is not None:
+                    timing.add("serialize", started_at - timing.endpoint_returned_at)
+                timing.add("total", started_at - arrived_at)
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", server_timing(timing)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_request_timing(token)
+            # NOTE - unmatched paths are left out, they would grow label values
+            route = scope.get("route")
+            if route is not None:
+                exchange = scope.get("path_params", {}).get("exchange", "")
+                metrics.observe(route.path, exchange_label(exchange), timing)
+
+
+class TimedRoute(APIRoute):
+    """API route noting when its endpoint returns, so serialization of its response
+    is timed separately from the endpoint."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    # NOTE - signature of endpoint is kept through `__wrapped__`, FastAPI reads
+    # parameters & response model from it
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timing = current_request_timing()
+            if timing is not None:
+                timing.endpoint_returned_at = time.perf_counter()
+
+    return timed
+
+
+def exchange_label(exchange: object) -> str:
+    """Known exchange name, `other` for anything else a path could hold, so label
+    values stay bounded."""
+    name = str(exchange).lower()
+    if not name:
+        return ""
+    return name if name in StockExchangeYahooIdentifier.__members__ else "other"
+
+
+def server_timing(timing: RequestTiming) -> str:
+    """`Server-Timing` header value of stage durations in milliseconds."""
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.3f}" for name, seconds in timing.stages.items()
+    )
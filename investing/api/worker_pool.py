@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+from investing.core.config import Settings
+from investing.core.models import Upstream
+from investing.core.timing import add_stage
+
+logger = logging.getLogger("factor-investing")
+
+
+@dataclass
+class UpstreamStats:
+    """
+    Queue & execution counters of a single upstream.
+
+    Attributes
+    ----------
+        limit : int
+            Maximum number of concurrent calls
+        queued : int
+            Calls waiting for a free slot
+        in_flight : int
+            Calls currently running on the worker pool
+        max_queued : int
+            Highest queue depth seen
+        completed : int
+            Calls finished successfully
+        failed : int
+            Calls finished with an exception
+        wait_seconds : float
+            Total time calls spent waiting in queue
+        run_seconds : float
+            Total time calls spent running
+    """
+
+    limit: int
+    queued: int = 0
+    in_flight: int = 0
+    max_queued: int = 0
+    completed: int = 0
+    failed: int = 0
+    wait_seconds: float = 0.0
+    run_seconds: float = 0.0
+
+
+class WorkerPool:
+    """
+    Dedicated thread pool running blocking work (yahoo downloads, database reads &
+    indicator calculation) outside of the event loop.
+
+    Every upstream has its own concurrency limit, so a burst of slow calls to one
+    upstream queues up behind its limit instead of occupying the whole pool.
+
+    Parameters
+    ----------
+    max_workers: int
+        Number of threads in the pool
+    upstream_limits: dict[Upstream, int]
+        Maximum number of concurrent calls of each upstream
+    """
+
+    def __init__(self, max_workers: int, upstream_limits: dict[Upstream, int]):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="factor-investing-worker"
+        )
+        self._semaphores = {
+            upstream: asyncio.Semaphore(limit)
+            for upstream, limit in upstream_limits.items()
+        }
+        self._stats = {
+            upstream: UpstreamStats(limit=limit)
+            for upstream, limit in upstream_limits.items()
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "WorkerPool":
+        return cls(
+            max_workers=settings.worker_pool_size,
+            upstream_limits={
+                Upstream.yahoo: settings.yahoo_concurrency,
+                Upstream.database: settings.database_concurrency,
+                Upstream.indicator: settings.indicator_concurrency,
+            },
+        )
+
+    async def run(self, upstream: Upstream, func: Callable, *args, **kwargs) -> Any:
+        """Run blocking `func` on the pool once `upstream` has a free slot, within
+        context of the caller so stages of `func` are timed for its request."""
+        stats = self._stats[upstream]
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        queued_at = time.perf_counter()
+        async with self._semaphores[upstream]:
+            started_at = time.perf_counter()
+            stats.queued -= 1
+            stats.in_flight += 1
+            stats.wait_seconds += started_at - queued_at
+            add_stage("queue", started_at - queued_at)
+            context = contextvars.copy_context()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    functools.partial(context.run, func, *args, **kwargs),
+                )
+            except Exception:
+                stats.failed += 1
+                raise
+            else:
+                stats.completed += 1
+            finally:
+                stats.in_flight -= 1
+                stats.run_seconds += time.perf_counter() - started_at
+        return result
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            upstream.value: asdict(stats) for upstream, stats in self._stats.items()
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("worker pool shut down")
+
+
+def history_upstream(connection) -> Upstream:
+    """Upstream serving history, database when connection is given else yahoo."""
+    return Upstream.database if connection is not None else Upstream.yahoo
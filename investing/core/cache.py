@@ -0,0 +1,690 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Hashable, TypeVar
+
+import polars as pl
+
+from investing.core.config import settings
+from investing.core.models import Interval, Period
+from investing.core.utils import resolve_date_range
+
+logger = logging.getLogger("factor-investing")
+
+# How long the most recent (possibly still forming) bars of each interval stay fresh.
+# NOTE - intraday intervals are not cached, `StockData` truncates their bars to a date
+HISTORY_CACHE_TTL: dict[Interval, timedelta] = {
+    Interval.ONE_DAY: timedelta(minutes=30),
+    Interval.FIVE_DAYS: timedelta(hours=1),
+    Interval.ONE_WEEK: timedelta(hours=6),
+    Interval.ONE_MONTH: timedelta(hours=12),
+    Interval.THREE_MONTHS: timedelta(days=1),
+}
+# Number of days a single bar of each interval spans
+INTERVAL_DAYS: dict[Interval, int] = {
+    Interval.ONE_DAY: 1,
+    Interval.FIVE_DAYS: 5,
+    Interval.ONE_WEEK: 7,
+    Interval.ONE_MONTH: 31,
+    Interval.THREE_MONTHS: 92,
+}
+
+HistoryFetch = Callable[
+    [list[str], Period, date | None, date | None], dict[str, pl.DataFrame]
+]
+"""Download history of given tickers for `(tickers, period, start, exclusive end)`"""
+
+InfoFetch = Callable[[list[str]], dict[str, dict]]
+"""Download info of given tickers"""
+
+IndicatorResult = TypeVar("IndicatorResult")
+
+
+@dataclass
+class CacheEntry:
+    """
+    Metadata of a single cached (ticker, exchange, interval) history.
+
+    Attributes
+    ----------
+        start : date | None
+            First covered date, `None` when entire history is cached
+        end : date
+            Last covered date (inclusive)
+        fetched_at : datetime
+            When the most recent bars were downloaded
+        last_access : datetime
+            When the entry was last read, used for LRU eviction
+        size : int
+            Size of the cached file in bytes
+    """
+
+    start: date | None
+    end: date
+    fetched_at: datetime
+    last_access: datetime
+    size: int
+
+    def to_json(self) -> dict:
+        return {
+            k: v.isoformat() if isinstance(v, (date, datetime)) else v
+            for k, v in asdict(self).items()
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "CacheEntry":
+        return cls(
+            start=date.fromisoformat(data["start"]) if data["start"] else None,
+            end=date.fromisoformat(data["end"]),
+            fetched_at=datetime.fromisoformat(data["fetched_at"]),
+            last_access=datetime.fromisoformat(data["last_access"]),
+            size=data["size"],
+        )
+
+
+@dataclass
+class CacheStats:
+    """Lookup counters of the cache, counted per ticker."""
+
+    hits: int = 0
+    partial_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class HistoryCache:
+    """
+    Persistent range-aware OHLCV history cache.
+
+    History of every (ticker, exchange, interval) is stored as a parquet file along
+    with the contiguous date range it covers. A lookup only downloads the date ranges
+    which are not covered yet (or whose recent bars went stale) & merges them into
+    the cached file. Files are evicted in least recently used order once the total
+    size goes beyond `max_size_bytes`.
+
+    Parameters
+    ----------
+    root: Path
+        Directory where cache is persisted
+    max_size_bytes: int
+        Size limit of the cache, by default 1 GiB
+    ttl: dict[Interval, timedelta] | None
+        Override freshness of the recent bars per interval
+    """
+
+    _index_file = "index.json"
+
+    def __init__(
+        self,
+        root: Path | str,
+        max_size_bytes: int = 1024**3,
+        ttl: dict[Interval, timedelta] | None = None,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        self.ttl = {**HISTORY_CACHE_TTL, **(ttl or {})}
+        self.stats = CacheStats()
+        self._lock = threading.RLock()
+        self._index = self._load_index()
+
+    @property
+    def size(self) -> int:
+        return sum(entry.size for entry in self._index.values())
+
+    def is_cacheable(self, interval: Interval) -> bool:
+        return interval in self.ttl
+
+    def get_history(
+        self,
+        tickers: list[str],
+        exchange: str,
+        interval: Interval,
+        fetch: HistoryFetch,
+        period: Period = Period.MAX,
+        start: str | date | None = None,
+        end: str | date | None = None,
+        now: datetime | None = None,
+    ) -> dict[str, pl.DataFrame]:
+        """
+        Get history of given tickers, downloading only the missing date ranges.
+
+        Parameters
+        ----------
+        tickers: list[str]
+            Ticker symbols without exchange symbol
+        exchange: str
+            Exchange name of the tickers
+        interval: Interval
+            Interval of history bars, must be cacheable
+        fetch: HistoryFetch
+            Function used to download the missing history
+        period: Period
+            history period, used when `start` is not given
+        start: str | date | None
+            start date of history
+        end: str | date | None
+            exclusive end date of history
+        now: datetime | None
+            reference time, by default now
+
+        Returns
+        -------
+        dict[str, pl.DataFrame]
+            history of each ticker
+        """
+        now = now or datetime.now()
+        request_start, request_end = resolve_date_range(period, start, end, now.date())
+        request_end = min(request_end, now.date())
+
+        # planning which ranges are needed to be downloaded for which tickers
+        plan: dict[tuple[date | None, date], list[str]] = defaultdict(list)
+        with self._lock:
+            for ticker in tickers:
+                key = self._key(ticker, exchange, interval)
+                entry = self._index.get(key)
+                if entry is not None and not self._path(key).exists():
+                    # deleted file has none of its range, so it is a miss
+                    logger.warning(f"cache file of {key} is missing, dropping entry")
+                    del self._index[key]
+                    entry = None
+                missing = self._missing_ranges(
+                    entry, request_start, request_end, interval, now
+                )
+                if entry is None:
+                    self.stats.misses += 1
+                elif missing:
+                    self.stats.partial_hits += 1
+                else:
+                    self.stats.hits += 1
+                for missing_range in missing:
+                    plan[missing_range].append(ticker)
+
+        # downloading every missing range once for all the tickers that need it
+        fetched: dict[str, list[tuple[date | None, date, pl.DataFrame | None]]] = (
+            defaultdict(list)
+        )
+        for (fetch_start, fetch_end), group in plan.items():
+            logger.debug(f"cache downloading {fetch_start} to {fetch_end}: {group}")
+            if fetch_start is None:
+                result = fetch(group, Period.MAX, None, None)
+                fetch_end = now.date()
+            else:
+                result = fetch(
+                    group, period, fetch_start, fetch_end + timedelta(days=1)
+                )
+            # NOTE - ranges without bars are kept as well, e.g. a tail over a
+            # weekend, so they count as checked instead of being downloaded again
+            for ticker in group:
+                fetched[ticker].append((fetch_start, fetch_end, result.get(ticker)))
+
+        # merging downloaded history into cache
+        history = {}
+        for ticker in tickers:
+            key = self._key(ticker, exchange, interval)
+            with self._lock:
+                entry = self._index.get(key)
+                if entry is not None:
+                    entry.last_access = now
+            # NOTE - files are replaced atomically, so they are read without the lock
+            cached = self._read(key, entry) if entry else None
+            if cached is None:
+                entry = None
+            ranges = fetched.get(ticker, [])
+            new_data = [
+                f[2] for f in ranges if f[2] is not None and not f[2].is_empty()
+            ]
+            if new_data:
+                data = self._merge(cached, new_data)
+                self._write(key, data, entry, ranges, now)
+            else:
+                data = cached
+                if entry is not None and ranges:
+                    # nothing new to write, only the checked ranges are recorded
+                    with self._lock:
+                        self._index[key] = self._covering_entry(
+                            entry, ranges, entry.size, now
+                        )
+                        self._save_index()
+
+            if data is None:
+                continue
+            history[ticker] = data.filter(
+                pl.col("date").is_between(request_start or date.min, request_end)
+            )
+
+        with self._lock:
+            self._evict()
+        return history
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def _missing_ranges(
+        self,
+        entry: CacheEntry | None,
+        request_start: date | None,
+        request_end: date,
+        interval: Interval,
+        now: datetime,
+    ) -> list[tuple[date | None, date]]:
+        if entry is None:
+            return [(request_start, request_end)]
+
+        missing = []
+        # history before cached range
+        if entry.start is not None and (
+            request_start is None or request_start < entry.start
+        ):
+            missing.append((request_start, entry.start - timedelta(days=1)))
+
+        # history after cached range, bars which were still forming while downloading
+        # are downloaded again once they get stale
+        tail_start = entry.end + timedelta(days=1)
+        if now - entry.fetched_at > self.ttl[interval]:
+            unsettled_start = entry.fetched_at.date() - timedelta(
+                days=INTERVAL_DAYS[interval] - 1
+            )
+            tail_start = min(tail_start, unsettled_start)
+        if request_end >= tail_start:
+            missing.append((tail_start, request_end))
+        return missing
+
+    @staticmethod
+    def _merge(cached: pl.DataFrame | None, fetched: list[pl.DataFrame]):
+        frames = [cached, *fetched] if cached is not None else fetched
+        # recently downloaded bars take precedence over cached ones
+        return (
+            pl.concat(frames, how="vertical_relaxed")
+            .unique("date", keep="last", maintain_order=True)
+            .sort("date")
+        )
+
+    def _write(
+        self,
+        key: str,
+        data: pl.DataFrame,
+        entry: CacheEntry | None,
+        fetched: list[tuple[date | None, date, pl.DataFrame | None]],
+        now: datetime,
+    ):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # NOTE - concurrent writers of the same key must not share a temp file
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        data.write_parquet(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._index[key] = self._covering_entry(
+                entry, fetched, path.stat().st_size, now
+            )
+            self._save_index()
+
+    @staticmethod
+    def _covering_entry(
+        entry: CacheEntry | None,
+        fetched: list[tuple[date | None, date, pl.DataFrame | None]],
+        size: int,
+        now: datetime,
+    ) -> CacheEntry:
+        starts = [f[0] for f in fetched] + ([entry.start] if entry else [])
+        ends = [f[1] for f in fetched] + ([entry.end] if entry else [])
+        return CacheEntry(
+            start=None if None in starts else min(starts),
+            end=max(ends),
+            fetched_at=now,
+            last_access=now,
+            size=size,
+        )
+
+    def _read(self, key: str, entry: CacheEntry) -> pl.DataFrame | None:
+        try:
+            return pl.read_parquet(self._path(key))
+        except FileNotFoundError:
+            logger.warning(f"cache file of {key} is missing, dropping entry")
+            with self._lock:
+                # entry may have been rewritten meanwhile
+                if self._index.get(key) is entry:
+                    del self._index[key]
+            return None
+
+    def _evict(self):
+        size = self.size
+        if size <= self.max_size_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k].last_access):
+            if size <= self.max_size_bytes:
+                break
+            logger.debug(f"evicting {key} from history cache")
+            size -= self._index[key].size
+            self._remove(key)
+            self.stats.evictions += 1
+        self._save_index()
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        self._path(key).unlink(missing_ok=True)
+
+    def _load_index(self) -> dict[str, CacheEntry]:
+        index_path = self.root / self._index_file
+        if not index_path.exists():
+            return {}
+        return {
+            key: CacheEntry.from_json(value)
+            for key, value in json.loads(index_path.read_text()).items()
+        }
+
+    def _save_index(self):
+        index_path = self.root / self._index_file
+        temp_path = index_path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps({key: entry.to_json() for key, entry in self._index.items()})
+        )
+        os.replace(temp_path, index_path)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    @staticmethod
+    def _key(ticker: str, exchange: str, interval: Interval) -> str:
+        return f"{exchange.lower()}/{interval.value}/{ticker.upper()}"
+
+
+_default_history_cache: HistoryCache | None = None
+_default_history_cache_lock = threading.Lock()
+
+
+def default_history_cache() -> HistoryCache | None:
+    """Get process wide history cache configured by settings, `None` if disabled."""
+    global _default_history_cache
+    if settings.history_cache_dir is None:
+        return None
+    with _default_history_cache_lock:
+        if _default_history_cache is None:
+            _default_history_cache = HistoryCache(
+                settings.history_cache_dir,
+                max_size_bytes=settings.history_cache_max_size_mb * 1024**2,
+            )
+    return _default_history_cache
+
+
+class TickerInfoCache:
+    """
+    Persistent ticker info (company metadata) cache.
+
+    Info of every (ticker, exchange) is stored as a JSON file along with when it was
+    downloaded. Company metadata rarely changes, so info stays fresh for a long `ttl`
+    & only tickers without fresh info are downloaded.
+
+    Parameters
+    ----------
+    root: Path
+        Directory where cache is persisted
+    ttl: timedelta
+        How long downloaded info stays fresh, by default a week
+    """
+
+    def __init__(self, root: Path | str, ttl: timedelta = timedelta(days=7)):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get_info(
+        self,
+        tickers: list[str],
+        exchange: str,
+        fetch: InfoFetch,
+        refresh: bool = False,
+        now: datetime | None = None,
+    ) -> dict[str, dict]:
+        """
+        Get info of the tickers, downloading the missing or stale ones.
+
+        Parameters
+        ----------
+        tickers: list[str]
+            Ticker symbols without exchange symbol
+        exchange: str
+            Exchange name of the tickers
+        fetch: InfoFetch
+            Downloads info of the tickers which are not fresh in the cache
+        refresh: bool
+            download info of every ticker, even fresh ones
+        now: datetime | None
+            Current time, used for freshness checks
+
+        Returns
+        -------
+        dict[str, dict]
+            info of each ticker, `None` when the download gave nothing
+        """
+        now = now or datetime.now()
+        result = {}
+        for ticker in tickers:
+            entry = None if refresh else self._read(ticker, exchange)
+            if entry is not None and now - entry[0] <= self.ttl:
+                result[ticker] = entry[1]
+        missing = [ticker for ticker in tickers if ticker not in result]
+        with self._lock:
+            self.stats.hits += len(result)
+            self.stats.misses += len(missing)
+
+        if missing:
+            logger.debug(f"downloading info of {len(missing)} tickers")
+            fetched = fetch(missing)
+            for ticker in missing:
+                info = fetched.get(ticker)
+                if info:
+                    self._write(ticker, exchange, info, now)
+                result[ticker] = info
+        return {ticker: result[ticker] for ticker in tickers}
+
+    def _read(self, ticker: str, exchange: str) -> tuple[datetime, dict] | None:
+        path = self._path(ticker, exchange)
+        if not path.exists():
+            return None
+        entry = json.loads(path.read_text())
+        return datetime.fromisoformat(entry["fetched_at"]), entry["info"]
+
+    def _write(self, ticker: str, exchange: str, info: dict, now: datetime):
+        path = self._path(ticker, exchange)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temp_path.write_text(
+            json.dumps({"fetched_at": now.isoformat(), "info": info}, default=str)
+        )
+        os.replace(temp_path, path)
+
+    def _path(self, ticker: str, exchange: str) -> Path:
+        return self.root / exchange.lower() / f"{ticker.upper()}.json"
+
+
+class IndicatorCache:
+    """
+    Process wide in-memory LRU cache of indicator results.
+
+    Results are keyed by the caller, usually by `data_fingerprint` of the source data
+    along with indicator name & parameters, so repeated calculations over the same
+    history are served from memory regardless of which object calculates them.
+    Least recently used results are evicted once their estimated size goes beyond
+    `max_size_bytes`.
+
+    Parameters
+    ----------
+    max_size_bytes: int
+        Size limit of the cache, by default 256 MiB
+    """
+
+    def __init__(self, max_size_bytes: int = 256 * 1024**2):
+        self.max_size_bytes = max_size_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_calculate(
+        self, key: Hashable, calculate: Callable[[], IndicatorResult]
+    ) -> IndicatorResult:
+        """
+        Get cached result of the key, or calculate & cache it.
+
+        Parameters
+        ----------
+        key: Hashable
+            identity of the result
+        calculate: Callable[[], IndicatorResult]
+            calculates the result on a miss, outside of the cache lock
+
+        Returns
+        -------
+        IndicatorResult
+            cached or calculated result, dict results are shallow copies so callers
+            can't alter cached ones
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return _shallow_copy(entry[0])
+            self.stats.misses += 1
+
+        result = calculate()
+        size = _result_size(result)
+        if size <= self.max_size_bytes:
+            with self._lock:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._size -= previous[1]
+                self._entries[key] = (_shallow_copy(result), size)
+                self._size += size
+                self._evict()
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self):
+        while self._size > self.max_size_bytes:
+            key, (_, size) = self._entries.popitem(last=False)
+            logger.debug(f"evicting {key[:2]} from indicator cache")
+            self._size -= size
+            self.stats.evictions += 1
+
+
+def data_fingerprint(data: pl.DataFrame | dict[str, pl.DataFrame]) -> tuple:
+    """
+    Cheap fingerprint of source data, built from columns, first & last date, number
+    of rows & a hash of the last bar of every ticker.
+
+    Appended or corrected recent bars change it, a correction of older bars keeping
+    the same number of rows & last bar does not.
+
+    Parameters
+    ----------
+    data: pl.DataFrame | dict[str, pl.DataFrame]
+        history of a single security, per ticker history or stacked history having a
+        `ticker` column
+
+    Returns
+    -------
+    tuple
+        hashable fingerprint, equal for dict & stacked forms of the same history
+    """
+    if isinstance(data, dict):
+        return tuple((ticker, *_frame_fingerprint(df)) for ticker, df in data.items())
+    if "ticker" not in data.columns:
+        return (("", *_frame_fingerprint(data)),)
+    columns = tuple(c for c in data.columns if c != "ticker")
+    bounds = data.group_by("ticker", maintain_order=True).agg(
+        pl.col("date").first().alias("__start"),
+        pl.col("date").last().alias("__end"),
+        pl.len().alias("__rows"),
+        pl.col(columns).last(),
+    )
+    return tuple(
+        (ticker, columns, start, end, rows, hash(tuple(last_bar)))
+        for ticker, start, end, rows, *last_bar in bounds.iter_rows()
+    )
+
+
+def _frame_fingerprint(df: pl.DataFrame | None) -> tuple:
+    if df is None:
+        return (None,)
+    if df.is_empty():
+        return (tuple(df.columns), None, None, 0, None)
+    return (
+        tuple(df.columns),
+        df["date"][0],
+        df["date"][-1],
+        df.height,
+        hash(df.row(-1)),
+    )
+
+
+def _result_size(result) -> int:
+    if isinstance(result, pl.DataFrame):
+        return result.estimated_size()
+    if isinstance(result, dict):
+        return sum(_result_size(value) for value in result.values())
+    if isinstance(result, (tuple, list)):
+        return sum(_result_size(value) for value in result)
+    return 0
+
+
+def _shallow_copy(result):
+    return dict(result) if isinstance(result, dict) else result
+
+
+_default_ticker_info_cache: TickerInfoCache | None = None
+
+
+def default_ticker_info_cache() -> TickerInfoCache | None:
+    """Get process wide ticker info cache configured by settings, `None` if
+    disabled."""
+    global _default_ticker_info_cache
+    if settings.ticker_info_cache_dir is None:
+        return None
+    with _default_history_cache_lock:
+        if _default_ticker_info_cache is None:
+            _default_ticker_info_cache = TickerInfoCache(
+                settings.ticker_info_cache_dir,
+                ttl=timedelta(hours=settings.ticker_info_cache_ttl_hours),
+            )
+    return _default_ticker_info_cache
+
+
+_default_indicator_cache: IndicatorCache | None = None
+
+
+def default_indicator_cache() -> IndicatorCache | None:
+    """Get process wide indicator result cache configured by settings, `None` if
+    disabled."""
+    global _default_indicator_cache
+    if settings.indicator_cache_max_size_mb <= 0:
+        return None
+    with _default_history_cache_lock:
+        if _default_indicator_cache is None:
+            _default_indicator_cache = IndicatorCache(
+                max_size_bytes=settings.indicator_cache_max_size_mb * 1024**2
+            )
+    return _default_indicator_cache
@@ -0,0 +1,178 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from investing.core.models import DataSource
+
+ENV_PREFIX = "FACTOR_INVESTING_"
+
+
+def _env(name: str, default: str | None = None) -> str | None:
+    return os.environ.get(ENV_PREFIX + name, default)
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = _env(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Runtime settings of the library & REST API, read from environment variables
+    prefixed with `FACTOR_INVESTING_`.
+
+    Attributes
+    ----------
+        history_cache_dir : Path | None
+            Directory of on-disk OHLCV history cache, cache is disabled when not set
+        history_cache_max_size_mb : int
+            Size limit of on-disk OHLCV history cache, least recently used entries are
+            evicted beyond it
+        data_source : DataSource
+            Source of history, `database` reads daily history served by REST API
+            from `ticker_history` table & falls back to yahoo for the missing
+            history, others pick the provider underneath `StockData`
+        worker_pool_size : int
+            Number of threads running blocking work of REST API
+        yahoo_concurrency : int
+            Maximum concurrent yahoo finance calls of REST API
+        database_concurrency : int
+            Maximum concurrent database reads of REST API
+        indicator_concurrency : int
+            Maximum concurrent indicator calculations of REST API
+        indicator_processes : int
+            Worker processes calculating bulk indicators with engines holding the
+            GIL, process pool is disabled when `0`
+        db_pool_min_size : int
+            Database connections opened upfront by REST API
+        db_pool_max_size : int
+            Maximum database connections opened by REST API
+        db_pool_acquire_timeout : float
+            Seconds a request waits for a free database connection
+        price_lake_dir : Path | None
+            Directory of partitioned parquet price lake, ingest pipeline writes
+            history to it as well when set
+        super_trend_params : tuple[tuple[int, float], ...]
+            (lookback periods, multiplier) pairs of SuperTrend materialized into
+            database after ingest, materialization is disabled when empty
+        universe_refresh_interval : float
+            Seconds between checks of REST API whether `ticker_universe` registry
+            changed, its in-memory index is reloaded only then
+        indicator_cache_max_size_mb : int
+            Size limit of in-memory indicator result cache, least recently used
+            results are evicted beyond it & cache is disabled when `0`
+        ticker_info_cache_dir : Path | None
+            Directory of on-disk ticker info cache, cache is disabled when not set
+        ticker_info_cache_ttl_hours : float
+            Hours downloaded ticker info stays fresh in the cache
+        ticker_info_concurrency : int
+            Maximum concurrent ticker info downloads of a single call
+        recording_dir : Path | None
+            Directory of responses recorded & replayed by `record` & `replay` data
+            sources
+        metrics_enabled : bool
+            Whether REST API times stages of requests, reported by `Server-Timing`
+            response headers & `/metrics` histograms
+        warm_up : bool
+            Whether REST API imports yfinance & runs every indicator engine once
+            over tiny synthetic history before it starts serving requests
+        stream_chunk_size : int
+            Tickers calculated together per chunk of streamed NDJSON responses
+    """
+
+    history_cache_dir: Path | None = None
+    history_cache_max_size_mb: int = 1024
+    data_source: DataSource = DataSource.yahoo
+    worker_pool_size: int = 16
+    yahoo_concurrency: int = 4
+    database_concurrency: int = 8
+    indicator_concurrency: int = os.cpu_count() or 1
+    indicator_processes: int = 0
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_acquire_timeout: float = 30.0
+    price_lake_dir: Path | None = None
+    super_trend_params: tuple[tuple[int, float], ...] = ()
+    universe_refresh_interval: float = 300.0
+    indicator_cache_max_size_mb: int = 256
+    ticker_info_cache_dir: Path | None = None
+    ticker_info_cache_ttl_hours: float = 168.0
+    ticker_info_concurrency: int = 8
+    recording_dir: Path | None = None
+    metrics_enabled: bool = False
+    warm_up: bool = False
+    stream_chunk_size: int = 20
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        cache_dir = _env("HISTORY_CACHE_DIR")
+        lake_dir = _env("PRICE_LAKE_DIR")
+        info_cache_dir = _env("TICKER_INFO_CACHE_DIR")
+        recording_dir = _env("RECORDING_DIR")
+        return cls(
+            history_cache_dir=Path(cache_dir) if cache_dir else None,
+            history_cache_max_size_mb=int(
+                _env("HISTORY_CACHE_MAX_SIZE_MB", str(cls.history_cache_max_size_mb))
+            ),
+            data_source=DataSource(_env("DATA_SOURCE", DataSource.yahoo.value)),
+            worker_pool_size=int(_env("WORKER_POOL_SIZE", str(cls.worker_pool_size))),
+            yahoo_concurrency=int(
+                _env("YAHOO_CONCURRENCY", str(cls.yahoo_concurrency))
+            ),
+            database_concurrency=int(
+                _env("DATABASE_CONCURRENCY", str(cls.database_concurrency))
+            ),
+            indicator_concurrency=int(
+                _env("INDICATOR_CONCURRENCY", str(cls.indicator_concurrency))
+            ),
+            indicator_processes=int(
+                _env("INDICATOR_PROCESSES", str(cls.indicator_processes))
+            ),
+            db_pool_min_size=int(_env("DB_POOL_MIN_SIZE", str(cls.db_pool_min_size))),
+            db_pool_max_size=int(_env("DB_POOL_MAX_SIZE", str(cls.db_pool_max_size))),
+            db_pool_acquire_timeout=float(
+                _env("DB_POOL_ACQUIRE_TIMEOUT", str(cls.db_pool_acquire_timeout))
+            ),
+            price_lake_dir=Path(lake_dir) if lake_dir else None,
+            super_trend_params=_parse_super_trend_params(
+                _env("SUPER_TREND_PARAMS", "")
+            ),
+            universe_refresh_interval=float(
+                _env("UNIVERSE_REFRESH_INTERVAL", str(cls.universe_refresh_interval))
+            ),
+            indicator_cache_max_size_mb=int(
+                _env(
+                    "INDICATOR_CACHE_MAX_SIZE_MB", str(cls.indicator_cache_max_size_mb)
+                )
+            ),
+            ticker_info_cache_dir=Path(info_cache_dir) if info_cache_dir else None,
+            ticker_info_cache_ttl_hours=float(
+                _env(
+                    "TICKER_INFO_CACHE_TTL_HOURS", str(cls.ticker_info_cache_ttl_hours)
+                )
+            ),
+            ticker_info_concurrency=int(
+                _env("TICKER_INFO_CONCURRENCY", str(cls.ticker_info_concurrency))
+            ),
+            recording_dir=Path(recording_dir) if recording_dir else None,
+            metrics_enabled=_env_flag("METRICS_ENABLED", cls.metrics_enabled),
+            warm_up=_env_flag("WARM_UP", cls.warm_up),
+            stream_chunk_size=int(
+                _env("STREAM_CHUNK_SIZE", str(cls.stream_chunk_size))
+            ),
+        )
+
+
+def _parse_super_trend_params(value: str) -> tuple[tuple[int, float], ...]:
+    """Parse `lookback:multiplier` pairs separated by comma, e.g. `10:3,7:2.5`"""
+    params = []
+    for pair in filter(None, (p.strip() for p in value.split(","))):
+        lookback_periods, _, multiplier = pair.partition(":")
+        params.append((int(lookback_periods), float(multiplier)))
+    return tuple(params)
+
+
+settings = Settings.from_env()
@@ -1,12 +1,30 @@
 import logging
+from collections import defaultdict
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
 
 import polars as pl
-import yfinance as yf
-from stock_indicators.indicators.common.quote import Quote
 
+from investing.core.cache import HistoryCache, TickerInfoCache
+from investing.core.config import settings
+from investing.core.db import read_stored_tickers
+from investing.core.lake import HISTORY_SCHEMA, PriceLake
 from investing.core.models import Interval, Period, StockExchangeYahooIdentifier
+from investing.core.provider import (
+    DATABASE_EXCHANGE,
+    DATABASE_INTERVAL,
+    DatabaseProvider,
+    DataProvider,
+    YahooProvider,
+    default_data_provider,
+)
+from investing.core.timing import record_tickers, stage
+from investing.core.utils import has_weekday, resolve_date_range
+
+if TYPE_CHECKING:
+    from adbc_driver_manager.dbapi import Connection
+    from stock_indicators.indicators.common.quote import Quote
 
 logger = logging.getLogger("factor-investing")
 
@@ -14,7 +32,8 @@ logger = logging.getLogger("factor-investing")
 @dataclass
 class StockData:
     """
-    A class to interact with stock data provided by yfinanc api.
+    A class to interact with stock data provided by yfinanc api, or another data
+    provider.
 
     Attributes
     ----------
@@ -22,12 +41,26 @@ class StockData:
             Ticker or list of ticker symbol the stock data.
         exchange_market : StockExchangeYahooIdentifier, optional
             Yahoo stock exchange identifier, by default StockExchangeYahooIdentifier.nse
+        cache : HistoryCache, optional
+            On-disk history cache, when given only missing history is downloaded
+        connection : Connection, optional
+            Database connection, when given daily history is read from `ticker_history`
+            table & only the history missing in it is downloaded
+        info_cache : TickerInfoCache, optional
+            On-disk ticker info cache, when given only info which isn't fresh in it is
+            downloaded
+        provider : DataProvider, optional
+            Source of history & info, by default the one of configured data source
     """
 
     ticker: str | list[str]
     exchange_market: StockExchangeYahooIdentifier | None = (
         StockExchangeYahooIdentifier.nse
     )
+    cache: HistoryCache | None = None
+    connection: "Connection | None" = None
+    info_cache: TickerInfoCache | None = None
+    provider: DataProvider | None = None
 
     # TickerData = namedtuple("TickerData", [])
 
@@ -40,33 +73,47 @@ class StockData:
         if isinstance(self.ticker, list):
             self._ticker_data = dict.fromkeys(self._ticker_without_exchange)
 
+        if self.provider is None:
+            self.provider = default_data_provider()
+        record_tickers(len(self._ticker_data))
+
     @property
     def yahoo_aware_ticker(self) -> str | list[str]:
         return self._add_exchange_symbol(
             self._ticker_without_exchange, self.exchange_market.value
         )
 
-    @property
-    def ticker_handler(self) -> yf.Ticker | yf.Tickers:
-        return (
-            yf.Ticker(self.yahoo_aware_ticker)
-            if isinstance(self.ticker, str)
-            else yf.Tickers(" ".join(self.yahoo_aware_ticker))
-        )
+    def get_ticker_info(self, refresh: bool = False) -> dict[str, dict]:
+        """
+        Get info of the tickers from the provider, yahoo downloads info of many
+        tickers concurrently by at most `ticker_info_concurrency` threads.
+
+        Parameters
+        ----------
+        refresh: bool
+            download info even when it is fresh in `info_cache`
 
-    def get_ticker_info(self) -> dict[str, dict]:
-        if isinstance(self.ticker_handler, yf.Ticker):
-            self._ticker_data[self._ticker_without_exchange] = (
-                self.ticker_handler.get_info()
+        Returns
+        -------
+        dict[str, dict]
+            info of each ticker
+        """
+        if self.info_cache is not None:
+            self._ticker_data.update(
+                self.info_cache.get_info(
+                    list(self._ticker_data),
+                    self.exchange_market.name,
+                    fetch=lambda tickers: StockData(
+                        tickers, self.exchange_market, provider=self.provider
+                    ).get_ticker_info(),
+                    refresh=refresh,
+                )
             )
-        else:
-            for ex_tick, tick in zip(
-                self.yahoo_aware_ticker, self._ticker_without_exchange
-            ):
-                self._ticker_data[tick] = self.ticker_handler.tickers[
-                    ex_tick
-                ].get_info()
+            return self._ticker_data
 
+        self._ticker_data.update(
+            self.provider.info(list(self._ticker_data), self.exchange_market)
+        )
         return self._ticker_data
 
     def get_ticker_history(
@@ -76,42 +123,92 @@ class StockData:
         start: str | date | None = None,
         end: str | date | None = None,
     ) -> dict[str, pl.DataFrame]:
-        if isinstance(self.ticker, str):
-            result = self.ticker_handler.history(
-                period=period.value,
-                interval=interval.value,
+        if (
+            self.connection is not None
+            and self.exchange_market == DATABASE_EXCHANGE
+            and interval == DATABASE_INTERVAL
+        ):
+            history = self._get_database_history(period, interval, start, end)
+        elif self.cache is not None and self.cache.is_cacheable(interval):
+            history = self.cache.get_history(
+                list(self._ticker_data),
+                self.exchange_market.name,
+                interval,
+                fetch=lambda tickers, p, s, e: StockData(
+                    tickers, self.exchange_market, provider=self.provider
+                ).get_ticker_history(period=p, interval=interval, start=s, end=e),
+                period=period,
                 start=start,
                 end=end,
-                actions=False,
-                raise_errors=True,
-                # NOTE - not present in single `Tickers` object
-                # progress=False,
-                # group_by="ticker",
             )
-            self._ticker_data[self._ticker_without_exchange] = (
-                self._transform_history_result(result)
-            )
-
         else:
-            result = self.ticker_handler.history(
-                period=period.value,
-                interval=interval.value,
+            history = self.provider.history(
+                list(self._ticker_data),
+                self.exchange_market,
+                period=period,
+                interval=interval,
                 start=start,
                 end=end,
-                group_by="ticker",
-                actions=False,
-                progress=False,
-                # raise_errors=True, # NOTE - currently not supported by `Tickers` object
             )
-            for ex_tick, tick in zip(
-                self.yahoo_aware_ticker, self._ticker_without_exchange
-            ):
-                self._ticker_data[tick] = self._transform_history_result(
-                    result[ex_tick]
+        # NOTE - tickers a provider has nothing of get empty history, as from yahoo
+        self._ticker_data.update(
+            {
+                ticker: (
+                    pl.DataFrame(schema=HISTORY_SCHEMA)
+                    if history.get(ticker) is None
+                    else history[ticker]
                 )
-
+                for ticker in self._ticker_data
+            }
+        )
         return self._ticker_data
 
+    def _get_database_history(
+        self,
+        period: Period,
+        interval: Interval,
+        start: str | date | None,
+        end: str | date | None,
+    ) -> dict[str, pl.DataFrame]:
+        _, request_end = resolve_date_range(period, start, end)
+        history = DatabaseProvider(self.connection).history(
+            list(self._ticker_data), self.exchange_market, period, interval, start, end
+        )
+
+        # yahoo is used only for the history which is not present in database
+        missing = [ticker for ticker, data in history.items() if data is None]
+        missing_recent = defaultdict(list)
+        for ticker, data in history.items():
+            if data is not None:
+                next_date = data["date"].max() + timedelta(days=1)
+                if has_weekday(next_date, request_end):
+                    missing_recent[next_date].append(ticker)
+
+        downloads = [(missing, {"period": period, "start": start, "end": end})]
+        downloads.extend(
+            (group, {"start": next_date, "end": end})
+            for next_date, group in missing_recent.items()
+        )
+        for group, history_range in downloads:
+            if not group:
+                continue
+            logger.info(f"downloading history missing in database: {group}")
+            result = StockData(
+                group, self.exchange_market, cache=self.cache, provider=self.provider
+            ).get_ticker_history(interval=interval, **history_range)
+            for ticker in group:
+                if history[ticker] is None:
+                    history[ticker] = result[ticker]
+                elif not result[ticker].is_empty():
+                    history[ticker] = (
+                        pl.concat(
+                            [history[ticker], result[ticker]], how="vertical_relaxed"
+                        )
+                        .unique("date", keep="last", maintain_order=True)
+                        .sort("date")
+                    )
+        return history
+
     # TODO - add methods supporting all other api functionality provided by YFinance
 
     @staticmethod
@@ -130,18 +227,37 @@ class StockData:
 
     @staticmethod
     def _transform_history_result(data):
-        history = pl.from_pandas(data, include_index=True)
-        return history.select(
-            pl.col("Date").cast(pl.Date).alias("date"),
-            pl.col("Open").cast(pl.Float64).round(3).alias("open"),
-            pl.col("High").cast(pl.Float64).round(3).alias("high"),
-            pl.col("Low").cast(pl.Float64).round(3).alias("low"),
-            pl.col("Close").cast(pl.Float64).round(3).alias("close"),
-            pl.col("Volume").cast(pl.Float64).round(3).alias("volume"),
-        )
+        return YahooProvider.transform_history(data)
 
 
-def polars_to_quote(data: pl.DataFrame) -> list[Quote]:
+def exchange_universe(
+    exchange_market: StockExchangeYahooIdentifier,
+    connection: "Connection | None" = None,
+) -> list[str]:
+    """
+    Tickers of an exchange having stored history, read from `ticker_history` table
+    when connection is given & from price lake otherwise.
+
+    Parameters
+    ----------
+    exchange_market: StockExchangeYahooIdentifier
+        Yahoo stock exchange identifier
+    connection: Connection, optional
+        Database connection
+
+    Returns
+    -------
+    list[str]
+        sorted ticker symbols without exchange symbol, empty when nothing is stored
+    """
+    if connection is not None and exchange_market == DATABASE_EXCHANGE:
+        return read_stored_tickers(connection)
+    if settings.price_lake_dir is not None:
+        return PriceLake(settings.price_lake_dir).tickers(exchange_market.name)
+    return []
+
+
+def polars_to_quote(data: pl.DataFrame) -> "list[Quote]":
     """
     Create list of Quote objects from given polars dataframe.
 
@@ -155,14 +271,18 @@ def polars_to_quote(data: pl.DataFrame) -> list[Quote]:
     list[Quote]
         Quote data that can be used to create indicator
     """
-    return [
-        Quote(d, o, h, l, c, v)
-        for d, o, h, l, c, v in zip(
-            data["date"],
-            data["open"],
-            data["high"],
-            data["low"],
-            data["close"],
-            data["volume"],
-        )
-    ]
+    # NOTE - importing stock indicators boots .NET runtime, so it waits for first use
+    from stock_indicators.indicators.common.quote import Quote
+
+    with stage("quote"):
+        return [
+            Quote(d, o, h, l, c, v)
+            for d, o, h, l, c, v in zip(
+                data["date"],
+                data["open"],
+                data["high"],
+                data["low"],
+                data["close"],
+                data["volume"],
+            )
+        ]
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from ._db_utils import *
+from ._pool import *
 from ._sql_query import *
 
 current_dir = Path(__file__).parent
@@ -13,3 +14,7 @@ schema_ddl = Path(_schema_ddl).read_text()
 
 _table_ddl = current_dir / "_table.sql"
 table_ddl = Path(_table_ddl).read_text()
+
+# NOTE - migration recreates the table with the current table ddl
+_migration_ddl = current_dir / "_migration.sql"
+migration_ddl = Path(_migration_ddl).read_text().replace("{table_ddl}", table_ddl)
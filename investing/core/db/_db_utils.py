@@ -1,8 +1,31 @@
+import json
 import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
 
 import polars as pl
 
 from investing.core.exception import YahooAPIError
+from investing.core.utils import split_ticker_frame
+from ._sql_query import (
+    SUPER_TREND_COLUMNS,
+    SUPER_TREND_STATE_COLUMNS,
+    TICKER_HISTORY_COLUMNS,
+    UNIVERSE_COLUMNS,
+    delete_super_trend_query,
+    ensure_partitions_query,
+    get_super_trend_query,
+    get_tickers_history_query,
+    stored_tickers_query,
+    super_trend_states_query,
+    ticker_universe_query,
+    ticker_universe_version_query,
+    ticker_watermarks_query,
+    upsert_super_trend_query,
+    upsert_super_trend_state_query,
+    upsert_ticker_history_query,
+    upsert_ticker_universe_query,
+)
 
 logger = logging.getLogger("factor-investing")
 
@@ -14,16 +37,13 @@ def prepare_ticker_history_table(df: pl.DataFrame, ticker: str) -> pl.DataFrame:
         )
     ticker = ticker.upper()
     # Note - Creating the query for transformation lazily
-    df = df.lazy()
+    # `StockData` history columns are lower case, raw yahoo ones are capitalized
+    df = df.lazy().rename(str.capitalize)
 
-    # creating primary key & other column
+    # creating ticker column, (ticker, date) is the primary key
     df = df.with_columns(
         (pl.col("Date").cast(pl.Date)),
         (pl.lit(ticker).alias("ticker")),
-        (
-            pl.lit(ticker.lower())
-            + pl.col("Date").cast(pl.Date).cast(pl.String).str.replace_all("-", "")
-        ).alias("key"),
     )
 
     # dropping all null values
@@ -31,12 +51,464 @@ def prepare_ticker_history_table(df: pl.DataFrame, ticker: str) -> pl.DataFrame:
 
     # rearranging appropriately
     df = df.select(
-        pl.col("Date").cast(pl.Date).alias("date"),
         pl.col("ticker").cast(pl.String),
-        pl.col("key").cast(pl.String),
+        pl.col("Date").cast(pl.Date).alias("date"),
         pl.col("Open").cast(pl.Float64).alias("open"),
         pl.col("High").cast(pl.Float64).alias("high"),
         pl.col("Low").cast(pl.Float64).alias("low"),
         pl.col("Close").cast(pl.Float64).alias("close"),
     )
     return df.collect()
+
+
+def read_ticker_history(
+    conn, tickers: list[str], start: date | None = None, end: date | None = None
+) -> dict[str, pl.DataFrame]:
+    """
+    Read history of many tickers from `ticker_history` table using a single query.
+
+    Parameters
+    ----------
+    conn
+        database connection
+    tickers: list[str]
+        ticker symbols, as stored in the table
+    start: date | None
+        inclusive start date, entire history when not given
+    end: date | None
+        inclusive end date
+
+    Returns
+    -------
+    dict[str, pl.DataFrame]
+        history of every ticker found in the table, in the same format as `StockData`
+    """
+    history = pl.read_database(
+        get_tickers_history_query([t.upper() for t in tickers], start, end), conn
+    )
+    if history.is_empty():
+        return {}
+    history = history.select(
+        pl.col("ticker").cast(pl.String),
+        pl.col("date").cast(pl.Date),
+        pl.col("open").cast(pl.Float64).round(3),
+        pl.col("high").cast(pl.Float64).round(3),
+        pl.col("low").cast(pl.Float64).round(3),
+        pl.col("close").cast(pl.Float64).round(3),
+        pl.lit(None, dtype=pl.Float64).alias("volume"),
+    ).sort("ticker", "date")
+    return split_ticker_frame(history)
+
+
+def read_ticker_watermarks(conn, tickers: list[str]) -> dict[str, date | None]:
+    """
+    Read last stored date of every ticker from `ticker_history` table.
+
+    Parameters
+    ----------
+    conn
+        database connection
+    tickers: list[str]
+        ticker symbols, as stored in the table
+
+    Returns
+    -------
+    dict[str, date | None]
+        last stored date of each ticker, `None` when ticker has no history stored
+    """
+    if not tickers:
+        return {}
+    watermarks = pl.read_database(
+        ticker_watermarks_query([t.upper() for t in tickers]), conn
+    )
+    last_dates = dict(
+        zip(watermarks["ticker"].to_list(), watermarks["date"].cast(pl.Date).to_list())
+    )
+    return {ticker: last_dates.get(ticker.upper()) for ticker in tickers}
+
+
+def read_stored_tickers(conn) -> list[str]:
+    """Tickers having history in `ticker_history` table, in sorted order."""
+    return (
+        pl.read_database(stored_tickers_query(), conn)["ticker"]
+        .cast(pl.String)
+        .to_list()
+    )
+
+
+@dataclass
+class UpsertResult:
+    """
+    Outcome of a `ticker_history` upsert.
+
+    Attributes
+    ----------
+        received : int
+            Rows given to the upsert
+        inserted : int
+            New rows added to the table
+        updated : int
+            Existing rows whose prices changed
+        updated_tickers : set[str]
+            Tickers having any of the updated rows, their derived data is stale
+    """
+
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    updated_tickers: set[str] = field(default_factory=set)
+
+    @property
+    def unchanged(self) -> int:
+        return self.received - self.inserted - self.updated
+
+    def __add__(self, other: "UpsertResult") -> "UpsertResult":
+        return UpsertResult(
+            received=self.received + other.received,
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            updated_tickers=self.updated_tickers | other.updated_tickers,
+        )
+
+
+_STAGING_TABLE = "ticker_history_staging"
+
+
+def upsert_ticker_history(conn, df: pl.DataFrame) -> UpsertResult:
+    """
+    Idempotently write rows prepared by `prepare_ticker_history_table` into
+    `ticker_history` within a single transaction.
+
+    Rows are streamed as arrow batches through the driver's bulk ingest (COPY) into
+    a temporary staging table & then merged into `ticker_history`, inserting new
+    rows & updating the existing ones. Missing yearly partitions are created first.
+
+    Parameters
+    ----------
+    conn
+        ADBC database connection
+    df: pl.DataFrame
+        rows to upsert
+
+    Returns
+    -------
+    UpsertResult
+        number of inserted & updated rows, along with the updated tickers
+    """
+    if df.is_empty():
+        return UpsertResult()
+    data = df.select(TICKER_HISTORY_COLUMNS).to_arrow()
+    years = df.select(
+        pl.col("date").dt.year().min().alias("min"),
+        pl.col("date").dt.year().max().alias("max"),
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                ensure_partitions_query(years["min"].item(), years["max"].item())
+            )
+            cursor.execute(f"drop table if exists {_STAGING_TABLE}")
+            cursor.adbc_ingest(_STAGING_TABLE, data, mode="create", temporary=True)
+            cursor.execute(upsert_ticker_history_query(_STAGING_TABLE))
+            inserted, updated, updated_tickers = cursor.fetchone()
+            cursor.execute(f"drop table {_STAGING_TABLE}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return UpsertResult(
+        received=df.height,
+        inserted=inserted,
+        updated=updated,
+        updated_tickers=set(updated_tickers or ()),
+    )
+
+
+def read_super_trend_states(
+    conn, tickers: list[str], lookback_periods: int, multiplier: float
+) -> dict[str, dict]:
+    """
+    Read materialized SuperTrend state of many tickers for a parameter pair.
+
+    Parameters
+    ----------
+    conn
+        database connection
+    tickers: list[str]
+        ticker symbols, as stored in the table
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+
+    Returns
+    -------
+    dict[str, dict]
+        state of every materialized ticker, as given to `write_super_trend`
+    """
+    if not tickers:
+        return {}
+    states = pl.read_database(
+        super_trend_states_query(
+            [t.upper() for t in tickers], lookback_periods, multiplier
+        ),
+        conn,
+    )
+    return {
+        ticker: json.loads(state)
+        for ticker, state in zip(states["ticker"], states["state"])
+    }
+
+
+def read_super_trend(
+    conn,
+    tickers: list[str],
+    lookback_periods: int,
+    multiplier: float,
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[str, pl.DataFrame]:
+    """
+    Read materialized SuperTrend of many tickers using a single query.
+
+    Parameters
+    ----------
+    conn
+        database connection
+    tickers: list[str]
+        ticker symbols, as stored in the table
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+    start: date | None
+        inclusive start date, entire history when not given
+    end: date | None
+        inclusive end date
+
+    Returns
+    -------
+    dict[str, pl.DataFrame]
+        indicator of every materialized ticker, along with the prices it was
+        calculated from
+    """
+    result = pl.read_database(
+        get_super_trend_query(
+            [t.upper() for t in tickers], lookback_periods, multiplier, start, end
+        ),
+        conn,
+    )
+    if result.is_empty():
+        return {}
+    result = result.select(
+        pl.col("ticker").cast(pl.String),
+        pl.col("date").cast(pl.Date),
+        pl.col("open", "high", "low", "close").cast(pl.Float64).round(3),
+        pl.lit(None, dtype=pl.Float64).alias("volume"),
+        pl.col("super_trend", "upper", "lower").cast(pl.Float64),
+    ).sort("ticker", "date")
+    return split_ticker_frame(result)
+
+
+_SUPER_TREND_STAGING_TABLE = "indicator_super_trend_staging"
+_SUPER_TREND_STATE_STAGING_TABLE = "indicator_super_trend_state_staging"
+
+
+def write_super_trend(
+    conn,
+    result: pl.DataFrame,
+    states: dict[str, dict],
+    lookback_periods: int,
+    multiplier: float,
+    replace: bool = False,
+) -> int:
+    """
+    Write materialized SuperTrend rows & states of many tickers within a single
+    transaction, so stored rows always match their state.
+
+    Parameters
+    ----------
+    conn
+        ADBC database connection
+    result: pl.DataFrame
+        indicator in long format, with `ticker`, `date`, `super_trend`, `upper` &
+        `lower` columns
+    states: dict[str, dict]
+        state of each ticker after its last calculated bar, with `last_date` key
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+    replace: bool
+        remove stored rows of the tickers first, when they were recalculated from
+        their first bar
+
+    Returns
+    -------
+    int
+        number of written rows
+    """
+    states = {
+        ticker: state
+        for ticker, state in states.items()
+        if state.get("last_date") is not None
+    }
+    if not states:
+        return 0
+    params = {
+        "lookback_periods": pl.lit(lookback_periods, dtype=pl.Int32),
+        "multiplier": pl.lit(multiplier, dtype=pl.Float64),
+    }
+    rows = result.select(
+        pl.col("ticker").str.to_uppercase(), pl.col("date").cast(pl.Date)
+    ).with_columns(
+        **params,
+        super_trend=result["super_trend"].cast(pl.Float64),
+        upper=result["upper"].cast(pl.Float64),
+        lower=result["lower"].cast(pl.Float64),
+    )
+    state_rows = pl.DataFrame(
+        {
+            "ticker": [ticker.upper() for ticker in states],
+            "last_date": [
+                date.fromisoformat(state["last_date"]) for state in states.values()
+            ],
+            "state": [json.dumps(state) for state in states.values()],
+        },
+        schema={"ticker": pl.String, "last_date": pl.Date, "state": pl.String},
+    ).with_columns(**params)
+    try:
+        with conn.cursor() as cursor:
+            if replace:
+                cursor.execute(
+                    delete_super_trend_query(
+                        [t.upper() for t in states], lookback_periods, multiplier
+                    )
+                )
+            for staging_table, data, query in (
+                (
+                    _SUPER_TREND_STAGING_TABLE,
+                    rows.select(SUPER_TREND_COLUMNS),
+                    upsert_super_trend_query,
+                ),
+                (
+                    _SUPER_TREND_STATE_STAGING_TABLE,
+                    state_rows.select(SUPER_TREND_STATE_COLUMNS),
+                    upsert_super_trend_state_query,
+                ),
+            ):
+                cursor.execute(f"drop table if exists {staging_table}")
+                cursor.adbc_ingest(
+                    staging_table, data.to_arrow(), mode="create", temporary=True
+                )
+                cursor.execute(query(staging_table))
+                cursor.execute(f"drop table {staging_table}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rows.height
+
+
+UNIVERSE_SCHEMA = {
+    "exchange": pl.String,
+    "ticker": pl.String,
+    "name": pl.String,
+    "isin": pl.String,
+    "listed_on": pl.Date,
+    "is_active": pl.Boolean,
+    "indices": pl.List(pl.String),
+}
+
+
+def read_ticker_universe(conn, exchange: str | None = None) -> pl.DataFrame:
+    """
+    Read listings of `ticker_universe` registry.
+
+    Parameters
+    ----------
+    conn
+        database connection
+    exchange: str | None
+        exchange name, e.g. `NSE`, every exchange when not given
+
+    Returns
+    -------
+    pl.DataFrame
+        one row per listing, ordered by exchange & ticker
+    """
+    universe = pl.read_database(
+        ticker_universe_query(exchange and exchange.upper()), conn
+    )
+    if universe.is_empty():
+        return pl.DataFrame(schema=UNIVERSE_SCHEMA)
+    return universe.select(
+        pl.col(name).cast(dtype) for name, dtype in UNIVERSE_SCHEMA.items()
+    )
+
+
+def read_ticker_universe_version(conn) -> tuple[int, datetime | None]:
+    """Row count & last change of `ticker_universe` registry."""
+    version = pl.read_database(ticker_universe_version_query(), conn)
+    return version["listings"].item(), version["updated_at"].item()
+
+
+_UNIVERSE_STAGING_TABLE = "ticker_universe_staging"
+
+
+def upsert_ticker_universe(conn, listings: pl.DataFrame) -> int:
+    """
+    Idempotently write listings into `ticker_universe` registry.
+
+    Parameters
+    ----------
+    conn
+        ADBC database connection
+    listings: pl.DataFrame
+        listings with `exchange` & `ticker` columns, along with any of `name`,
+        `isin`, `listed_on`, `is_active` & `indices` (list of index names)
+
+    Returns
+    -------
+    int
+        number of given listings
+    """
+    if listings.is_empty():
+        return 0
+    defaults = {
+        "name": None,
+        "isin": None,
+        "listed_on": None,
+        "is_active": True,
+        "indices": [],
+    }
+    listings = listings.with_columns(
+        pl.lit(value, dtype=UNIVERSE_SCHEMA[name]).alias(name)
+        for name, value in defaults.items()
+        if name not in listings.columns
+    ).select(
+        pl.col("exchange").str.to_uppercase(),
+        pl.col("ticker").str.to_uppercase(),
+        *(
+            pl.col(name).cast(UNIVERSE_SCHEMA[name])
+            for name in UNIVERSE_COLUMNS[2:]
+            if name != "indices"
+        ),
+        pl.col("indices").cast(pl.List(pl.String)).list.join(","),
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"drop table if exists {_UNIVERSE_STAGING_TABLE}")
+            cursor.adbc_ingest(
+                _UNIVERSE_STAGING_TABLE,
+                listings.to_arrow(),
+                mode="create",
+                temporary=True,
+            )
+            cursor.execute(upsert_ticker_universe_query(_UNIVERSE_STAGING_TABLE))
+            cursor.execute(f"drop table {_UNIVERSE_STAGING_TABLE}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return listings.height
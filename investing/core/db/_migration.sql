@@ -0,0 +1,31 @@
+-- Migrates `ticker_history` from the text `key` primary key layout to the yearly
+-- partitioned (ticker, date) layout, run in a single transaction by
+-- `pipeline/migrate_db.py` after checking the table still has the `key` column
+alter table factor_investing.ticker_history
+    rename to ticker_history_legacy;
+alter table factor_investing.ticker_history_legacy
+    rename constraint ticker_history_pkey to ticker_history_legacy_pkey;
+-- index of the new layout may already be created on legacy table by `setup_db.py`
+drop index if exists factor_investing.idx_ticker_history_date;
+
+{table_ddl}
+
+select factor_investing.ensure_ticker_history_partitions(
+               extract(year from min(date))::integer,
+               extract(year from max(date))::integer
+       )
+from factor_investing.ticker_history_legacy
+having count(*) > 0;
+
+-- copying in date order keeps BRIN ranges of every partition tight
+insert into factor_investing.ticker_history (ticker, date, open, high, low, close)
+select ticker, date, open, high, low, close
+from factor_investing.ticker_history_legacy
+where ticker is not null
+  and date is not null
+order by date, ticker
+on conflict (ticker, date) do nothing;
+
+drop table factor_investing.ticker_history_legacy;
+
+analyze factor_investing.ticker_history;
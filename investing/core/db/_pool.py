@@ -0,0 +1,229 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from investing.core.exception import DatabasePoolError
+
+if TYPE_CHECKING:
+    from adbc_driver_postgresql import dbapi
+
+logger = logging.getLogger("factor-investing")
+
+
+@dataclass
+class PoolStats:
+    """
+    Counters of the connection pool.
+
+    Attributes
+    ----------
+        size : int
+            Open connections, idle & in use
+        idle : int
+            Connections ready to be acquired
+        in_use : int
+            Connections currently checked out
+        waiting : int
+            Callers waiting for a connection
+        acquired : int
+            Total successful checkouts
+        created : int
+            Total connections opened
+        discarded : int
+            Total connections closed because they were broken
+        timeouts : int
+            Total checkouts which timed out
+    """
+
+    size: int = 0
+    idle: int = 0
+    in_use: int = 0
+    waiting: int = 0
+    acquired: int = 0
+    created: int = 0
+    discarded: int = 0
+    timeouts: int = 0
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of ADBC database connections.
+
+    Idle connections are validated before being handed out when they were not used
+    for `health_check_interval` seconds, broken ones are replaced transparently.
+
+    Parameters
+    ----------
+    uri: str
+        Database connection uri
+    min_size: int
+        Connections opened upfront & kept open
+    max_size: int
+        Maximum number of open connections
+    acquire_timeout: float
+        Seconds to wait for a free connection before raising `DatabasePoolError`
+    health_check_interval: float
+        Idle seconds after which a connection is validated before use
+    connect: Callable | None
+        Function creating a new connection from uri, by default `connect` of ADBC
+        postgresql driver
+    """
+
+    _health_check_query = "SELECT 1"
+
+    def __init__(
+        self,
+        uri: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        connect: Callable[[str], "dbapi.Connection"] | None = None,
+    ):
+        if not 0 <= min_size <= max_size:
+            raise ValueError("pool size must satisfy 0 <= min_size <= max_size")
+        self.uri = uri
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        if connect is None:
+            # NOTE - ADBC driver imports pyarrow & pandas, only needed once connecting
+            from adbc_driver_postgresql import dbapi
+
+            connect = dbapi.connect
+        self._connect = connect
+        self._idle: deque[tuple["dbapi.Connection", float]] = deque()
+        self._stats = PoolStats()
+        self._condition = threading.Condition()
+        self._closed = False
+        for _ in range(min_size):
+            self._idle.append((self._create(), time.monotonic()))
+        self._stats.size = min_size
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            self._stats.idle = len(self._idle)
+            self._stats.in_use = self._stats.size - self._stats.idle
+            return asdict(self._stats)
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator["dbapi.Connection"]:
+        """Check out a connection for the duration of the `with` block."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def acquire(self, timeout: float | None = None) -> "dbapi.Connection":
+        deadline = time.monotonic() + (
+            self.acquire_timeout if timeout is None else timeout
+        )
+        while True:
+            conn, last_used = self._checkout(deadline)
+            if conn is None:
+                # a free slot was reserved, opening a new connection in it
+                try:
+                    conn = self._create()
+                except Exception:
+                    with self._condition:
+                        self._stats.size -= 1
+                        self._condition.notify()
+                    raise
+            elif (
+                time.monotonic() - last_used > self.health_check_interval
+                and not self._is_alive(conn)
+            ):
+                self._discard(conn)
+                continue
+            with self._condition:
+                self._stats.acquired += 1
+            return conn
+
+    def release(self, conn: "dbapi.Connection"):
+        try:
+            # ending any open transaction, so the next user gets a clean connection
+            conn.rollback()
+        except Exception as e:
+            logger.warning(f"discarding broken database connection: {e}")
+            self._discard(conn)
+            return
+        with self._condition:
+            if self._closed:
+                self._stats.size -= 1
+                self._close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._stats.size -= 1
+                self._close(conn)
+            self._condition.notify_all()
+        logger.info("closed database connection pool")
+
+    def _checkout(
+        self, deadline: float
+    ) -> "tuple[dbapi.Connection | None, float | None]":
+        with self._condition:
+            self._stats.waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise DatabasePoolError("connection pool is closed")
+                    if self._idle:
+                        # most recently used connection is the most likely to be alive
+                        return self._idle.pop()
+                    if self._stats.size < self.max_size:
+                        self._stats.size += 1
+                        return None, None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats.timeouts += 1
+                        raise DatabasePoolError(
+                            f"timed out waiting for a database connection, all "
+                            f"{self.max_size} connections are in use"
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self._stats.waiting -= 1
+
+    def _create(self) -> "dbapi.Connection":
+        conn = self._connect(self.uri)
+        with self._condition:
+            self._stats.created += 1
+        return conn
+
+    def _is_alive(self, conn: "dbapi.Connection") -> bool:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self._health_check_query)
+                cursor.fetchall()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"database connection failed health check: {e}")
+            return False
+
+    def _discard(self, conn: "dbapi.Connection"):
+        self._close(conn)
+        with self._condition:
+            self._stats.size -= 1
+            self._stats.discarded += 1
+            self._condition.notify()
+
+    @staticmethod
+    def _close(conn: "dbapi.Connection"):
+        try:
+            conn.close()
+        except Exception:
+            pass
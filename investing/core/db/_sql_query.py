@@ -29,3 +29,352 @@ def get_ticker_history_query(ticker: str) -> str:
         .eq(ticker)
         .sql(Dialects.POSTGRES)
     )
+
+
+def ticker_watermarks_query(tickers: list[str]) -> str:
+    """
+    Last stored date of every given ticker, `null` for tickers not in the table.
+
+    NOTE - one `max(date)` lookup per ticker on (ticker, date) index, instead of
+    scanning the whole table with `group by`
+    """
+    last_date = (
+        select(exp.Max(this=exp.column("date")))
+        .from_(f"{TABLE_FULL_NAME} AS history")
+        .where(
+            exp.column("ticker", table="history").eq(exp.column("ticker", table="t"))
+        )
+        .subquery()
+    )
+    tickers_array = exp.Array(expressions=[exp.Literal.string(t) for t in tickers])
+    return (
+        select(exp.column("ticker", table="t"), last_date.as_("date"))
+        .from_(
+            exp.Unnest(
+                expressions=[tickers_array],
+                alias=exp.TableAlias(
+                    this=exp.to_identifier("t"),
+                    columns=[exp.to_identifier("ticker")],
+                ),
+            )
+        )
+        .sql(Dialects.POSTGRES)
+    )
+
+
+def stored_tickers_query() -> str:
+    """
+    Distinct tickers having history in the table.
+
+    NOTE - recursive loose index scan jumps from one ticker to the next on
+    (ticker, date) index, instead of reading every row like `select distinct`
+    """
+    return f"""
+        with recursive tickers as (
+            (select ticker from {TABLE_FULL_NAME} order by ticker limit 1)
+            union all
+            select (
+                select history.ticker from {TABLE_FULL_NAME} as history
+                where history.ticker > tickers.ticker
+                order by history.ticker limit 1
+            )
+            from tickers
+            where tickers.ticker is not null
+        )
+        select ticker from tickers where ticker is not null
+    """
+
+
+def get_tickers_history_query(
+    tickers: list[str],
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+) -> str:
+    """Set based history query of many tickers over an (inclusive) date range."""
+    query = (
+        select("date", "ticker", "open", "high", "low", "close")
+        .from_(TABLE_FULL_NAME)
+        .where(
+            exp.column("ticker").eq(
+                exp.Any(
+                    this=exp.Paren(
+                        this=exp.Array(
+                            expressions=[exp.Literal.string(t) for t in tickers]
+                        )
+                    )
+                )
+            )
+        )
+    )
+    if start:
+        query = query.where(exp.column("date") >= _date_literal(start))
+    if end:
+        query = query.where(exp.column("date") <= _date_literal(end))
+    return query.sql(Dialects.POSTGRES)
+
+
+def _date_literal(value: datetime.date) -> exp.Expression:
+    return exp.cast(exp.Literal.string(value.isoformat()), "date")
+
+
+TICKER_HISTORY_COLUMNS = ("ticker", "date", "open", "high", "low", "close")
+TICKER_HISTORY_CONFLICT_KEY = ("ticker", "date")
+
+
+def ensure_partitions_query(from_year: int, to_year: int) -> str:
+    """Create missing yearly partitions of `ticker_history` over given years."""
+    return select(
+        exp.func(
+            "factor_investing.ensure_ticker_history_partitions",
+            exp.Literal.number(from_year),
+            exp.Literal.number(to_year),
+        )
+    ).sql(Dialects.POSTGRES)
+
+
+def upsert_ticker_history_query(staging_table: str) -> str:
+    """
+    Merge rows of `staging_table` into `ticker_history`, returning the number of
+    inserted & updated rows & the tickers of updated ones. Rows identical to the
+    stored ones are left untouched, so re-running an ingest is a no-op.
+    """
+    columns = ", ".join(TICKER_HISTORY_COLUMNS)
+    conflict_key = ", ".join(TICKER_HISTORY_CONFLICT_KEY)
+    updated = [
+        c for c in TICKER_HISTORY_COLUMNS if c not in TICKER_HISTORY_CONFLICT_KEY
+    ]
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in updated)
+    current = ", ".join(f"target.{c}" for c in updated)
+    incoming = ", ".join(f"excluded.{c}" for c in updated)
+    # NOTE - every CTE sees the table as it was before the insert, so `existing`
+    # tells updated rows apart (`xmax` can't be returned from a partitioned table)
+    return f"""
+        with staged as (
+            select distinct on ({conflict_key}) {columns} from {staging_table}
+        ),
+        existing as (
+            select {conflict_key} from staged
+            join {TABLE_FULL_NAME} using ({conflict_key})
+        ),
+        merged as (
+            insert into {TABLE_FULL_NAME} as target ({columns})
+            select {columns} from staged
+            on conflict ({conflict_key}) do update set {assignments}
+            where ({current}) is distinct from ({incoming})
+            returning {conflict_key}
+        )
+        select
+            count(*) filter (where existing.ticker is null) as inserted,
+            count(*) filter (where existing.ticker is not null) as updated,
+            array_agg(distinct existing.ticker::text) filter (
+                where existing.ticker is not null
+            ) as updated_tickers
+        from merged
+        left join existing using ({conflict_key})
+    """
+
+
+SUPER_TREND_TABLE_FULL_NAME = "factor_investing.indicator_super_trend"
+SUPER_TREND_STATE_TABLE_FULL_NAME = "factor_investing.indicator_super_trend_state"
+SUPER_TREND_COLUMNS = (
+    "ticker",
+    "lookback_periods",
+    "multiplier",
+    "date",
+    "super_trend",
+    "upper",
+    "lower",
+)
+SUPER_TREND_STATE_COLUMNS = (
+    "ticker",
+    "lookback_periods",
+    "multiplier",
+    "last_date",
+    "state",
+)
+
+
+def _super_trend_filter(
+    tickers: list[str], lookback_periods: int, multiplier: float, table: str
+) -> exp.Expression:
+    return exp.and_(
+        exp.column("ticker", table=table).eq(
+            exp.Any(
+                this=exp.Paren(
+                    this=exp.Array(expressions=[exp.Literal.string(t) for t in tickers])
+                )
+            )
+        ),
+        exp.column("lookback_periods", table=table).eq(
+            exp.Literal.number(lookback_periods)
+        ),
+        exp.column("multiplier", table=table).eq(
+            exp.cast(exp.Literal.number(float(multiplier)), "double precision")
+        ),
+    )
+
+
+def super_trend_states_query(
+    tickers: list[str], lookback_periods: int, multiplier: float
+) -> str:
+    """Materialized SuperTrend state of given tickers for a parameter pair."""
+    return (
+        select(
+            "ticker",
+            "last_date",
+            exp.cast(exp.column("state"), "text").as_("state"),
+        )
+        .from_(f"{SUPER_TREND_STATE_TABLE_FULL_NAME} AS state")
+        .where(_super_trend_filter(tickers, lookback_periods, multiplier, "state"))
+        .sql(Dialects.POSTGRES)
+    )
+
+
+def get_super_trend_query(
+    tickers: list[str],
+    lookback_periods: int,
+    multiplier: float,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+) -> str:
+    """
+    Materialized SuperTrend of many tickers over an (inclusive) date range, along
+    with the prices it was calculated from.
+    """
+    query = (
+        select(
+            "indicator.ticker",
+            "indicator.date",
+            "history.open",
+            "history.high",
+            "history.low",
+            "history.close",
+            "indicator.super_trend",
+            "indicator.upper",
+            "indicator.lower",
+        )
+        .from_(f"{SUPER_TREND_TABLE_FULL_NAME} AS indicator")
+        .join(
+            f"{TABLE_FULL_NAME} AS history",
+            on="indicator.ticker = history.ticker AND indicator.date = history.date",
+            join_type="left",
+        )
+        .where(_super_trend_filter(tickers, lookback_periods, multiplier, "indicator"))
+    )
+    if start:
+        query = query.where(
+            exp.column("date", table="indicator") >= _date_literal(start)
+        )
+    if end:
+        query = query.where(exp.column("date", table="indicator") <= _date_literal(end))
+    return query.sql(Dialects.POSTGRES)
+
+
+def upsert_super_trend_query(staging_table: str) -> str:
+    """Merge materialized SuperTrend rows of `staging_table`, replacing stored ones."""
+    return _upsert_query(
+        SUPER_TREND_TABLE_FULL_NAME,
+        staging_table,
+        SUPER_TREND_COLUMNS,
+        ("ticker", "lookback_periods", "multiplier", "date"),
+    )
+
+
+def upsert_super_trend_state_query(staging_table: str) -> str:
+    """Merge SuperTrend states of `staging_table`, state is staged as JSON text."""
+    return _upsert_query(
+        SUPER_TREND_STATE_TABLE_FULL_NAME,
+        staging_table,
+        SUPER_TREND_STATE_COLUMNS,
+        ("ticker", "lookback_periods", "multiplier"),
+        casts={"state": "jsonb"},
+    )
+
+
+def delete_super_trend_query(
+    tickers: list[str], lookback_periods: int, multiplier: float
+) -> str:
+    """Remove materialized SuperTrend rows of given tickers for a parameter pair."""
+    return (
+        exp.delete(SUPER_TREND_TABLE_FULL_NAME)
+        .where(
+            _super_trend_filter(
+                tickers, lookback_periods, multiplier, "indicator_super_trend"
+            )
+        )
+        .sql(Dialects.POSTGRES)
+    )
+
+
+def _upsert_query(
+    table: str,
+    staging_table: str,
+    columns: tuple[str, ...],
+    conflict_key: tuple[str, ...],
+    casts: dict[str, str] | None = None,
+) -> str:
+    casts = casts or {}
+    selected = ", ".join(f"{c}::{casts[c]}" if c in casts else c for c in columns)
+    assignments = ", ".join(
+        f"{c} = excluded.{c}" for c in columns if c not in conflict_key
+    )
+    return f"""
+        insert into {table} ({", ".join(columns)})
+        select distinct on ({", ".join(conflict_key)}) {selected} from {staging_table}
+        on conflict ({", ".join(conflict_key)}) do update set {assignments}
+    """
+
+
+UNIVERSE_TABLE_FULL_NAME = "factor_investing.ticker_universe"
+UNIVERSE_COLUMNS = (
+    "exchange",
+    "ticker",
+    "name",
+    "isin",
+    "listed_on",
+    "is_active",
+    "indices",
+)
+
+
+def ticker_universe_query(exchange: str | None = None) -> str:
+    """Listings of the registry, of every exchange when not given."""
+    query = select(*UNIVERSE_COLUMNS).from_(UNIVERSE_TABLE_FULL_NAME)
+    if exchange:
+        query = query.where(exp.column("exchange").eq(exp.Literal.string(exchange)))
+    return query.order_by("exchange", "ticker").sql(Dialects.POSTGRES)
+
+
+def ticker_universe_version_query() -> str:
+    """Row count & last change of the registry, telling whether it changed."""
+    return (
+        select(
+            exp.Count(this=exp.Star()).as_("listings"),
+            exp.Max(this=exp.column("updated_at")).as_("updated_at"),
+        )
+        .from_(UNIVERSE_TABLE_FULL_NAME)
+        .sql(Dialects.POSTGRES)
+    )
+
+
+def upsert_ticker_universe_query(staging_table: str) -> str:
+    """
+    Merge listings of `staging_table` into the registry, `indices` is staged as
+    comma separated text. Only changed listings get a new `updated_at`.
+    """
+    columns = ", ".join(UNIVERSE_COLUMNS)
+    updated = [c for c in UNIVERSE_COLUMNS if c not in ("exchange", "ticker")]
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in updated)
+    current = ", ".join(f"target.{c}" for c in updated)
+    incoming = ", ".join(f"excluded.{c}" for c in updated)
+    return f"""
+        insert into {UNIVERSE_TABLE_FULL_NAME} as target ({columns}, updated_at)
+        select distinct on (exchange, ticker)
+            exchange, ticker, name, isin, listed_on, is_active,
+            string_to_array(coalesce(indices, ''), ',')::text[] as indices,
+            now()
+        from {staging_table}
+        on conflict (exchange, ticker) do update
+        set {assignments}, updated_at = excluded.updated_at
+        where ({current}) is distinct from ({incoming})
+    """
@@ -1,16 +1,80 @@
 create table if not exists factor_investing.ticker_history
 (
-    date   date,
-    ticker text,
-    key    text primary key,
+    ticker text             not null,
+    date   date             not null,
     open   double precision,
     high   double precision,
     low    double precision,
-    close  double precision
+    close  double precision,
+    primary key (ticker, date)
+) partition by range (date);
+
+-- yearly partitions are created on demand while ingesting history
+create or replace function factor_investing.ensure_ticker_history_partitions(
+    from_year integer,
+    to_year integer
+) returns void
+    language plpgsql
+as
+$$
+declare
+    partition_year integer;
+begin
+    for partition_year in from_year..to_year
+        loop
+            execute format(
+                    'create table if not exists factor_investing.ticker_history_%s '
+                        'partition of factor_investing.ticker_history '
+                        'for values from (%L) to (%L)',
+                    partition_year,
+                    make_date(partition_year, 1, 1),
+                    make_date(partition_year + 1, 1, 1)
+                    );
+        end loop;
+end;
+$$;
+
+-- history is appended in date order, so a tiny BRIN index serves cross-sectional
+-- reads of a date within its yearly partition
+create index if not exists idx_ticker_history_date
+    on factor_investing.ticker_history using brin (date);
+
+-- SuperTrend materialized over entire stored history for every configured
+-- (lookback_periods, multiplier) pair, by the post ingest pipeline stage
+create table if not exists factor_investing.indicator_super_trend
+(
+    ticker           text             not null,
+    lookback_periods integer          not null,
+    multiplier       double precision not null,
+    date             date             not null,
+    super_trend      double precision,
+    upper            double precision,
+    lower            double precision,
+    primary key (ticker, lookback_periods, multiplier, date)
 );
 
-create index idx_key
-    on factor_investing.ticker_history (key);
+-- state after the last materialized bar, so the next run only computes new bars
+create table if not exists factor_investing.indicator_super_trend_state
+(
+    ticker           text             not null,
+    lookback_periods integer          not null,
+    multiplier       double precision not null,
+    last_date        date             not null,
+    state            jsonb            not null,
+    primary key (ticker, lookback_periods, multiplier)
+);
 
-create index idx_date
-    on factor_investing.ticker_history (date);
+-- registry of listed tickers, loaded into an in-memory index by the REST API &
+-- refreshed whenever `updated_at` or the row count changes
+create table if not exists factor_investing.ticker_universe
+(
+    exchange   text        not null,
+    ticker     text        not null,
+    name       text,
+    isin       text,
+    listed_on  date,
+    is_active  boolean     not null default true,
+    indices    text[]      not null default '{}',
+    updated_at timestamptz not null default now(),
+    primary key (exchange, ticker)
+);
@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Iterable
+
+import polars as pl
+
+from investing.core.utils import create_batches_list, has_weekday
+
+logger = logging.getLogger("factor-investing")
+
+HistoryDownload = Callable[[list[str], date | None, date], dict[str, pl.DataFrame]]
+"""Download history of given tickers for `(tickers, start, exclusive end)`,
+entire history when start is `None`"""
+
+HistorySink = Callable[[dict[str, pl.DataFrame]], None]
+"""Persist downloaded history of a batch of tickers"""
+
+
+@dataclass(frozen=True)
+class DownloadUnit:
+    """
+    Batch of tickers downloaded together over the same date range.
+
+    Attributes
+    ----------
+        tickers : tuple[str, ...]
+            Ticker symbols of the batch
+        start : date | None
+            Start date of history, entire history when `None`
+        end : date
+            Exclusive end date of history
+    """
+
+    tickers: tuple[str, ...]
+    start: date | None
+    end: date
+
+
+@dataclass
+class DownloadReport:
+    """
+    Outcome of a download run.
+
+    Attributes
+    ----------
+        completed : list[str]
+            Tickers downloaded & persisted in this run
+        skipped : list[str]
+            Tickers already completed by an earlier (interrupted) run
+        empty : list[str]
+            Tickers which had no history in the requested range
+        failed : dict[str, str]
+            Tickers which could not be downloaded after all retries, with last error
+    """
+
+    completed: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    empty: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def plan_download_units(
+    watermarks: dict[str, date | None], end: date, batch_size: int
+) -> list[DownloadUnit]:
+    """
+    Plan incremental download of every ticker from the day after its watermark.
+
+    Tickers needing the same start date are batched together, so every download
+    only covers the smallest range its members require. Tickers without watermark
+    get their entire history & up to date ones are left out.
+
+    Parameters
+    ----------
+    watermarks: dict[str, date | None]
+        last stored date of each ticker, `None` when nothing is stored
+    end: date
+        exclusive end date of history
+    batch_size: int
+        maximum tickers downloaded together
+
+    Returns
+    -------
+    list[DownloadUnit]
+        units to download, entire history ones first
+    """
+    groups: dict[date | None, list[str]] = defaultdict(list)
+    for ticker, watermark in watermarks.items():
+        start = watermark + timedelta(days=1) if watermark else None
+        if start is None or has_weekday(start, end - timedelta(days=1)):
+            groups[start].append(ticker)
+    return [
+        DownloadUnit(tuple(batch), start, end)
+        for start in sorted(groups, key=lambda s: s or date.min)
+        for batch in create_batches_list(groups[start], batch_size)
+    ]
+
+
+class DownloadCheckpoint:
+    """
+    Append only JSON lines file recording completed (ticker, start, end) units, so an
+    interrupted run resumes from where it stopped. The planned units of a run are
+    stored alongside, so the resumed run downloads the same date ranges.
+
+    Parameters
+    ----------
+    path: Path
+        Checkpoint file, created when missing
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._done = self._load()
+
+    def is_done(self, ticker: str, start: date | None, end: date) -> bool:
+        return self._key(ticker, start, end) in self._done
+
+    def mark_done(self, tickers: Iterable[str], start: date | None, end: date):
+        records = [
+            {"ticker": ticker, "start": start and start.isoformat(), "end": str(end)}
+            for ticker in tickers
+        ]
+        with self._lock, self.path.open("a") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+            f.flush()
+            os.fsync(f.fileno())
+            self._done.update(self._key(ticker, start, end) for ticker in tickers)
+
+    def save_units(self, units: list[DownloadUnit]):
+        data = [
+            {
+                "tickers": list(unit.tickers),
+                "start": unit.start and unit.start.isoformat(),
+                "end": unit.end.isoformat(),
+            }
+            for unit in units
+        ]
+        temp_path = self._units_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(data))
+        os.replace(temp_path, self._units_path)
+
+    def saved_units(self, end: date | None = None) -> list[DownloadUnit] | None:
+        """
+        Units planned by an interrupted run, `None` when nothing is to resume.
+
+        A plan ending before `end` is stale, e.g. left behind by tickers which kept
+        failing, so the checkpoint is cleared & a fresh plan is needed instead of
+        replaying its old date ranges forever.
+        """
+        if not self._units_path.exists():
+            return None
+        units = [
+            DownloadUnit(
+                tickers=tuple(unit["tickers"]),
+                start=date.fromisoformat(unit["start"]) if unit["start"] else None,
+                end=date.fromisoformat(unit["end"]),
+            )
+            for unit in json.loads(self._units_path.read_text())
+        ]
+        if end is not None and any(unit.end < end for unit in units):
+            logger.info(f"discarding download plan older than {end}")
+            self.clear()
+            return None
+        return units
+
+    def clear(self):
+        with self._lock:
+            self._done.clear()
+            self.path.unlink(missing_ok=True)
+            self._units_path.unlink(missing_ok=True)
+
+    @property
+    def _units_path(self) -> Path:
+        return self.path.with_suffix(".units.json")
+
+    def _load(self) -> set[tuple[str, str | None, str]]:
+        if not self.path.exists():
+            return set()
+        done = set()
+        for line in self.path.read_text().splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # NOTE - last line may be partially written when the run was killed
+                logger.warning(f"ignoring corrupt checkpoint line: {line!r}")
+                continue
+            done.add((record["ticker"], record["start"], record["end"]))
+        return done
+
+    @staticmethod
+    def _key(ticker: str, start: date | None, end: date) -> tuple[str, str | None, str]:
+        return ticker, start and start.isoformat(), end.isoformat()
+
+
+class BatchDownloader:
+    """
+    Download batches of tickers in parallel, retrying failed tickers with exponential
+    backoff & checkpointing every batch once it is persisted.
+
+    Downloads run on a bounded thread pool while `sink` is called from the calling
+    thread, one batch at a time, so it can safely reuse a single database connection.
+
+    Parameters
+    ----------
+    fetch: HistoryDownload
+        Function downloading history of a batch of tickers
+    max_workers: int
+        Maximum number of batches downloaded in parallel
+    max_retries: int
+        Retries of a ticker whose download failed
+    backoff_seconds: float
+        Wait before the first retry, doubled on every further retry
+    checkpoint: DownloadCheckpoint | None
+        Record of completed units, no resume when not given
+    """
+
+    def __init__(
+        self,
+        fetch: HistoryDownload,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        checkpoint: DownloadCheckpoint | None = None,
+    ):
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.checkpoint = checkpoint
+
+    def run(self, units: Iterable[DownloadUnit], sink: HistorySink) -> DownloadReport:
+        """
+        Download every unit & pass its history to `sink`.
+
+        Parameters
+        ----------
+        units: Iterable[DownloadUnit]
+            Batches of tickers to download
+        sink: HistorySink
+            Function persisting history of a downloaded batch
+
+        Returns
+        -------
+        DownloadReport
+            completed, skipped, empty & failed tickers
+        """
+        report = DownloadReport()
+        pending = []
+        for unit in units:
+            todo = tuple(
+                ticker
+                for ticker in unit.tickers
+                if self.checkpoint is None
+                or not self.checkpoint.is_done(ticker, unit.start, unit.end)
+            )
+            report.skipped.extend(t for t in unit.tickers if t not in todo)
+            if todo:
+                pending.append(DownloadUnit(todo, unit.start, unit.end))
+        if report.skipped:
+            logger.info(f"resuming, skipping {len(report.skipped)} completed tickers")
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="factor-investing-download"
+        ) as executor:
+            futures = {executor.submit(self._download, unit): unit for unit in pending}
+            for future in as_completed(futures):
+                unit = futures[future]
+                history, failed = future.result()
+                report.failed.update(failed)
+                if not history:
+                    continue
+                sink(history)
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_done(history, unit.start, unit.end)
+                for ticker, data in history.items():
+                    (report.empty if data.is_empty() else report.completed).append(
+                        ticker
+                    )
+        return report
+
+    def _download(
+        self, unit: DownloadUnit
+    ) -> tuple[dict[str, pl.DataFrame], dict[str, str]]:
+        history: dict[str, pl.DataFrame] = {}
+        failed: dict[str, str] = {}
+        pending = list(unit.tickers)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                logger.info(f"retrying {pending} in {delay:.1f}s (attempt {attempt})")
+                time.sleep(delay)
+            try:
+                result = self.fetch(pending, unit.start, unit.end)
+            except Exception as e:
+                logger.warning(f"download of {pending} failed: {e}")
+                failed = dict.fromkeys(pending, repr(e))
+                continue
+
+            # NOTE - yahoo drops tickers of a throttled request, so empty entire
+            # history is retried. Empty incremental history just had no new bars,
+            # e.g. over a holiday, & is accepted without backing off
+            retry_empty = unit.start is None and attempt < self.max_retries
+            failed = {}
+            for ticker in pending:
+                data = result.get(ticker)
+                if data is None:
+                    failed[ticker] = "missing in download result"
+                elif data.is_empty() and retry_empty:
+                    failed[ticker] = "empty download result"
+                else:
+                    history[ticker] = data
+            pending = list(failed)
+            if not pending:
+                break
+
+        if failed:
+            logger.warning(f"giving up on {list(failed)} after {attempt} retries")
+        return history, failed
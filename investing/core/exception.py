@@ -13,3 +13,19 @@ class InvestingIndicaError(Exception):
     def __init__(self, message: str):
         self.message = message
         super().__init__(self.message)
+
+
+class DatabasePoolError(Exception):
+    """Raised when a database connection can't be acquired from the pool"""
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class DataProviderError(Exception):
+    """Raised when a data provider can't serve the requested data"""
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
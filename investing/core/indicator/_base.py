@@ -1,8 +1,15 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import Callable
 
+import numpy as np
 import polars as pl
 
+from investing.core.cache import (
+    IndicatorResult,
+    data_fingerprint,
+    default_indicator_cache,
+)
 from investing.core.data import polars_to_quote
 
 
@@ -37,6 +44,23 @@ class IndicatorBase(ABC):
     @abstractmethod
     def rank(self): ...
 
+    def _cached(
+        self, method: str, calculate: Callable[[], IndicatorResult], *params
+    ) -> IndicatorResult:
+        """Get result of a calculation from the process wide indicator cache, keyed by
+        indicator, method, parameters & fingerprint of source data."""
+        cache = default_indicator_cache()
+        if cache is None:
+            return calculate()
+        key = (
+            type(self).__name__,
+            method,
+            params,
+            tuple(self.retain_source_column or ()),
+            data_fingerprint(self.data),
+        )
+        return cache.get_or_calculate(key, calculate)
+
     def _quote_data(self):
         if isinstance(self.data, dict):
             return {ticker: polars_to_quote(df) for ticker, df in self.data.items()}
@@ -51,3 +75,22 @@ class IndicatorBase(ABC):
             variable_name="indicator",
             value_name="price",
         )
+
+    @staticmethod
+    def _segment_data(data: pl.DataFrame) -> tuple[pl.DataFrame, np.ndarray]:
+        """Order long data by ticker & date (sorting only when needed) and get the
+        offsets of every ticker segment."""
+        runs = data["ticker"].rle()
+        offsets = np.concatenate(
+            ([0], np.cumsum(runs.struct.field("len").to_numpy(), dtype=np.int64))
+        )
+        # each ticker must be contiguous & dates must be increasing within each ticker
+        date_step = np.diff(data["date"].to_physical().to_numpy()) > 0
+        date_step[offsets[1:-1] - 1] = True
+        if not (runs.struct.field("value").is_unique().all() and date_step.all()):
+            data = data.sort("ticker", "date")
+            runs = data["ticker"].rle()
+            offsets = np.concatenate(
+                ([0], np.cumsum(runs.struct.field("len").to_numpy(), dtype=np.int64))
+            )
+        return data, offsets
@@ -0,0 +1,539 @@
+"""
+Columnar kernels shared by the native indicator engine.
+
+Everything in here works directly on contiguous ``float64`` numpy arrays. The cheap
+element-wise parts (true range, band mid-point) are vectorized, while the
+path-dependent recursions (Wilder's ATR, SuperTrend band carry-over) run in a tight
+loop which is compiled with ``numba`` when it is installed.
+
+Bulk calculations run over one long (stacked) set of columns, where every security
+occupies a contiguous segment described by an ``offsets`` array. Segments are
+independent, so with ``numba`` they are spread across all cores.
+
+The arithmetic intentionally mirrors `stock_indicators` (Skender.Stock.Indicators)
+step by step, so both engines produce the same values.
+"""
+
+import os
+
+import numpy as np
+
+try:
+    from numba import config, njit, prange
+
+    JIT = True
+
+    # NOTE - kernels are launched from worker threads of the REST API, tbb threading
+    # layer started outside of the main thread blocks interpreter exit, so OpenMP
+    # is preferred unless layer is chosen explicitly
+    if "NUMBA_THREADING_LAYER" not in os.environ:
+        config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+except ImportError:  # NOTE - numba is optional, fall back to plain python loops
+    JIT = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+@njit(cache=True, nogil=True)
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Calculate true range of every bar, first bar has no previous close so it is NaN.
+
+    Parameters
+    ----------
+    high: np.ndarray
+        High price of each bar
+    low: np.ndarray
+        Low price of each bar
+    close: np.ndarray
+        Close price of each bar
+
+    Returns
+    -------
+    np.ndarray
+        True range of each bar
+    """
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    return np.maximum(
+        high - low,
+        np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)),
+    )
+
+
+@njit(cache=True, nogil=True)
+def wilder_atr(tr: np.ndarray, lookback_periods: int) -> np.ndarray:
+    """
+    Calculate Average True Range using Wilder's smoothing.
+
+    ATR is seeded at index `lookback_periods` with the simple mean of the preceding
+    true ranges (excluding the first bar) and smoothed from there on.
+
+    Parameters
+    ----------
+    tr: np.ndarray
+        True range of each bar, as returned by `true_range`
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+
+    Returns
+    -------
+    np.ndarray
+        ATR of each bar, NaN during warm-up
+    """
+    length = tr.shape[0]
+    atr = np.full(length, np.nan)
+    sum_tr = 0.0
+    prev_atr = np.nan
+    for i in range(1, length):
+        if i > lookback_periods:
+            prev_atr = ((prev_atr * (lookback_periods - 1)) + tr[i]) / lookback_periods
+            atr[i] = prev_atr
+        elif i == lookback_periods:
+            sum_tr += tr[i]
+            prev_atr = sum_tr / lookback_periods
+            atr[i] = prev_atr
+        else:
+            sum_tr += tr[i]
+    return atr
+
+
+@njit(cache=True, nogil=True)
+def super_trend_bands(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    atr: np.ndarray,
+    lookback_periods: int,
+    multiplier: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the SuperTrend band recursion over a single security.
+
+    Parameters
+    ----------
+    high: np.ndarray
+        High price of each bar
+    low: np.ndarray
+        Low price of each bar
+    close: np.ndarray
+        Close price of each bar
+    atr: np.ndarray
+        ATR of each bar, as returned by `wilder_atr`
+    lookback_periods: int
+        Number of periods used for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        super trend, upper band & lower band of each bar, NaN where not available
+    """
+    length = close.shape[0]
+    super_trend = np.full(length, np.nan)
+    upper = np.full(length, np.nan)
+    lower = np.full(length, np.nan)
+
+    is_bullish = False
+    upper_band = np.nan
+    lower_band = np.nan
+    for i in range(lookback_periods, length):
+        mid = (high[i] + low[i]) / 2
+        prev_close = close[i - 1]
+
+        # potential bands
+        upper_eval = mid + (multiplier * atr[i])
+        lower_eval = mid - (multiplier * atr[i])
+
+        # initial values
+        if i == lookback_periods:
+            is_bullish = close[i] >= mid
+            upper_band = upper_eval
+            lower_band = lower_eval
+
+        # new upper band
+        if upper_eval < upper_band or prev_close > upper_band:
+            upper_band = upper_eval
+
+        # new lower band
+        if lower_eval > lower_band or prev_close < lower_band:
+            lower_band = lower_eval
+
+        # super trend
+        if close[i] <= (lower_band if is_bullish else upper_band):
+            super_trend[i] = upper_band
+            upper[i] = upper_band
+            is_bullish = False
+        else:
+            super_trend[i] = lower_band
+            lower[i] = lower_band
+            is_bullish = True
+
+    return super_trend, upper, lower
+
+
+@njit(cache=True, nogil=True)
+def super_trend(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    lookback_periods: int,
+    multiplier: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate SuperTrend of a single security from its OHLC columns.
+
+    Parameters
+    ----------
+    high: np.ndarray
+        High price of each bar
+    low: np.ndarray
+        Low price of each bar
+    close: np.ndarray
+        Close price of each bar
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        super trend, upper band & lower band of each bar, NaN where not available
+    """
+    atr = wilder_atr(true_range(high, low, close), lookback_periods)
+    return super_trend_bands(high, low, close, atr, lookback_periods, multiplier)
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def super_trend_segmented(
+    offsets: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    lookback_periods: int,
+    multiplier: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate SuperTrend of many securities stacked one after another.
+
+    Parameters
+    ----------
+    offsets: np.ndarray
+        Start index of every security segment followed by the total length, i.e.
+        segment ``k`` spans ``offsets[k]:offsets[k + 1]``
+    high: np.ndarray
+        High price of each bar
+    low: np.ndarray
+        Low price of each bar
+    close: np.ndarray
+        Close price of each bar
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        super trend, upper band & lower band of each bar, NaN where not available
+    """
+    length = close.shape[0]
+    result_super_trend = np.full(length, np.nan)
+    result_upper = np.full(length, np.nan)
+    result_lower = np.full(length, np.nan)
+    for k in prange(offsets.shape[0] - 1):
+        start, end = offsets[k], offsets[k + 1]
+        unit_super_trend, unit_upper, unit_lower = super_trend(
+            high[start:end],
+            low[start:end],
+            close[start:end],
+            lookback_periods,
+            multiplier,
+        )
+        result_super_trend[start:end] = unit_super_trend
+        result_upper[start:end] = unit_upper
+        result_lower[start:end] = unit_lower
+    return result_super_trend, result_upper, result_lower
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def true_range_segmented(
+    offsets: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray
+) -> np.ndarray:
+    """
+    Calculate true range of many securities stacked one after another, first bar of
+    every segment is NaN.
+
+    Parameters
+    ----------
+    offsets: np.ndarray
+        Start index of every security segment followed by the total length
+    high: np.ndarray
+        High price of each bar
+    low: np.ndarray
+        Low price of each bar
+    close: np.ndarray
+        Close price of each bar
+
+    Returns
+    -------
+    np.ndarray
+        True range of each bar
+    """
+    tr = np.empty(close.shape[0])
+    for k in prange(offsets.shape[0] - 1):
+        start, end = offsets[k], offsets[k + 1]
+        tr[start:end] = true_range(high[start:end], low[start:end], close[start:end])
+    return tr
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def super_trend_multipliers_segmented(
+    offsets: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    tr: np.ndarray,
+    lookback_periods: int,
+    multipliers: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate SuperTrend of many securities for one lookback & many multipliers,
+    from already calculated true range.
+
+    ATR of a segment is calculated once & only the band recursion runs for every
+    multiplier.
+
+    Parameters
+    ----------
+    offsets: np.ndarray
+        Start index of every security segment followed by the total length
+    high: np.ndarray
+        High price of each bar
+    low: np.ndarray
+        Low price of each bar
+    close: np.ndarray
+        Close price of each bar
+    tr: np.ndarray
+        True range of each bar, as returned by `true_range_segmented`
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multipliers: np.ndarray
+        ATR band width multipliers
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        super trend, upper band & lower band of shape ``(multipliers, bars)``
+    """
+    length = close.shape[0]
+    result_super_trend = np.full((multipliers.shape[0], length), np.nan)
+    result_upper = np.full((multipliers.shape[0], length), np.nan)
+    result_lower = np.full((multipliers.shape[0], length), np.nan)
+    for k in prange(offsets.shape[0] - 1):
+        start, end = offsets[k], offsets[k + 1]
+        atr = wilder_atr(tr[start:end], lookback_periods)
+        for j in range(multipliers.shape[0]):
+            unit_super_trend, unit_upper, unit_lower = super_trend_bands(
+                high[start:end],
+                low[start:end],
+                close[start:end],
+                atr,
+                lookback_periods,
+                multipliers[j],
+            )
+            result_super_trend[j, start:end] = unit_super_trend
+            result_upper[j, start:end] = unit_upper
+            result_lower[j, start:end] = unit_lower
+    return result_super_trend, result_upper, result_lower
+
+
+# Layout of a resumable SuperTrend state vector, see `super_trend_resume`
+STATE_SIZE = 7
+STATE_BARS = 0  # number of bars consumed so far
+STATE_SUM_TR = 1  # running sum of true range during ATR warm-up
+STATE_ATR = 2  # ATR of the last bar
+STATE_CLOSE = 3  # close of the last bar
+STATE_UPPER = 4  # upper band carried over to the next bar
+STATE_LOWER = 5  # lower band carried over to the next bar
+STATE_BULLISH = 6  # 1 when the last bar was in an up trend
+
+
+@njit(cache=True, nogil=True)
+def initial_state() -> np.ndarray:
+    """State of a security before its first bar."""
+    state = np.full(STATE_SIZE, np.nan)
+    state[STATE_BARS] = 0
+    state[STATE_SUM_TR] = 0.0
+    state[STATE_BULLISH] = 0
+    return state
+
+
+@njit(cache=True, nogil=True)
+def super_trend_resume(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    lookback_periods: int,
+    multiplier: float,
+    state: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Continue SuperTrend of a single security from a saved state with new bars only.
+
+    It is the fused, bar by bar form of `super_trend`, resuming from
+    `initial_state()` over the whole history gives the same values.
+
+    Parameters
+    ----------
+    high: np.ndarray
+        High price of each new bar
+    low: np.ndarray
+        Low price of each new bar
+    close: np.ndarray
+        Close price of each new bar
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+    state: np.ndarray
+        State after the last consumed bar, as returned by previous call
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        super trend, upper band & lower band of each new bar & the state after them
+    """
+    length = close.shape[0]
+    super_trend = np.full(length, np.nan)
+    upper = np.full(length, np.nan)
+    lower = np.full(length, np.nan)
+
+    bars = int(state[STATE_BARS])
+    sum_tr = state[STATE_SUM_TR]
+    prev_atr = state[STATE_ATR]
+    prev_close = state[STATE_CLOSE]
+    upper_band = state[STATE_UPPER]
+    lower_band = state[STATE_LOWER]
+    is_bullish = state[STATE_BULLISH] > 0
+    for j in range(length):
+        i = bars + j
+        # true range, NaN propagates just like `np.maximum` in `true_range`
+        high_low = high[j] - low[j]
+        high_close = abs(high[j] - prev_close)
+        low_close = abs(low[j] - prev_close)
+        if np.isnan(high_low) or np.isnan(high_close) or np.isnan(low_close):
+            tr = np.nan
+        else:
+            tr = max(high_low, high_close, low_close)
+
+        # Wilder's ATR
+        if i > lookback_periods:
+            prev_atr = ((prev_atr * (lookback_periods - 1)) + tr) / lookback_periods
+        elif i == lookback_periods:
+            sum_tr += tr
+            prev_atr = sum_tr / lookback_periods
+        elif i > 0:
+            sum_tr += tr
+
+        # bands
+        if i >= lookback_periods:
+            mid = (high[j] + low[j]) / 2
+            upper_eval = mid + (multiplier * prev_atr)
+            lower_eval = mid - (multiplier * prev_atr)
+
+            if i == lookback_periods:
+                is_bullish = close[j] >= mid
+                upper_band = upper_eval
+                lower_band = lower_eval
+
+            if upper_eval < upper_band or prev_close > upper_band:
+                upper_band = upper_eval
+
+            if lower_eval > lower_band or prev_close < lower_band:
+                lower_band = lower_eval
+
+            if close[j] <= (lower_band if is_bullish else upper_band):
+                super_trend[j] = upper_band
+                upper[j] = upper_band
+                is_bullish = False
+            else:
+                super_trend[j] = lower_band
+                lower[j] = lower_band
+                is_bullish = True
+        prev_close = close[j]
+
+    new_state = np.empty(STATE_SIZE)
+    new_state[STATE_BARS] = bars + length
+    new_state[STATE_SUM_TR] = sum_tr
+    new_state[STATE_ATR] = prev_atr
+    new_state[STATE_CLOSE] = prev_close
+    new_state[STATE_UPPER] = upper_band
+    new_state[STATE_LOWER] = lower_band
+    new_state[STATE_BULLISH] = 1.0 if is_bullish else 0.0
+    return super_trend, upper, lower, new_state
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def super_trend_resume_segmented(
+    offsets: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    lookback_periods: int,
+    multiplier: float,
+    states: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Continue SuperTrend of many securities stacked one after another.
+
+    Parameters
+    ----------
+    offsets: np.ndarray
+        Start index of every security segment followed by the total length
+    high: np.ndarray
+        High price of each new bar
+    low: np.ndarray
+        Low price of each new bar
+    close: np.ndarray
+        Close price of each new bar
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+    states: np.ndarray
+        ``(segments, STATE_SIZE)`` state of every security segment
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        super trend, upper band & lower band of each new bar & the new states
+    """
+    length = close.shape[0]
+    result_super_trend = np.full(length, np.nan)
+    result_upper = np.full(length, np.nan)
+    result_lower = np.full(length, np.nan)
+    new_states = np.empty_like(states)
+    for k in prange(offsets.shape[0] - 1):
+        start, end = offsets[k], offsets[k + 1]
+        unit_super_trend, unit_upper, unit_lower, unit_state = super_trend_resume(
+            high[start:end],
+            low[start:end],
+            close[start:end],
+            lookback_periods,
+            multiplier,
+            states[k],
+        )
+        new_states[k, :] = unit_state
+        result_super_trend[start:end] = unit_super_trend
+        result_upper[start:end] = unit_upper
+        result_lower[start:end] = unit_lower
+    return result_super_trend, result_upper, result_lower, new_states
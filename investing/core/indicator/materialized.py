@@ -0,0 +1,247 @@
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Collection
+
+import polars as pl
+
+from investing.core.cache import HistoryCache
+from investing.core.data import DATABASE_EXCHANGE, DATABASE_INTERVAL, StockData
+from investing.core.db import (
+    read_super_trend,
+    read_super_trend_states,
+    read_ticker_history,
+    write_super_trend,
+)
+from investing.core.models import Interval, Period, StockExchangeYahooIdentifier
+from investing.core.utils import (
+    create_batches_list,
+    has_weekday,
+    resolve_date_range,
+    stack_ticker_frames,
+)
+from .price_trend import SuperTrend, SuperTrendState
+
+logger = logging.getLogger("factor-investing")
+
+_PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def materialize_super_trend(
+    conn,
+    tickers: list[str],
+    lookback_periods: int,
+    multiplier: float,
+    full: bool | Collection[str] = False,
+    batch_size: int = 100,
+) -> int:
+    """
+    Calculate SuperTrend of stored history & write it into `indicator_super_trend`.
+
+    Tickers materialized by an earlier run are resumed from their stored state, so
+    only bars ingested since are calculated. Others, or the tickers recalculated in
+    `full`, are calculated from their first bar & replace their stored rows.
+
+    Parameters
+    ----------
+    conn
+        ADBC database connection
+    tickers: list[str]
+        ticker symbols, as stored in `ticker_history` table
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+    full: bool | Collection[str]
+        recalculate entire history of every ticker, or only of the given tickers,
+        needed when their stored history was corrected
+    batch_size: int
+        tickers calculated & written together
+
+    Returns
+    -------
+    int
+        number of written rows
+    """
+    full = set(tickers if full is True else full or ())
+    written = 0
+    for batch in create_batches_list(tickers, batch_size):
+        resumable = [ticker for ticker in batch if ticker not in full]
+        states = (
+            _read_states(conn, resumable, lookback_periods, multiplier)
+            if resumable
+            else {}
+        )
+        fresh = [ticker for ticker in batch if ticker not in states]
+        if fresh:
+            written += _materialize(
+                conn, read_ticker_history(conn, fresh), {}, lookback_periods, multiplier
+            )
+        if states:
+            start = min(state.last_date for state in states.values())
+            history = read_ticker_history(conn, list(states), start + timedelta(days=1))
+            written += _materialize(conn, history, states, lookback_periods, multiplier)
+    return written
+
+
+def read_materialized_super_trend(
+    conn,
+    tickers: list[str],
+    exchange_market: StockExchangeYahooIdentifier,
+    lookback_periods: int,
+    multiplier: float,
+    period: Period = Period.MAX,
+    interval: Interval = Interval.ONE_DAY,
+    start: date | None = None,
+    end: date | None = None,
+    retain_source_column: list[str] | None = None,
+    cache: HistoryCache | None = None,
+) -> dict[str, pl.DataFrame]:
+    """
+    Read SuperTrend of the tickers materialized for given parameters, in the same
+    format as `SuperTrend.calculate_bulk`.
+
+    Bars newer than the last materialized one are resumed from the stored state
+    with history read just like `StockData`, nothing is written back. Materialized
+    values are warmed up over entire stored history, while a calculation over a
+    range warms up from its first bar, so only requests of entire history are served
+    & they match the calculation.
+
+    Parameters
+    ----------
+    conn
+        database connection, nothing is materialized when `None`
+    tickers: list[str]
+        ticker symbols without exchange symbol
+    exchange_market: StockExchangeYahooIdentifier
+        Yahoo stock exchange identifier of the tickers
+    lookback_periods: int
+        Number of periods for the ATR evaluation
+    multiplier: float
+        ATR band width multiplier
+    period: Period
+        history period, used when `start` is not given
+    interval: Interval
+        interval of history, only daily history is materialized
+    start: date | None
+        start date of history
+    end: date | None
+        exclusive end date of history
+    retain_source_column: list[str] | None
+        source columns to retain in result, by default `close`
+    cache: HistoryCache | None
+        history cache used for the bars missing in database
+
+    Returns
+    -------
+    dict[str, pl.DataFrame]
+        indicator of the materialized tickers, others are left out & nothing is
+        served for a range not covering entire history
+    """
+    request_start, request_end = resolve_date_range(period, start, end)
+    if (
+        conn is None
+        or exchange_market != DATABASE_EXCHANGE
+        or interval != DATABASE_INTERVAL
+        or request_start is not None
+    ):
+        return {}
+    states = _read_states(conn, tickers, lookback_periods, multiplier)
+    if not states:
+        return {}
+    stored = read_super_trend(
+        conn, list(states), lookback_periods, multiplier, request_start, request_end
+    )
+
+    # resuming the bars ingested after the last materialization
+    stale = defaultdict(list)
+    for ticker, state in states.items():
+        if has_weekday(state.last_date + timedelta(days=1), request_end):
+            stale[state.last_date].append(ticker)
+    recent = {}
+    for last_date, group in stale.items():
+        history = StockData(
+            group, exchange_market, cache=cache, connection=conn
+        ).get_ticker_history(
+            interval=interval, start=last_date + timedelta(days=1), end=end
+        )
+        history = {t: df for t, df in history.items() if not df.is_empty()}
+        if history:
+            result, _ = SuperTrend(history, list(_PRICE_COLUMNS)).resume_bulk(
+                {t: states[t] for t in history}, lookback_periods, multiplier
+            )
+            recent.update(result)
+
+    retain_source_column = (
+        ["close"] if retain_source_column is None else retain_source_column
+    )
+    columns = [
+        "date",
+        *(c for c in retain_source_column if c != "date"),
+        "super_trend",
+        "upper",
+        "lower",
+    ]
+    result = {}
+    for ticker in tickers:
+        if ticker.upper() not in states:
+            continue
+        frames = [
+            df.select(columns)
+            for df in (stored.get(ticker.upper()), recent.get(ticker.upper()))
+            if df is not None
+        ]
+        df = (
+            pl.concat(frames, how="vertical_relaxed")
+            if frames
+            else pl.DataFrame(
+                schema={c: pl.Date if c == "date" else pl.Float64 for c in columns}
+            )
+        )
+        result[ticker] = df.filter(pl.col("date") <= request_end)
+    return result
+
+
+def _read_states(
+    conn, tickers: list[str], lookback_periods: int, multiplier: float
+) -> dict[str, SuperTrendState]:
+    return {
+        ticker: SuperTrendState.from_dict(state)
+        for ticker, state in read_super_trend_states(
+            conn, tickers, lookback_periods, multiplier
+        ).items()
+    }
+
+
+def _materialize(
+    conn,
+    history: dict[str, pl.DataFrame],
+    states: dict[str, SuperTrendState],
+    lookback_periods: int,
+    multiplier: float,
+) -> int:
+    if not history:
+        return 0
+    result, new_states = SuperTrend(history, []).resume_bulk(
+        states, lookback_periods, multiplier
+    )
+    changed = {
+        ticker: state.to_dict()
+        for ticker, state in new_states.items()
+        if state != states.get(ticker)
+    }
+    if not changed:
+        return 0
+    written = write_super_trend(
+        conn,
+        stack_ticker_frames({t: result[t] for t in changed}),
+        changed,
+        lookback_periods,
+        multiplier,
+        replace=not states,
+    )
+    logger.info(
+        f"materialized {written} SuperTrend({lookback_periods}, {multiplier}) rows "
+        f"of {len(changed)} tickers"
+    )
+    return written
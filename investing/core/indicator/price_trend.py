@@ -1,14 +1,123 @@
 import logging
+import math
+from dataclasses import asdict, dataclass
+from datetime import date
+from itertools import product
 
+import numpy as np
 import polars as pl
-from stock_indicators import indicators
 
+from investing.core.data import polars_to_quote
 from investing.core.exception import InvestingIndicaError
+from investing.core.models import IndicatorEngine
+from investing.core.timing import stage
+from investing.core.utils import split_ticker_frame, stack_ticker_frames
+from . import _kernel
 from ._base import IndicatorBase
+from .process_pool import default_indicator_process_pool
 
 logger = logging.getLogger("factor-investing")
 
 
+@dataclass
+class SuperTrendState:
+    """
+    Final state of a SuperTrend calculation, enough to continue it with new bars.
+
+    Attributes
+    ----------
+        lookback_periods : int
+            Number of periods of the ATR evaluation the state belongs to
+        multiplier : float
+            ATR band width multiplier the state belongs to
+        last_date : date | None
+            Date of the last consumed bar
+        bars : int
+            Number of consumed bars
+        sum_tr : float
+            Running sum of true range during ATR warm-up
+        atr : float | None
+            ATR of the last bar
+        close : float | None
+            Close price of the last bar
+        upper_band : float | None
+            Upper band carried over to the next bar
+        lower_band : float | None
+            Lower band carried over to the next bar
+        is_bullish : bool
+            Whether the last bar was in an up trend
+    """
+
+    lookback_periods: int
+    multiplier: float
+    last_date: date | None = None
+    bars: int = 0
+    sum_tr: float = 0.0
+    atr: float | None = None
+    close: float | None = None
+    upper_band: float | None = None
+    lower_band: float | None = None
+    is_bullish: bool = False
+
+    def to_dict(self) -> dict:
+        """JSON friendly representation, to persist the state."""
+        return {
+            **asdict(self),
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SuperTrendState":
+        return cls(
+            **{
+                **data,
+                "last_date": (
+                    date.fromisoformat(data["last_date"]) if data["last_date"] else None
+                ),
+            }
+        )
+
+    def to_array(self) -> np.ndarray:
+        state = _kernel.initial_state()
+        state[_kernel.STATE_BARS] = self.bars
+        state[_kernel.STATE_SUM_TR] = self.sum_tr
+        state[_kernel.STATE_ATR] = _nan_if_none(self.atr)
+        state[_kernel.STATE_CLOSE] = _nan_if_none(self.close)
+        state[_kernel.STATE_UPPER] = _nan_if_none(self.upper_band)
+        state[_kernel.STATE_LOWER] = _nan_if_none(self.lower_band)
+        state[_kernel.STATE_BULLISH] = float(self.is_bullish)
+        return state
+
+    @classmethod
+    def from_array(
+        cls,
+        state: np.ndarray,
+        lookback_periods: int,
+        multiplier: float,
+        last_date: date | None,
+    ) -> "SuperTrendState":
+        return cls(
+            lookback_periods=lookback_periods,
+            multiplier=multiplier,
+            last_date=last_date,
+            bars=int(state[_kernel.STATE_BARS]),
+            sum_tr=float(state[_kernel.STATE_SUM_TR]),
+            atr=_none_if_nan(state[_kernel.STATE_ATR]),
+            close=_none_if_nan(state[_kernel.STATE_CLOSE]),
+            upper_band=_none_if_nan(state[_kernel.STATE_UPPER]),
+            lower_band=_none_if_nan(state[_kernel.STATE_LOWER]),
+            is_bullish=bool(state[_kernel.STATE_BULLISH]),
+        )
+
+
+def _nan_if_none(value: float | None) -> float:
+    return np.nan if value is None else value
+
+
+def _none_if_nan(value: float) -> float | None:
+    return None if math.isnan(value) else float(value)
+
+
 class SuperTrend(IndicatorBase):
     def __init__(
         self,
@@ -21,33 +130,177 @@ class SuperTrend(IndicatorBase):
         super().__init__(data, retain_source_column)
 
     def calculate_per_security(
-        self, lookback_periods: int = 10, multiplier: float = 3
+        self,
+        lookback_periods: int = 10,
+        multiplier: float = 3,
+        engine: IndicatorEngine = IndicatorEngine.native,
     ) -> pl.DataFrame:
         if not isinstance(self.data, pl.DataFrame):
             raise InvestingIndicaError(
                 "found multiple securities, use calculate_bulk instead"
             )
-        if not self._result_data:
-            self._result_data = self._unit_result(
-                self._quote_data(), lookback_periods, multiplier
-            )
+        self._result_data = self._cached(
+            "per_security",
+            lambda: self._unit_result(
+                self.data, lookback_periods, multiplier, engine=engine
+            ),
+            lookback_periods,
+            multiplier,
+            engine,
+        )
         return self._result_data
 
     def calculate_bulk(
-        self, lookback_periods: int = 10, multiplier: float = 3
+        self,
+        lookback_periods: int = 10,
+        multiplier: float = 3,
+        engine: IndicatorEngine = IndicatorEngine.native,
     ) -> dict[str, pl.DataFrame]:
         if isinstance(self.data, pl.DataFrame):
             raise InvestingIndicaError(
                 "found single security, use calculate_security instead"
             )
-        if not self._result_data:
-            quote_data = self._quote_data()
-            self._result_data = {
-                ticker: self._unit_result(quote, lookback_periods, multiplier, ticker)
-                for ticker, quote in quote_data.items()
-            }
+        self._result_data = self._cached(
+            "bulk",
+            lambda: self._bulk_result(lookback_periods, multiplier, engine),
+            lookback_periods,
+            multiplier,
+            engine,
+        )
         return self._result_data
 
+    def calculate_long(
+        self,
+        lookback_periods: int = 10,
+        multiplier: float = 3,
+        engine: IndicatorEngine = IndicatorEngine.native,
+    ) -> pl.DataFrame:
+        """
+        Calculate indicator of all the securities in one long format pass.
+
+        `data` can either be a dict of per ticker dataframes or an already stacked
+        dataframe having a `ticker` column. With the `native` engine every ticker
+        is a segment of the same columns & segments are computed in parallel.
+
+        Returns
+        -------
+        pl.DataFrame
+            long format result with `ticker` & `date` as leading columns
+        """
+        return self._cached(
+            "long",
+            lambda: self._long_pass(lookback_periods, multiplier, engine),
+            lookback_periods,
+            multiplier,
+            engine,
+        )
+
+    def calculate_grid(
+        self,
+        lookback_periods: list[int],
+        multipliers: list[float],
+    ) -> pl.DataFrame:
+        """
+        Calculate indicator for every combination of lookback periods & multipliers
+        in one pass with the `native` engine.
+
+        True range is calculated once, ATR once per lookback period & only the band
+        recursion once per combination, so a grid costs little more than one
+        calculation per lookback period.
+
+        Parameters
+        ----------
+        lookback_periods: list[int]
+            Numbers of periods for the ATR evaluation
+        multipliers: list[float]
+            ATR band width multipliers
+
+        Returns
+        -------
+        pl.DataFrame
+            long format result with `lookback_periods` & `multiplier` as leading
+            columns, followed by `ticker` for multiple securities & `date`
+        """
+        lookback_periods = list(dict.fromkeys(lookback_periods))
+        multipliers = list(dict.fromkeys(multipliers))
+        if not lookback_periods or not multipliers:
+            raise InvestingIndicaError("found no lookback periods or multipliers")
+        for lookback, multiplier in product(lookback_periods, multipliers):
+            self._check_parameters(lookback, multiplier)
+        return self._cached(
+            "grid",
+            lambda: self._grid_result(lookback_periods, multipliers),
+            tuple(lookback_periods),
+            tuple(multipliers),
+        )
+
+    def resume_per_security(
+        self,
+        state: SuperTrendState | None = None,
+        lookback_periods: int = 10,
+        multiplier: float = 3,
+    ) -> tuple[pl.DataFrame, SuperTrendState]:
+        """
+        Continue the indicator from a saved state with the bars after its last date.
+
+        Only the bars newer than `state.last_date` are computed, the result matches
+        the same bars of a full recalculation. Without state it is calculated from
+        the first bar.
+
+        Parameters
+        ----------
+        state: SuperTrendState | None
+            state returned by the previous call, `None` to start afresh
+        lookback_periods: int
+            Number of periods for the ATR evaluation
+        multiplier: float
+            ATR band width multiplier
+
+        Returns
+        -------
+        tuple[pl.DataFrame, SuperTrendState]
+            indicator of the new bars & the state after them
+        """
+        if not isinstance(self.data, pl.DataFrame):
+            raise InvestingIndicaError(
+                "found multiple securities, use resume_bulk instead"
+            )
+        result, states = self._resume(
+            {"": self.data}, {"": state} if state else {}, lookback_periods, multiplier
+        )
+        return result[""], states[""]
+
+    def resume_bulk(
+        self,
+        states: dict[str, SuperTrendState] | None = None,
+        lookback_periods: int = 10,
+        multiplier: float = 3,
+    ) -> tuple[dict[str, pl.DataFrame], dict[str, SuperTrendState]]:
+        """
+        Continue the indicator of every security from its saved state in one long
+        pass over the bars after each state's last date.
+
+        Parameters
+        ----------
+        states: dict[str, SuperTrendState] | None
+            state of each ticker returned by the previous call, tickers without
+            state are calculated from their first bar
+        lookback_periods: int
+            Number of periods for the ATR evaluation
+        multiplier: float
+            ATR band width multiplier
+
+        Returns
+        -------
+        tuple[dict[str, pl.DataFrame], dict[str, SuperTrendState]]
+            indicator of the new bars & the state after them, for each ticker
+        """
+        if isinstance(self.data, pl.DataFrame):
+            raise InvestingIndicaError(
+                "found single security, use resume_per_security instead"
+            )
+        return self._resume(self.data, states or {}, lookback_periods, multiplier)
+
     def plot_line(self, ticker: str = None, columns_to_plot: list[str] = None):
         if isinstance(self.data, dict):
             if not ticker:
@@ -79,12 +332,181 @@ class SuperTrend(IndicatorBase):
     def rank(self):
         pass
 
-    def _unit_result(self, quote_data, lookback_periods, multiplier, ticker=None):
+    def _bulk_result(
+        self, lookback_periods: int, multiplier: float, engine: IndicatorEngine
+    ) -> dict[str, pl.DataFrame]:
+        if self.data and (
+            engine == IndicatorEngine.native
+            or default_indicator_process_pool() is not None
+        ):
+            # one long pass over all the securities, split back per ticker
+            result = split_ticker_frame(
+                self._long_pass(lookback_periods, multiplier, engine)
+            )
+            return {
+                ticker: result[ticker] if ticker in result else self._empty_result(data)
+                for ticker, data in self.data.items()
+            }
+        return {
+            ticker: self._unit_result(
+                data, lookback_periods, multiplier, ticker, engine
+            )
+            for ticker, data in self.data.items()
+        }
+
+    def _long_pass(
+        self, lookback_periods: int, multiplier: float, engine: IndicatorEngine
+    ) -> pl.DataFrame:
+        if isinstance(self.data, dict):
+            if not self.data:
+                raise InvestingIndicaError("found no securities to calculate")
+            source_data = stack_ticker_frames(self.data)
+        elif "ticker" in self.data.columns:
+            source_data = self.data
+        else:
+            raise InvestingIndicaError(
+                "found single security, use calculate_per_security instead"
+            )
+        source_data = self._complete_bars(source_data)
+
+        # NOTE - engines holding the GIL scale across cores only in worker processes,
+        # numba kernels already spread segments across cores within this one
+        process_pool = default_indicator_process_pool()
+        if process_pool is not None and (
+            engine == IndicatorEngine.stock_indicators or not _kernel.JIT
+        ):
+            self._check_parameters(lookback_periods, multiplier)
+            source_data, offsets = self._segment_data(source_data)
+            if len(offsets) > 2:
+                return process_pool.run(
+                    _long_pass_chunk,
+                    source_data,
+                    offsets,
+                    self.retain_source_column,
+                    lookback_periods,
+                    multiplier,
+                    engine,
+                )
+
+        if engine == IndicatorEngine.stock_indicators:
+            return pl.concat(
+                [
+                    self._unit_result(
+                        data, lookback_periods, multiplier, engine=engine
+                    ).select(pl.lit(ticker).alias("ticker"), pl.all())
+                    for ticker, data in split_ticker_frame(source_data).items()
+                ],
+                how="vertical_relaxed",
+            )
+
+        self._check_parameters(lookback_periods, multiplier)
+        source_data, offsets = self._segment_data(source_data)
+        with stage("indicator"):
+            super_trend, upper, lower = _kernel.super_trend_segmented(
+                offsets,
+                source_data["high"].cast(pl.Float64).to_numpy(),
+                source_data["low"].cast(pl.Float64).to_numpy(),
+                source_data["close"].cast(pl.Float64).to_numpy(),
+                lookback_periods,
+                multiplier,
+            )
+        return self._long_result(source_data, super_trend, upper, lower)
+
+    def _grid_result(
+        self, lookback_periods: list[int], multipliers: list[float]
+    ) -> pl.DataFrame:
+        single = isinstance(self.data, pl.DataFrame) and "ticker" not in self.data
+        if single:
+            source_data = self.data.select(pl.lit("").alias("ticker"), pl.all())
+        elif isinstance(self.data, dict):
+            if not self.data:
+                raise InvestingIndicaError("found no securities to calculate")
+            source_data = stack_ticker_frames(self.data)
+        else:
+            source_data = self.data
+        source_data, offsets = self._segment_data(self._complete_bars(source_data))
+        high = source_data["high"].cast(pl.Float64).to_numpy()
+        low = source_data["low"].cast(pl.Float64).to_numpy()
+        close = source_data["close"].cast(pl.Float64).to_numpy()
+        with stage("indicator"):
+            tr = _kernel.true_range_segmented(offsets, high, low, close)
+
+        # NOTE - one lookback at a time, so only its band arrays are held at once
+        frames = []
+        for lookback in lookback_periods:
+            with stage("indicator"):
+                super_trend, upper, lower = _kernel.super_trend_multipliers_segmented(
+                    offsets,
+                    high,
+                    low,
+                    close,
+                    tr,
+                    lookback,
+                    np.array(multipliers, dtype=np.float64),
+                )
+            frames.extend(
+                self._long_result(
+                    source_data, super_trend[j], upper[j], lower[j]
+                ).select(
+                    pl.lit(lookback, dtype=pl.Int64).alias("lookback_periods"),
+                    pl.lit(multiplier, dtype=pl.Float64).alias("multiplier"),
+                    pl.all(),
+                )
+                for j, multiplier in enumerate(multipliers)
+            )
+        result = pl.concat(frames)
+        return result.drop("ticker") if single else result
+
+    def _unit_result(
+        self,
+        source_data: pl.DataFrame,
+        lookback_periods,
+        multiplier,
+        ticker=None,
+        engine: IndicatorEngine = IndicatorEngine.native,
+    ):
+        source_data = self._complete_bars(source_data)
         # calculating indicator specific results
-        result = indicators.get_super_trend(
-            quote_data, lookback_periods, multiplier
-        ).condense()
-        result_df = pl.DataFrame(
+        # NOTE - stock indicators can't condense a result without bars
+        if engine == IndicatorEngine.stock_indicators and not source_data.is_empty():
+            result_df = self._stock_indicators_result(
+                source_data, lookback_periods, multiplier
+            )
+        else:
+            result_df = self._native_result(source_data, lookback_periods, multiplier)
+        result_df = result_df.with_columns(
+            pl.col("date").cast(pl.Date), *self._result_columns()
+        )
+        cols = result_df.columns
+
+        # performing join ops to retain source column
+        with stage("join"):
+            if self.retain_source_column:
+                # Date column is reserved for join ops
+                if "date" not in self.retain_source_column:
+                    self.retain_source_column.append("date")
+                # adding all the required column from parent source
+                source_select = source_data.select(self.retain_source_column)
+                # inner join
+                result_df = result_df.join(source_select, on="date", how="inner")
+                # re-arranging columns
+                self.retain_source_column.remove("date")
+                cols[1:1] = self.retain_source_column  # inserting after index 1
+
+            return result_df.select(cols)
+
+    @staticmethod
+    def _stock_indicators_result(
+        source_data: pl.DataFrame, lookback_periods, multiplier
+    ) -> pl.DataFrame:
+        from stock_indicators import indicators
+
+        quotes = polars_to_quote(source_data)
+        with stage("indicator"):
+            result = indicators.get_super_trend(
+                quotes, lookback_periods, multiplier
+            ).condense()
+        return pl.DataFrame(
             [
                 {
                     "date": i.date,
@@ -96,28 +518,164 @@ class SuperTrend(IndicatorBase):
             ],
             infer_schema_length=None,  # use of every row to determine colum  type
         )
-        result_df = result_df.with_columns(
-            pl.col("date").cast(pl.Date),
+
+    @staticmethod
+    def _result_columns() -> list[pl.Expr]:
+        return [
             pl.col("super_trend").cast(pl.Float64).round(2),
             pl.col("upper").cast(pl.Float64).round(2),
             pl.col("lower").cast(pl.Float64).round(2),
+        ]
+
+    @staticmethod
+    def _complete_bars(source_data: pl.DataFrame) -> pl.DataFrame:
+        """Drop bars missing high, low or close, e.g. padding of batch downloads
+        before a ticker was listed. Kernels would carry their NaN into every later
+        bar & stock indicators reads them as `0`."""
+        return source_data.filter(
+            pl.all_horizontal(
+                pl.col("high", "low", "close").cast(pl.Float64).is_finite()
+            )
         )
-        cols = result_df.columns
 
-        # getting source data
-        source_data = self.data[ticker] if ticker else self.data
+    @staticmethod
+    def _check_parameters(lookback_periods, multiplier):
+        if lookback_periods <= 1:
+            raise InvestingIndicaError("lookback periods must be greater than 1")
+        if multiplier <= 0:
+            raise InvestingIndicaError("multiplier must be greater than 0")
 
-        # performing join ops to retain source column
-        if self.retain_source_column:
-            # Date column is reserved for join ops
-            if "date" not in self.retain_source_column:
-                self.retain_source_column.append("date")
-            # adding all the required column from parent source
-            source_select = source_data.select(self.retain_source_column)
-            # inner join
-            result_df = result_df.join(source_select, on="date", how="inner")
-            # re-arranging columns
-            self.retain_source_column.remove("date")
-            cols[1:1] = self.retain_source_column  # inserting after index 1
-
-        return result_df.select(cols)
+    def _long_result(
+        self,
+        source_data: pl.DataFrame,
+        super_trend: np.ndarray,
+        upper: np.ndarray,
+        lower: np.ndarray,
+    ) -> pl.DataFrame:
+        retain_column = [
+            col
+            for col in self.retain_source_column or []
+            if col not in ("ticker", "date")
+        ]
+        with stage("join"):
+            result_df = source_data.select(
+                "ticker",
+                "date",
+                *retain_column,
+                pl.Series("super_trend", super_trend, nan_to_null=True),
+                pl.Series("upper", upper, nan_to_null=True),
+                pl.Series("lower", lower, nan_to_null=True),
+            )
+            return result_df.filter(
+                pl.any_horizontal(pl.col("super_trend", "upper", "lower").is_not_null())
+            ).with_columns(self._result_columns())
+
+    def _resume(
+        self,
+        data: dict[str, pl.DataFrame],
+        states: dict[str, SuperTrendState],
+        lookback_periods: int,
+        multiplier: float,
+    ) -> tuple[dict[str, pl.DataFrame], dict[str, SuperTrendState]]:
+        self._check_parameters(lookback_periods, multiplier)
+        for ticker, state in states.items():
+            if (state.lookback_periods, state.multiplier) != (
+                lookback_periods,
+                multiplier,
+            ):
+                raise InvestingIndicaError(
+                    f"state of {ticker} belongs to lookback periods "
+                    f"{state.lookback_periods} & multiplier {state.multiplier}"
+                )
+
+        # only bars after the last consumed one are calculated
+        new_bars = {}
+        for ticker, df in data.items():
+            state = states.get(ticker)
+            if state is not None and state.last_date is not None:
+                df = df.filter(pl.col("date") > state.last_date)
+            new_bars[ticker] = self._complete_bars(df)
+        source_data, offsets = self._segment_data(stack_ticker_frames(new_bars))
+        tickers = source_data["ticker"].rle().struct.field("value").to_list()
+        initial_states = np.array(
+            [
+                states[t].to_array() if t in states else _kernel.initial_state()
+                for t in tickers
+            ],
+            dtype=np.float64,
+        ).reshape(len(tickers), _kernel.STATE_SIZE)
+
+        super_trend, upper, lower, final_states = _kernel.super_trend_resume_segmented(
+            offsets,
+            source_data["high"].cast(pl.Float64).to_numpy(),
+            source_data["low"].cast(pl.Float64).to_numpy(),
+            source_data["close"].cast(pl.Float64).to_numpy(),
+            lookback_periods,
+            multiplier,
+            initial_states,
+        )
+        result = split_ticker_frame(
+            self._long_result(source_data, super_trend, upper, lower)
+        )
+        last_dates = source_data["date"].gather(offsets[1:] - 1).to_list()
+        new_states = {
+            ticker: states.get(ticker)
+            or SuperTrendState(lookback_periods=lookback_periods, multiplier=multiplier)
+            for ticker in data
+        }
+        new_states.update(
+            {
+                ticker: SuperTrendState.from_array(
+                    final_states[k], lookback_periods, multiplier, last_dates[k]
+                )
+                for k, ticker in enumerate(tickers)
+            }
+        )
+        return {
+            ticker: result[ticker] if ticker in result else self._empty_result(df)
+            for ticker, df in data.items()
+        }, new_states
+
+    def _empty_result(self, source_data: pl.DataFrame) -> pl.DataFrame:
+        return self._unit_result(
+            source_data.clear(), 2, 1, engine=IndicatorEngine.native
+        )
+
+    def _native_result(
+        self, source_data: pl.DataFrame, lookback_periods, multiplier
+    ) -> pl.DataFrame:
+        self._check_parameters(lookback_periods, multiplier)
+        source_data = source_data.sort("date")
+        with stage("indicator"):
+            super_trend, upper, lower = _kernel.super_trend(
+                source_data["high"].cast(pl.Float64).to_numpy(),
+                source_data["low"].cast(pl.Float64).to_numpy(),
+                source_data["close"].cast(pl.Float64).to_numpy(),
+                lookback_periods,
+                multiplier,
+            )
+        result_df = pl.DataFrame(
+            {
+                "date": source_data["date"],
+                "super_trend": pl.Series(values=super_trend, nan_to_null=True),
+                "upper": pl.Series(values=upper, nan_to_null=True),
+                "lower": pl.Series(values=lower, nan_to_null=True),
+            }
+        )
+        # same as `condense`, removing rows without any indicator value
+        return result_df.filter(
+            pl.any_horizontal(pl.col("super_trend", "upper", "lower").is_not_null())
+        )
+
+
+def _long_pass_chunk(
+    chunk: pl.DataFrame,
+    retain_source_column: list[str] | None,
+    lookback_periods: int,
+    multiplier: float,
+    engine: IndicatorEngine,
+) -> pl.DataFrame:
+    """Long format SuperTrend of a chunk of tickers, run by worker processes."""
+    return SuperTrend(chunk, retain_source_column)._long_pass(
+        lookback_periods, multiplier, engine
+    )
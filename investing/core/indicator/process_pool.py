@@ -0,0 +1,162 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import polars as pl
+
+from investing.core.config import settings
+
+logger = logging.getLogger("factor-investing")
+
+# NOTE - tmpfs keeps exchanged Arrow files in memory, so mapping them costs no I/O
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+_in_worker = False
+
+ChunkTask = Callable[..., pl.DataFrame]
+"""Module level function calculating long format result of a chunk of tickers"""
+
+
+class IndicatorProcessPool:
+    """
+    Pool of worker processes calculating indicators of many tickers, for engines
+    holding the GIL while they calculate.
+
+    Long source data is written once as an uncompressed Arrow IPC file to shared
+    memory & every worker memory maps its chunk of tickers out of it, results come
+    back the same way, so no dataframe is pickled between processes.
+
+    Workers are spawned rather than forked, the parent may run threads & the .NET
+    runtime of stock indicators which don't survive a fork.
+
+    Parameters
+    ----------
+    processes: int
+        Number of worker processes
+    chunks_per_process: int
+        Chunks of tickers per process, smaller chunks balance uneven history lengths
+    """
+
+    def __init__(self, processes: int, chunks_per_process: int = 4):
+        self.processes = processes
+        self.chunks_per_process = chunks_per_process
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def run(
+        self, task: ChunkTask, source_data: pl.DataFrame, offsets: np.ndarray, *args
+    ) -> pl.DataFrame:
+        """
+        Calculate chunks of tickers of long source data in worker processes.
+
+        Parameters
+        ----------
+        task: ChunkTask
+            picklable function called with the long data of a chunk & `args`
+        source_data: pl.DataFrame
+            long data having a `ticker` column, every ticker contiguous
+        offsets: np.ndarray
+            start row of every ticker segment followed by the total number of rows
+        args
+            picklable arguments of `task`
+
+        Returns
+        -------
+        pl.DataFrame
+            results of all the chunks concatenated in ticker order
+        """
+        bounds = self._chunk_bounds(offsets)
+        with tempfile.TemporaryDirectory(
+            prefix="factor-investing-", dir=SHARED_DIR
+        ) as shared_dir:
+            source_path = Path(shared_dir) / "source.arrow"
+            source_data.write_ipc(source_path, compression="uncompressed")
+            futures = [
+                self._executor.submit(
+                    _run_chunk,
+                    task,
+                    str(source_path),
+                    start,
+                    stop,
+                    str(Path(shared_dir) / f"result-{i}.arrow"),
+                    *args,
+                )
+                for i, (start, stop) in enumerate(bounds)
+            ]
+            # NOTE - mapped pages stay valid after the files are removed
+            frames = [
+                pl.read_ipc(future.result(), memory_map=True) for future in futures
+            ]
+        return pl.concat(frames, how="vertical_relaxed")
+
+    def _chunk_bounds(self, offsets: np.ndarray) -> list[tuple[int, int]]:
+        """Row ranges of contiguous tickers holding about the same number of rows."""
+        chunks = max(1, self.processes * self.chunks_per_process)
+        total = int(offsets[-1])
+        # cut at the ticker boundary nearest to every equal share of rows
+        targets = np.linspace(0, total, chunks + 1)[1:-1]
+        cuts = np.unique(offsets[np.searchsorted(offsets, targets)])
+        edges = [0, *(int(c) for c in cuts if 0 < c < total), total]
+        return [(start, stop) for start, stop in zip(edges, edges[1:]) if stop > start]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("indicator process pool shut down")
+
+
+def _init_worker():
+    global _in_worker
+    # NOTE - settings are inherited, workers must not start pools of their own
+    _in_worker = True
+    try:
+        import numba
+
+        # NOTE - processes already use every core, parallel kernels would
+        # oversubscribe them
+        numba.set_num_threads(1)
+    except ImportError:
+        pass
+
+
+def _run_chunk(
+    task: ChunkTask, source_path: str, start: int, stop: int, result_path: str, *args
+) -> str:
+    chunk = pl.read_ipc(source_path, memory_map=True).slice(start, stop - start)
+    task(chunk, *args).write_ipc(result_path, compression="uncompressed")
+    return result_path
+
+
+_default_indicator_process_pool: IndicatorProcessPool | None = None
+_default_indicator_process_pool_lock = threading.Lock()
+
+
+def default_indicator_process_pool() -> IndicatorProcessPool | None:
+    """Get process wide indicator process pool configured by settings, `None` if
+    disabled."""
+    global _default_indicator_process_pool
+    if settings.indicator_processes <= 0 or _in_worker:
+        return None
+    with _default_indicator_process_pool_lock:
+        if _default_indicator_process_pool is None:
+            _default_indicator_process_pool = IndicatorProcessPool(
+                processes=settings.indicator_processes
+            )
+    return _default_indicator_process_pool
+
+
+def shutdown_default_indicator_process_pool():
+    """Shut down process wide indicator process pool, if it was ever started."""
+    global _default_indicator_process_pool
+    with _default_indicator_process_pool_lock:
+        pool, _default_indicator_process_pool = _default_indicator_process_pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,35 @@
+import logging
+import time
+
+from investing.core.indicator.price_trend import SuperTrend
+from investing.core.models import IndicatorEngine
+from investing.core.synthetic import synthetic_history
+
+logger = logging.getLogger("factor-investing")
+
+
+def warm_up_indicators() -> dict[str, float]:
+    """
+    Run every indicator engine once over tiny synthetic history.
+
+    The first calculation of an engine pays for more than the calculation itself,
+    stock indicators boots .NET runtime & JIT compiles its calls & native engine
+    compiles its numba kernels. Warming up moves that cost from the first requests
+    to startup.
+
+    Returns
+    -------
+    dict[str, float]
+        seconds taken by each engine
+    """
+    history = synthetic_history(["WARMUP1", "WARMUP2"], years=0.25)
+    seconds = {}
+    for engine in IndicatorEngine:
+        started_at = time.perf_counter()
+        SuperTrend(history["WARMUP1"]).calculate_per_security(engine=engine)
+        SuperTrend(history).calculate_bulk(engine=engine)
+        if engine == IndicatorEngine.native:
+            SuperTrend(history).calculate_grid(lookback_periods=[10], multipliers=[3])
+        seconds[engine.value] = time.perf_counter() - started_at
+        logger.debug(f"warmed up {engine.value} engine in {seconds[engine.value]:.2f}s")
+    return seconds
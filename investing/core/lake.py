@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+
+from investing.core.utils import split_ticker_frame
+
+logger = logging.getLogger("factor-investing")
+
+HISTORY_SCHEMA = {
+    "date": pl.Date,
+    "open": pl.Float64,
+    "high": pl.Float64,
+    "low": pl.Float64,
+    "close": pl.Float64,
+    "volume": pl.Float64,
+}
+# NOTE - explicit types, so tickers like `500325` are not inferred as integers
+PARTITION_SCHEMA = {"exchange": pl.String, "ticker": pl.String, "year": pl.Int32}
+
+
+class PriceLake:
+    """
+    OHLCV history persisted as a hive partitioned parquet dataset, laid out as
+    `exchange=<exchange>/ticker=<ticker>/year=<year>/data.parquet`.
+
+    Reads are polars lazy scans, so filters on exchange, ticker & year prune whole
+    partitions, date filters & column selections are pushed down into parquet reads
+    & files are memory-mapped instead of copied.
+
+    Parameters
+    ----------
+    root: Path
+        Directory of the dataset
+    """
+
+    _file_name = "data.parquet"
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, history: dict[str, pl.DataFrame], exchange: str) -> int:
+        """
+        Write history of many tickers, replacing stored bars of the same dates.
+
+        Parameters
+        ----------
+        history: dict[str, pl.DataFrame]
+            history of each ticker, in the format returned by `StockData`
+        exchange: str
+            Exchange name of the tickers
+
+        Returns
+        -------
+        int
+            number of written partition files
+        """
+        written = 0
+        for ticker, data in history.items():
+            if data is None or data.is_empty():
+                continue
+            # NOTE - yahoo fills bars missing for some tickers of a batch with nulls
+            data = data.select(
+                pl.col(name).cast(dtype) for name, dtype in HISTORY_SCHEMA.items()
+            ).drop_nulls(["date", "open", "high", "low", "close"])
+            for (year,), bars in (
+                data.with_columns(pl.col("date").dt.year().alias("year"))
+                .partition_by("year", as_dict=True, include_key=False)
+                .items()
+            ):
+                self._write_partition(self._path(exchange, ticker, year), bars)
+                written += 1
+        return written
+
+    def scan(
+        self,
+        exchange: str | None = None,
+        tickers: list[str] | None = None,
+        start: date | None = None,
+        end: date | None = None,
+    ) -> pl.LazyFrame:
+        """
+        Lazily scan stored history in long format, with `exchange`, `ticker` & `year`
+        partition columns.
+
+        Parameters
+        ----------
+        exchange: str | None
+            only scan this exchange, all exchanges when not given
+        tickers: list[str] | None
+            only scan these tickers, entire universe when not given
+        start: date | None
+            inclusive start date
+        end: date | None
+            inclusive end date
+
+        Returns
+        -------
+        pl.LazyFrame
+            lazy history, further filters & selections are pushed down as well
+        """
+        if not any(self.root.glob(f"*/*/*/{self._file_name}")):
+            return pl.LazyFrame(schema={**PARTITION_SCHEMA, **HISTORY_SCHEMA})
+        lazy = pl.scan_parquet(
+            self.root / "**" / "*.parquet",
+            hive_partitioning=True,
+            hive_schema=PARTITION_SCHEMA,
+        )
+        if exchange is not None:
+            lazy = lazy.filter(pl.col("exchange") == exchange.lower())
+        if tickers is not None:
+            lazy = lazy.filter(pl.col("ticker").is_in([t.upper() for t in tickers]))
+        if start is not None:
+            lazy = lazy.filter(
+                pl.col("year") >= start.year, pl.col("date") >= pl.lit(start)
+            )
+        if end is not None:
+            lazy = lazy.filter(
+                pl.col("year") <= end.year, pl.col("date") <= pl.lit(end)
+            )
+        return lazy
+
+    def read_history(
+        self,
+        tickers: list[str],
+        exchange: str,
+        start: date | None = None,
+        end: date | None = None,
+    ) -> dict[str, pl.DataFrame]:
+        """
+        Read history of many tickers with a single scan.
+
+        Parameters
+        ----------
+        tickers: list[str]
+            Ticker symbols without exchange symbol
+        exchange: str
+            Exchange name of the tickers
+        start: date | None
+            inclusive start date, entire history when not given
+        end: date | None
+            inclusive end date
+
+        Returns
+        -------
+        dict[str, pl.DataFrame]
+            history of every ticker found in the dataset, in the same format as
+            `StockData`
+        """
+        history = (
+            self.scan(exchange, tickers, start, end)
+            .select("ticker", *HISTORY_SCHEMA)
+            .sort("ticker", "date")
+            .collect()
+        )
+        return split_ticker_frame(history)
+
+    def tickers(self, exchange: str) -> list[str]:
+        """Tickers of an exchange stored in the dataset."""
+        exchange_dir = self.root / f"exchange={exchange.lower()}"
+        return sorted(
+            path.name.removeprefix("ticker=") for path in exchange_dir.glob("ticker=*")
+        )
+
+    def _write_partition(self, path: Path, bars: pl.DataFrame):
+        with self._lock:
+            if path.exists():
+                bars = (
+                    pl.concat([pl.read_parquet(path), bars], how="vertical_relaxed")
+                    .unique("date", keep="last", maintain_order=True)
+                    .sort("date")
+                )
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                bars = bars.sort("date")
+            temp_path = path.with_suffix(".tmp")
+            bars.write_parquet(temp_path, statistics=True)
+            os.replace(temp_path, path)
+
+    def _path(self, exchange: str, ticker: str, year: int) -> Path:
+        return (
+            self.root
+            / f"exchange={exchange.lower()}"
+            / f"ticker={ticker.upper()}"
+            / f"year={year}"
+            / self._file_name
+        )
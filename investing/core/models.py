@@ -93,6 +93,37 @@ class DBTableName(Enum):
     ticker_history = "factor_investing.ticker_history"
 
 
+class DataSource(Enum):
+    yahoo = "yahoo"
+    database = "database"
+    lake = "lake"
+    record = "record"
+    replay = "replay"
+    synthetic = "synthetic"
+
+
+class Upstream(Enum):
+    yahoo = "yahoo"
+    database = "database"
+    indicator = "indicator"
+
+
+class IndicatorEngine(Enum):
+    native = "native"
+    stock_indicators = "stock-indicators"
+
+
+class ResponseFormat(Enum):
+    json = "application/json"
+    arrow = "application/vnd.apache.arrow.stream"
+    ndjson = "application/x-ndjson"
+
+
+class Orient(Enum):
+    records = "records"
+    columns = "columns"
+
+
 class SuperTrendRecentNDatasetFormat(Enum):
     detail = "detail"
     ticker_only = "tickers-only"
@@ -171,6 +202,11 @@ class TickerHistoryQuery(BaseModel):
         description="End date for historical data points. This is mutually exclusive with `period`",
         examples=["2024-02-01", "2021-01-31"],
     )
+    orient: Orient = Field(
+        Orient.records,
+        description="`columns` returns `{column: [values]}` per ticker instead of list of "
+        "rows, it is several times smaller & faster to produce",
+    )
 
     @model_validator(mode="after")
     def check_start_end_date(self):
@@ -195,6 +231,29 @@ class SuperTrendIndicatorQuery(TickerHistoryQuery):
         description="List of column to retain from source ticker history data into indicator result",
         examples=[["close"], ["open", "high"]],
     )
+    engine: IndicatorEngine = Field(
+        IndicatorEngine.native,
+        description="Engine used to calculate the indicator. `native` works directly on the price "
+        "columns, `stock-indicators` uses the .NET backed stock indicators library.",
+    )
+
+
+class SuperTrendSweepQuery(TickerHistoryQuery):
+    lookback_periods: list[int] = Field(
+        [10],
+        description="Numbers of periods (N) for the ATR evaluation, each must be greater than 1.",
+        examples=[[7, 10, 14]],
+    )
+    multipliers: list[float] = Field(
+        [3],
+        description="ATR band width multipliers, each must be greater than 0.",
+        examples=[[2, 2.5, 3]],
+    )
+    retain_source_column: list[str] | None = Field(
+        default=None,
+        description="List of column to retain from source ticker history data into indicator result",
+        examples=[["close"], ["open", "high"]],
+    )
 
 
 class SuperTrendRecentNDatasetQuery(SuperTrendIndicatorQuery):
@@ -208,6 +267,11 @@ class SuperTrendRecentNDatasetQuery(SuperTrendIndicatorQuery):
         SuperTrendRecentNDatasetFormat.detail,
         description="Format of the output dataset. `detail` format includes complete table data. `ticker_only` format only includes ticker symbol.",
     )
+    universe: bool = Field(
+        False,
+        description="Screen every ticker of the exchange listed in ticker universe registry, "
+        "or else having stored history, instead of the given tickers",
+    )
 
 
 class TickerInput(BaseModel):
@@ -0,0 +1,412 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
+
+import polars as pl
+
+from investing.core.config import settings
+from investing.core.db import read_ticker_history, read_ticker_universe
+from investing.core.exception import DataProviderError
+from investing.core.lake import PriceLake
+from investing.core.models import (
+    DataSource,
+    Interval,
+    Period,
+    StockExchangeYahooIdentifier,
+)
+from investing.core.synthetic import MAX_YEARS, synthetic_history
+from investing.core.timing import stage
+from investing.core.utils import resolve_date_range
+
+if TYPE_CHECKING:
+    from adbc_driver_manager.dbapi import Connection
+
+logger = logging.getLogger("factor-investing")
+
+# NOTE - `ticker_history` table only holds daily bars of tickers listed on NSE
+DATABASE_EXCHANGE = StockExchangeYahooIdentifier.nse
+DATABASE_INTERVAL = Interval.ONE_DAY
+
+
+class DataProvider(Protocol):
+    """
+    Source of ticker history & info underneath `StockData`, which layers history
+    cache & database reads on top of it.
+
+    Tickers are given without exchange symbol & results are keyed by them as given,
+    with `None` for tickers the provider has nothing of.
+    """
+
+    def history(
+        self,
+        tickers: list[str],
+        exchange_market: StockExchangeYahooIdentifier,
+        period: Period = Period.MAX,
+        interval: Interval = Interval.ONE_DAY,
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> dict[str, pl.DataFrame | None]:
+        """History of the tickers in `StockData` format, range arguments are
+        interpreted like yahoo does, `end` is exclusive."""
+        ...
+
+    def info(
+        self, tickers: list[str], exchange_market: StockExchangeYahooIdentifier
+    ) -> dict[str, dict | None]:
+        """Info (company metadata) of the tickers."""
+        ...
+
+
+class YahooProvider:
+    """
+    Download history & info from yahoo finance.
+
+    A single ticker is downloaded with `yf.Ticker`, raising download errors, many
+    tickers with one `yf.Tickers` call & their info concurrently by at most
+    `ticker_info_concurrency` threads. yfinance is imported on first download.
+    """
+
+    def history(
+        self,
+        tickers: list[str],
+        exchange_market: StockExchangeYahooIdentifier,
+        period: Period = Period.MAX,
+        interval: Interval = Interval.ONE_DAY,
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> dict[str, pl.DataFrame | None]:
+        import yfinance as yf
+
+        yahoo_tickers = [ticker + exchange_market.value for ticker in tickers]
+        if len(tickers) == 1:
+            with stage("download"):
+                result = yf.Ticker(yahoo_tickers[0]).history(
+                    period=period.value,
+                    interval=interval.value,
+                    start=start,
+                    end=end,
+                    actions=False,
+                    raise_errors=True,
+                    # NOTE - not present in single `Tickers` object
+                    # progress=False,
+                    # group_by="ticker",
+                )
+            return {tickers[0]: self.transform_history(result)}
+
+        with stage("download"):
+            result = yf.Tickers(" ".join(yahoo_tickers)).history(
+                period=period.value,
+                interval=interval.value,
+                start=start,
+                end=end,
+                group_by="ticker",
+                actions=False,
+                progress=False,
+                # raise_errors=True, # NOTE - currently not supported by `Tickers` object
+            )
+        return {
+            ticker: self.transform_history(result[yahoo_ticker])
+            for ticker, yahoo_ticker in zip(tickers, yahoo_tickers)
+        }
+
+    def info(
+        self, tickers: list[str], exchange_market: StockExchangeYahooIdentifier
+    ) -> dict[str, dict | None]:
+        import yfinance as yf
+
+        yahoo_tickers = [ticker + exchange_market.value for ticker in tickers]
+        if len(tickers) == 1:
+            return {tickers[0]: yf.Ticker(yahoo_tickers[0]).get_info()}
+
+        handlers = yf.Tickers(" ".join(yahoo_tickers)).tickers
+        workers = max(1, min(settings.ticker_info_concurrency, len(handlers)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            infos = executor.map(
+                lambda yahoo_ticker: handlers[yahoo_ticker.upper()].get_info(),
+                yahoo_tickers,
+            )
+            return dict(zip(tickers, infos))
+
+    @staticmethod
+    def transform_history(data) -> pl.DataFrame:
+        """Transform pandas history of yahoo into `StockData` format."""
+        with stage("transform"):
+            history = pl.from_pandas(data, include_index=True)
+            return history.select(
+                pl.col("Date").cast(pl.Date).alias("date"),
+                pl.col("Open").cast(pl.Float64).round(3).alias("open"),
+                pl.col("High").cast(pl.Float64).round(3).alias("high"),
+                pl.col("Low").cast(pl.Float64).round(3).alias("low"),
+                pl.col("Close").cast(pl.Float64).round(3).alias("close"),
+                pl.col("Volume").cast(pl.Float64).round(3).alias("volume"),
+            )
+
+
+class DatabaseProvider:
+    """
+    Read daily NSE history from `ticker_history` table & info from `ticker_universe`
+    registry, without downloading anything missing in them.
+
+    Parameters
+    ----------
+    connection: Connection
+        Database connection
+    """
+
+    def __init__(self, connection: "Connection"):
+        self.connection = connection
+
+    def history(
+        self,
+        tickers: list[str],
+        exchange_market: StockExchangeYahooIdentifier,
+        period: Period = Period.MAX,
+        interval: Interval = Interval.ONE_DAY,
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> dict[str, pl.DataFrame | None]:
+        if exchange_market != DATABASE_EXCHANGE or interval != DATABASE_INTERVAL:
+            raise DataProviderError(
+                f"database only stores {DATABASE_INTERVAL.value} history of "
+                f"{DATABASE_EXCHANGE.name} tickers"
+            )
+        request_start, request_end = resolve_date_range(period, start, end)
+        with stage("database"):
+            history = read_ticker_history(
+                self.connection, tickers, request_start, request_end
+            )
+        return {ticker: history.get(ticker.upper()) for ticker in tickers}
+
+    def info(
+        self, tickers: list[str], exchange_market: StockExchangeYahooIdentifier
+    ) -> dict[str, dict | None]:
+        listings = {
+            listing["ticker"]: listing
+            for listing in read_ticker_universe(
+                self.connection, exchange_market.name
+            ).iter_rows(named=True)
+        }
+        return {ticker: listings.get(ticker.upper()) for ticker in tickers}
+
+
+class LakeProvider:
+    """
+    Read daily history from the parquet price lake, it holds no info.
+
+    Parameters
+    ----------
+    lake: PriceLake | Path | str
+        Price lake or its directory
+    """
+
+    def __init__(self, lake: PriceLake | Path | str):
+        self.lake = lake if isinstance(lake, PriceLake) else PriceLake(lake)
+
+    def history(
+        self,
+        tickers: list[str],
+        exchange_market: StockExchangeYahooIdentifier,
+        period: Period = Period.MAX,
+        interval: Interval = Interval.ONE_DAY,
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> dict[str, pl.DataFrame | None]:
+        if interval != Interval.ONE_DAY:
+            raise DataProviderError("price lake only stores daily history")
+        request_start, request_end = resolve_date_range(period, start, end)
+        history = self.lake.read_history(
+            tickers, exchange_market.name, request_start, request_end
+        )
+        return {ticker: history.get(ticker.upper()) for ticker in tickers}
+
+    def info(
+        self, tickers: list[str], exchange_market: StockExchangeYahooIdentifier
+    ) -> dict[str, dict | None]:
+        return dict.fromkeys(tickers)
+
+
+class SyntheticProvider:
+    """
+    Serve seeded synthetic daily history of `synthetic_history` for any ticker,
+    deterministic for the same seed & end date.
+
+    Parameters
+    ----------
+    years: float
+        Years of history generated up to `end`
+    seed: int
+        Seed of the random streams
+    end: date | None
+        Date of the last bar, by default today
+    """
+
+    def __init__(self, years: float = 10, seed: int = 0, end: date | None = None):
+        if not 0 < years <= MAX_YEARS:
+            raise DataProviderError(
+                f"years must be greater than 0 & at most {MAX_YEARS}"
+            )
+        self.years = years
+        self.seed = seed
+        self.end = end
+
+    def history(
+        self,
+        tickers: list[str],
+        exchange_market: StockExchangeYahooIdentifier,
+        period: Period = Period.MAX,
+        interval: Interval = Interval.ONE_DAY,
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> dict[str, pl.DataFrame | None]:
+        if interval != Interval.ONE_DAY:
+            raise DataProviderError("synthetic history is only daily")
+        if not tickers:
+            return {}
+        today = self.end or date.today()
+        request_start, request_end = resolve_date_range(period, start, end, today)
+        history = synthetic_history(
+            [ticker.upper() for ticker in tickers], self.years, self.seed, end=today
+        )
+        return {
+            ticker: history[ticker.upper()].filter(
+                pl.col("date") <= request_end,
+                *([pl.col("date") >= request_start] if request_start else []),
+            )
+            for ticker in tickers
+        }
+
+    def info(
+        self, tickers: list[str], exchange_market: StockExchangeYahooIdentifier
+    ) -> dict[str, dict | None]:
+        return {
+            ticker: {
+                "symbol": ticker.upper() + exchange_market.value,
+                "shortName": f"Synthetic {ticker.upper()}",
+            }
+            for ticker in tickers
+        }
+
+
+class RecordReplayProvider:
+    """
+    Record responses of an upstream provider on disk & replay them afterwards.
+
+    History of every (ticker, exchange, interval, requested range) is recorded as a
+    parquet file & info of every (ticker, exchange) as a JSON file, tickers the
+    upstream had nothing of are recorded as such. Only tickers without recording are
+    requested from upstream, so a recorded run is repeated deterministically at disk
+    speed. Recordings never expire, delete the directory to record again.
+
+    Parameters
+    ----------
+    root: Path | str
+        Directory of the recordings
+    upstream: DataProvider | None
+        Provider recording the missing responses, missing recordings raise
+        `DataProviderError` when `None`
+    """
+
+    _missing_suffix = ".missing"
+
+    def __init__(self, root: Path | str, upstream: DataProvider | None = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.upstream = upstream
+
+    def history(
+        self,
+        tickers: list[str],
+        exchange_market: StockExchangeYahooIdentifier,
+        period: Period = Period.MAX,
+        interval: Interval = Interval.ONE_DAY,
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> dict[str, pl.DataFrame | None]:
+        directory = (
+            self.root
+            / "history"
+            / exchange_market.name.lower()
+            / interval.value
+            / f"{period.value}_{start or ''}_{end or ''}"
+        )
+        return self._replay(
+            tickers,
+            lambda ticker: directory / f"{ticker.upper()}.parquet",
+            pl.read_parquet,
+            lambda df, path: df.write_parquet(path),
+            lambda missing: self._upstream(missing).history(
+                missing, exchange_market, period, interval, start, end
+            ),
+        )
+
+    def info(
+        self, tickers: list[str], exchange_market: StockExchangeYahooIdentifier
+    ) -> dict[str, dict | None]:
+        directory = self.root / "info" / exchange_market.name.lower()
+        return self._replay(
+            tickers,
+            lambda ticker: directory / f"{ticker.upper()}.json",
+            lambda path: json.loads(path.read_text()),
+            lambda info, path: path.write_text(json.dumps(info, default=str)),
+            lambda missing: self._upstream(missing).info(missing, exchange_market),
+        )
+
+    def _replay(self, tickers, path_of, read, write, fetch) -> dict:
+        result, missing = {}, []
+        for ticker in tickers:
+            path = path_of(ticker)
+            if path.exists():
+                result[ticker] = read(path)
+            elif path.with_suffix(self._missing_suffix).exists():
+                result[ticker] = None
+            else:
+                missing.append(ticker)
+        if missing:
+            fetched = fetch(missing)
+            for ticker in missing:
+                result[ticker] = fetched.get(ticker)
+                self._record(path_of(ticker), result[ticker], write)
+        return {ticker: result[ticker] for ticker in tickers}
+
+    def _record(self, path: Path, response, write):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if response is None:
+            path.with_suffix(self._missing_suffix).touch()
+            return
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        write(response, temp_path)
+        os.replace(temp_path, path)
+
+    def _upstream(self, missing: list[str]) -> DataProvider:
+        if self.upstream is None:
+            raise DataProviderError(f"found no recording of {missing} in {self.root}")
+        logger.info(f"recording responses of {len(missing)} tickers")
+        return self.upstream
+
+
+def default_data_provider() -> DataProvider:
+    """
+    Get provider of the configured data source. Database source reads history from
+    database within `StockData` & downloads what's missing in it from yahoo.
+    """
+    if settings.data_source == DataSource.lake:
+        if settings.price_lake_dir is None:
+            raise DataProviderError("lake data source needs a price lake directory")
+        return LakeProvider(settings.price_lake_dir)
+    if settings.data_source in (DataSource.record, DataSource.replay):
+        if settings.recording_dir is None:
+            raise DataProviderError(
+                f"{settings.data_source.value} data source needs a recording directory"
+            )
+        return RecordReplayProvider(
+            settings.recording_dir,
+            YahooProvider() if settings.data_source == DataSource.record else None,
+        )
+    if settings.data_source == DataSource.synthetic:
+        return SyntheticProvider()
+    return YahooProvider()
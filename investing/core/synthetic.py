@@ -0,0 +1,88 @@
+import hashlib
+from datetime import date, timedelta
+
+import numpy as np
+import polars as pl
+
+MAX_TICKERS = 5000
+MAX_YEARS = 30
+
+
+def synthetic_tickers(count: int) -> list[str]:
+    """Ticker symbols of synthetic securities, e.g. `SYN0001`"""
+    return [f"SYN{i:04d}" for i in range(1, count + 1)]
+
+
+def synthetic_history(
+    tickers: int | list[str] = 1,
+    years: float = 1,
+    seed: int = 0,
+    end: date = date(2024, 12, 31),
+) -> dict[str, pl.DataFrame]:
+    """
+    Generate seeded random walk daily OHLCV history, an offline stand-in of yahoo
+    history for benchmarks & tests.
+
+    Every ticker draws from its own random stream derived from `seed` & its symbol,
+    so history of a ticker doesn't depend on which other tickers are generated. Bars
+    fall on weekdays up to `end` & prices are rounded like `StockData` history.
+
+    Parameters
+    ----------
+    tickers: int | list[str]
+        Number of tickers, named by `synthetic_tickers`, or their symbols
+    years: float
+        Years of daily bars of every ticker
+    seed: int
+        Seed of the random streams
+    end: date
+        Date of the last bar, when it is a weekday
+
+    Returns
+    -------
+    dict[str, pl.DataFrame]
+        history of each ticker, in the same format as `StockData`
+    """
+    if isinstance(tickers, int):
+        tickers = synthetic_tickers(tickers)
+    if not 1 <= len(tickers) <= MAX_TICKERS:
+        raise ValueError(f"tickers must be between 1 & {MAX_TICKERS}")
+    if not 0 < years <= MAX_YEARS:
+        raise ValueError(f"years must be greater than 0 & at most {MAX_YEARS}")
+
+    dates = pl.date_range(end - timedelta(days=round(years * 365.25)), end, eager=True)
+    dates = dates.filter(dates.dt.weekday() <= 5)
+    bars = len(dates)
+    return {
+        ticker: _random_walk(
+            np.random.default_rng([seed, _stream(ticker)]), dates, bars
+        )
+        for ticker in tickers
+    }
+
+
+def _stream(ticker: str) -> int:
+    # NOTE - `hash` of str is salted per process, so it can't seed the stream
+    return int.from_bytes(hashlib.blake2b(ticker.encode(), digest_size=8).digest())
+
+
+def _random_walk(rng: np.random.Generator, dates: pl.Series, bars: int):
+    volatility = rng.uniform(0.01, 0.03)
+    close = rng.uniform(10, 2000) * np.exp(
+        np.cumsum(rng.normal(0.0003, volatility, bars))
+    )
+    open_ = np.concatenate(([close[0]], close[:-1])) * (
+        1 + rng.normal(0, volatility / 4, bars)
+    )
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 2, bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 2, bars)))
+    return pl.DataFrame(
+        {
+            "date": dates,
+            "open": open_.round(3),
+            "high": high.round(3),
+            "low": low.round(3),
+            "close": close.round(3),
+            "volume": rng.integers(1_000, 10_000_000, bars).astype(np.float64),
+        }
+    )
@@ -0,0 +1,221 @@
+import bisect
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from investing.core.config import settings
+
+DURATION_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+"""Upper bounds in seconds of stage duration histogram buckets"""
+
+TICKER_COUNT_BUCKETS = (1, 10, 100, 1000)
+"""Upper bounds of ticker count label values, so label cardinality stays bounded"""
+
+_request_timing: ContextVar["RequestTiming | None"] = ContextVar(
+    "request_timing", default=None
+)
+_NOT_TIMED = nullcontext()
+
+
+@dataclass
+class RequestTiming:
+    """
+    Seconds spent in each stage of a single request, summed over every time the
+    stage ran.
+
+    Attributes
+    ----------
+        stages : dict[str, float]
+            Seconds spent in each stage, in order of first appearance
+        tickers : int | None
+            Number of tickers requested, `None` until a stage reports it
+        endpoint_returned_at : float | None
+            `time.perf_counter` when the endpoint returned, its response is
+            serialized afterwards
+    """
+
+    stages: dict[str, float] = field(default_factory=dict)
+    tickers: int | None = None
+    endpoint_returned_at: float | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, name: str, seconds: float):
+        # NOTE - stages of a request run on worker pool threads as well
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+class _Stage:
+    __slots__ = ("timing", "name", "started_at")
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timing.add(self.name, time.perf_counter() - self.started_at)
+
+
+def stage(name: str):
+    """
+    Context manager timing a stage of the current request, e.g. `download`.
+
+    Nothing is timed outside of a timed request, so the only cost of a stage then is
+    a context variable lookup.
+
+    Parameters
+    ----------
+    name: str
+        Stage name, durations of the same stage are summed
+    """
+    timing = _request_timing.get()
+    if timing is None:
+        return _NOT_TIMED
+    return _Stage(timing, name)
+
+
+def add_stage(name: str, seconds: float):
+    """Add an already measured duration to a stage of the current request."""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+def record_tickers(count: int):
+    """Report the number of tickers of the current request, first report wins."""
+    timing = _request_timing.get()
+    if timing is not None and timing.tickers is None:
+        timing.tickers = count
+
+
+def current_request_timing() -> RequestTiming | None:
+    return _request_timing.get()
+
+
+def start_request_timing() -> tuple[RequestTiming, object]:
+    """Start timing stages of the current context, reset with the returned token by
+    `stop_request_timing`."""
+    timing = RequestTiming()
+    return timing, _request_timing.set(timing)
+
+
+def stop_request_timing(token):
+    _request_timing.reset(token)
+
+
+def ticker_count_label(count: int | None) -> str:
+    """Ticker count bucket, e.g. `11-100`, or `none` when unknown."""
+    if count is None:
+        return "none"
+    lower = 1
+    for upper in TICKER_COUNT_BUCKETS:
+        if count <= upper:
+            return str(upper) if lower == upper else f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+
+class StageMetrics:
+    """
+    Histograms of stage durations of requests, labelled by endpoint, exchange,
+    ticker count & stage, rendered in Prometheus text format.
+
+    Parameters
+    ----------
+    buckets: tuple[float, ...]
+        Ascending upper bounds in seconds of histogram buckets
+    """
+
+    name = "factor_investing_stage_duration_seconds"
+
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        # keyed by (endpoint, exchange, tickers, stage), bucket counts are
+        # non-cumulative with a trailing `+Inf` bucket, followed by sum
+        self._series: dict[tuple[str, str, str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, exchange: str, timing: RequestTiming):
+        """Add every stage of a finished request to its histogram."""
+        tickers = ticker_count_label(timing.tickers)
+        with self._lock:
+            for name, seconds in timing.stages.items():
+                key = (endpoint, exchange, tickers, name)
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+                series[0][bisect.bisect_left(self.buckets, seconds)] += 1
+                series[1] += seconds
+
+    def render(self) -> str:
+        """Histograms in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {self.name} Seconds spent in each stage of API requests",
+            f"# TYPE {self.name} histogram",
+        ]
+        bounds = [*(format(b, "g") for b in self.buckets), "+Inf"]
+        with self._lock:
+            series = {
+                key: (list(counts), total)
+                for key, (counts, total) in self._series.items()
+            }
+        for (endpoint, exchange, tickers, name), (counts, total) in sorted(
+            series.items()
+        ):
+            labels = (
+                f'endpoint="{_escape(endpoint)}",exchange="{_escape(exchange)}",'
+                f'tickers="{tickers}",stage="{_escape(name)}"'
+            )
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_default_stage_metrics: StageMetrics | None = None
+_default_stage_metrics_lock = threading.Lock()
+
+
+def default_stage_metrics() -> StageMetrics | None:
+    """Get process wide stage duration histograms, `None` if metrics are disabled."""
+    global _default_stage_metrics
+    if not settings.metrics_enabled:
+        return None
+    with _default_stage_metrics_lock:
+        if _default_stage_metrics is None:
+            _default_stage_metrics = StageMetrics()
+    return _default_stage_metrics
@@ -0,0 +1,193 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+import polars as pl
+
+from investing.core.db import read_ticker_universe, read_ticker_universe_version
+
+logger = logging.getLogger("factor-investing")
+
+
+@dataclass(frozen=True)
+class TickerListing:
+    """
+    Listing of a ticker in `ticker_universe` registry.
+
+    Attributes
+    ----------
+        exchange : str
+            Exchange name, e.g. `NSE`
+        ticker : str
+            Ticker symbol without exchange symbol
+        name : str | None
+            Company name
+        isin : str | None
+            ISIN of the security
+        listed_on : date | None
+            Listing date on the exchange
+        is_active : bool
+            Whether the ticker is still traded
+        indices : tuple[str, ...]
+            Names of the indices the ticker is a member of
+    """
+
+    exchange: str
+    ticker: str
+    name: str | None = None
+    isin: str | None = None
+    listed_on: date | None = None
+    is_active: bool = True
+    indices: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class _Index:
+    listings: dict[str, dict[str, TickerListing]]
+    # keyed by (exchange, index or `None` for every ticker, active only)
+    tickers: dict[tuple[str, str | None, bool], tuple[str, ...]]
+
+
+class TickerUniverse:
+    """
+    In-memory index of `ticker_universe` registry, so universe wide lookups need
+    neither file I/O nor database queries.
+
+    The index is rebuilt by `refresh` only when the registry changed & swapped
+    in at once, so readers never see a partially built index & don't need locks.
+
+    Parameters
+    ----------
+    listings: list[TickerListing] | None
+        listings to index upfront, without reading the registry
+    """
+
+    def __init__(self, listings: list[TickerListing] | None = None):
+        self._index = self._build(listings or [])
+        self._version: tuple[int, datetime | None] | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self, conn) -> bool:
+        """
+        Reload the registry when it changed since the last refresh.
+
+        Parameters
+        ----------
+        conn
+            database connection
+
+        Returns
+        -------
+        bool
+            whether the index was rebuilt
+        """
+        with self._lock:
+            version = read_ticker_universe_version(conn)
+            if version == self._version:
+                return False
+            listings = _listings(read_ticker_universe(conn))
+            self._index = self._build(listings)
+            self._version = version
+        logger.info(f"loaded {len(listings)} listings of ticker universe")
+        return True
+
+    def exchanges(self) -> list[str]:
+        return list(self._index.listings)
+
+    def tickers(
+        self, exchange: str, index: str | None = None, active_only: bool = True
+    ) -> list[str]:
+        """
+        Tickers listed on an exchange, in sorted order.
+
+        Parameters
+        ----------
+        exchange: str
+            Exchange name, case insensitive
+        index: str | None
+            only members of this index, case insensitive
+        active_only: bool
+            leave out tickers which are not traded anymore
+
+        Returns
+        -------
+        list[str]
+            ticker symbols without exchange symbol, empty for unknown exchange
+        """
+        key = (exchange.upper(), index and index.upper(), active_only)
+        return list(self._index.tickers.get(key, ()))
+
+    def listing(self, exchange: str, ticker: str) -> TickerListing | None:
+        return self._index.listings.get(exchange.upper(), {}).get(ticker.upper())
+
+    def indices(self, exchange: str) -> list[str]:
+        exchange = exchange.upper()
+        return sorted(
+            index
+            for e, index, active_only in self._index.tickers
+            if e == exchange and index is not None and not active_only
+        )
+
+    def __len__(self) -> int:
+        return sum(len(listings) for listings in self._index.listings.values())
+
+    @staticmethod
+    def _build(listings: list[TickerListing]) -> _Index:
+        by_exchange: dict[str, dict[str, TickerListing]] = {}
+        tickers: dict[tuple[str, str | None, bool], list[str]] = {}
+        for listing in sorted(listings, key=lambda l: (l.exchange, l.ticker)):
+            by_exchange.setdefault(listing.exchange, {})[listing.ticker] = listing
+            for index in (None, *(i.upper() for i in listing.indices)):
+                for active_only in (False, True):
+                    if active_only and not listing.is_active:
+                        continue
+                    tickers.setdefault(
+                        (listing.exchange, index, active_only), []
+                    ).append(listing.ticker)
+        return _Index(
+            listings=by_exchange,
+            tickers={key: tuple(members) for key, members in tickers.items()},
+        )
+
+
+def _listings(listings: pl.DataFrame) -> list[TickerListing]:
+    return [
+        TickerListing(**{**row, "indices": tuple(row.get("indices") or ())})
+        for row in listings.iter_rows(named=True)
+    ]
+
+
+def read_listings_csv(
+    path: Path | str, exchange: str, indices: tuple[str, ...] = ()
+) -> pl.DataFrame:
+    """
+    Read listings of an exchange from a csv file, to load into the registry.
+
+    Parameters
+    ----------
+    path: Path | str
+        csv file with `ticker` column & optionally `name`, `isin` & `listed_on`
+    exchange: str
+        Exchange name of the tickers
+    indices: tuple[str, ...]
+        Indices every ticker of the file is a member of
+
+    Returns
+    -------
+    pl.DataFrame
+        listings, as expected by `upsert_ticker_universe`
+    """
+    listings = pl.read_csv(path, infer_schema=False)
+    return listings.select(
+        pl.lit(exchange.upper()).alias("exchange"),
+        pl.col("ticker").str.strip_chars().str.to_uppercase(),
+        *(pl.col(c) for c in ("name", "isin") if c in listings.columns),
+        *(
+            [pl.col("listed_on").str.to_date()]
+            if "listed_on" in listings.columns
+            else []
+        ),
+        pl.lit(list(indices), dtype=pl.List(pl.String)).alias("indices"),
+    ).unique("ticker", maintain_order=True)
@@ -1,5 +1,22 @@
+from datetime import date, timedelta
 from typing import Any
 
+import polars as pl
+
+from investing.core.models import Period
+
+PERIOD_DAYS = {
+    Period.ONE_DAY: 1,
+    Period.FIVE_DAYS: 5,
+    Period.ONE_MONTH: 31,
+    Period.THREE_MONTHS: 92,
+    Period.SIX_MONTHS: 183,
+    Period.ONE_YEAR: 366,
+    Period.TWO_YEARS: 731,
+    Period.FIVE_YEARS: 1827,
+    Period.TEN_YEARS: 3653,
+}
+
 
 def create_batches_list(data: list[Any], batch_size: int) -> list[list]:
     """
@@ -19,3 +36,96 @@ def create_batches_list(data: list[Any], batch_size: int) -> list[list]:
         batches list
     """
     return [data[idx : idx + batch_size] for idx in range(0, len(data), batch_size)]
+
+
+def stack_ticker_frames(data: dict[str, pl.DataFrame]) -> pl.DataFrame:
+    """
+    Stack per ticker dataframes into one long dataframe with a leading `ticker` column.
+
+    Parameters
+    ----------
+    data: dict[str, pl.DataFrame]
+        dataframe of each ticker, keyed by ticker symbol
+
+    Returns
+    -------
+    pl.DataFrame
+        long format dataframe
+    """
+    return pl.concat(
+        [
+            df.select(pl.lit(ticker, dtype=pl.String).alias("ticker"), pl.all())
+            for ticker, df in data.items()
+        ],
+        how="vertical_relaxed",
+    )
+
+
+def split_ticker_frame(data: pl.DataFrame) -> dict[str, pl.DataFrame]:
+    """
+    Split long dataframe having a `ticker` column back into per ticker dataframes.
+
+    Parameters
+    ----------
+    data: pl.DataFrame
+        long format dataframe, as created by `stack_ticker_frames`
+
+    Returns
+    -------
+    dict[str, pl.DataFrame]
+        dataframe of each ticker, keyed by ticker symbol
+    """
+    return {
+        ticker: df
+        for (ticker,), df in data.partition_by(
+            "ticker", as_dict=True, include_key=False, maintain_order=True
+        ).items()
+    }
+
+
+def resolve_date_range(
+    period: Period = Period.MAX,
+    start: str | date | None = None,
+    end: str | date | None = None,
+    today: date | None = None,
+) -> tuple[date | None, date]:
+    """
+    Resolve yahoo style history arguments into an inclusive date range.
+
+    `start` & `end` take precedence over `period`, just like yahoo finance api. Note
+    that yahoo treats `end` as exclusive, so returned end is the day before it.
+
+    Parameters
+    ----------
+    period: Period
+        history period, used when `start` is not given
+    start: str | date | None
+        start date of history
+    end: str | date | None
+        exclusive end date of history
+    today: date | None
+        reference date, by default today
+
+    Returns
+    -------
+    tuple[date | None, date]
+        inclusive start & end date, start is `None` for entire history
+    """
+    today = today or date.today()
+    end_date = date.fromisoformat(str(end)) - timedelta(days=1) if end else today
+    if start:
+        return date.fromisoformat(str(start)), end_date
+    if period == Period.MAX:
+        return None, end_date
+    if period == Period.YEAR_TO_DATE:
+        return date(end_date.year, 1, 1), end_date
+    return end_date - timedelta(days=PERIOD_DAYS[period] - 1), end_date
+
+
+def has_weekday(start: date, end: date) -> bool:
+    """Check whether inclusive date range has at least one trading (week) day."""
+    # NOTE - 5 consecutive days always have a weekday
+    return any(
+        (start + timedelta(days=i)).weekday() < 5
+        for i in range(min((end - start).days + 1, 5))
+    )
@@ -0,0 +1,5 @@
+import time
+
+# NOTE - `main.py` imports this module before anything else, so the startup report
+# of the REST API includes the time of the other imports
+STARTED_AT = time.perf_counter()
@@ -1,17 +1,32 @@
 import logging
-from datetime import date, timedelta
+from datetime import date
 from pathlib import Path
 
 import polars as pl
 from adbc_driver_postgresql import dbapi
-from alive_progress import alive_it
+from alive_progress import alive_bar
 from dotenv import dotenv_values
 
+from investing.core.config import settings
 from investing.core.data import Interval, Period, StockData
-from investing.core.db import latest_data_query, prepare_ticker_history_table
+from investing.core.db import (
+    UpsertResult,
+    prepare_ticker_history_table,
+    read_ticker_universe,
+    read_ticker_watermarks,
+    upsert_ticker_history,
+    upsert_ticker_universe,
+)
+from investing.core.downloader import (
+    BatchDownloader,
+    DownloadCheckpoint,
+    plan_download_units,
+)
 from investing.core.exception import YahooAPIError
-from investing.core.models import DBTableName
-from investing.core.utils import create_batches_list
+from investing.core.indicator.materialized import materialize_super_trend
+from investing.core.lake import PriceLake
+from investing.core.models import StockExchangeYahooIdentifier
+from investing.core.universe import read_listings_csv
 
 logger = logging.getLogger("factor-investing")
 current_path = Path(__file__).resolve().parent
@@ -23,58 +38,124 @@ conn_string = (
 
 # Getting list of tickers to download
 BATCH_SIZE = 20
-tickers = pl.read_csv(current_path / "tickers_nse_500.csv").to_series().to_list()
-tickers_batches = create_batches_list(tickers, BATCH_SIZE)
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+CHECKPOINT_FILE = current_path / ".checkpoint" / "ticker_history.jsonl"
+# tickers are listed in ticker universe registry, loaded from csv on the first run
+with dbapi.connect(conn_string) as conn:
+    universe = read_ticker_universe(conn, StockExchangeYahooIdentifier.nse.name)
+    if universe.is_empty():
+        logger.info("ticker universe registry is empty, loading it from csv")
+        upsert_ticker_universe(
+            conn,
+            read_listings_csv(
+                current_path / "tickers_nse_500.csv",
+                StockExchangeYahooIdentifier.nse.name,
+                ("NIFTY 500",),
+            ),
+        )
+        universe = read_ticker_universe(conn, StockExchangeYahooIdentifier.nse.name)
+tickers = universe.filter(pl.col("is_active"))["ticker"].to_list()
 logger.debug(f"total tickers: {len(tickers)}")
 
-# getting latest date to run the insert job
-logger.info("getting last inserted date")
+# getting last stored date of every ticker to download only its missing history
+logger.info("getting last inserted date of every ticker")
 with dbapi.connect(conn_string) as conn:
-    date_df = pl.read_database(latest_data_query(), conn)
-    if date_df.is_empty():
-        logger.info("no latest date found, running for max date")
-        USE_MAX = True
-    else:
-        USE_MAX = False
-        last_run_date = date_df.select("date").item(0, 0)
-        logger.info(f"last run date: {last_run_date}")
+    watermarks = read_ticker_watermarks(conn, tickers)
+missing = [ticker for ticker, watermark in watermarks.items() if watermark is None]
+logger.info(f"{len(missing)} tickers have no history stored, downloading all of it")
 
 # running batch job
-total_batches = len(tickers_batches)
-for current_batch in alive_it(
-    tickers_batches,
-    force_tty=True,
-    receipt_text=True,
-):
-    logger.debug(f"tickers of current batch: {current_batch}")
-    sd = StockData(current_batch)
-
-    # Downloading tickers based on last run date
-    if USE_MAX:
-        logger.info("downloading entire historical data of all given tickers")
-        result = sd.get_ticker_history(period=Period.MAX, interval=Interval.ONE_DAY)
-    else:
-        TODAY = date.today()
-        start_date = last_run_date + timedelta(days=1)
-        logger.info(f"downloading from {start_date} to {TODAY}")
-        result = sd.get_ticker_history(
-            start=start_date, end=TODAY, interval=Interval.ONE_DAY
-        )
+TODAY = date.today()
+units = plan_download_units(watermarks, TODAY, BATCH_SIZE)
+logger.info(f"downloading {sum(len(u.tickers) for u in units)} tickers up to {TODAY}")
+
+# resuming an interrupted run of today with its own date ranges, as the table already
+# holds part of its history, plans of earlier days are discarded
+checkpoint = DownloadCheckpoint(CHECKPOINT_FILE)
+if (saved_units := checkpoint.saved_units(TODAY)) is not None:
+    logger.info("resuming interrupted run")
+    units = saved_units
+else:
+    checkpoint.save_units(units)
+
+
+def download_history(
+    batch: list[str], start: date | None, end: date
+) -> dict[str, pl.DataFrame]:
+    sd = StockData(batch)
+    if start is None:
+        return sd.get_ticker_history(period=Period.MAX, interval=Interval.ONE_DAY)
+    return sd.get_ticker_history(start=start, end=end, interval=Interval.ONE_DAY)
 
-    # preparing dataframe to insert data
-    logger.info("preparing data to insert")
-    data_inset_df = pl.DataFrame()
-    for ticker in current_batch:
-        try:
-            unit_data = prepare_ticker_history_table(result[ticker.upper()], ticker)
-            data_inset_df = data_inset_df.vstack(unit_data)
-        except YahooAPIError as e:
-            logger.warning(f"{e}, so skipping it.")
-
-    # inserting data to the `ticker_history` table
-    with dbapi.connect(conn_string) as conn:
-        data_inset_df.write_database(
-            DBTableName.ticker_history.value, conn, if_table_exists="append"
-        )
 
-        logger.info(f"successfully inserted {len(data_inset_df)} rows")
+total_result = UpsertResult()
+# parquet price lake is an additional sink, when configured
+lake = PriceLake(settings.price_lake_dir) if settings.price_lake_dir else None
+downloader = BatchDownloader(
+    download_history,
+    max_workers=MAX_WORKERS,
+    max_retries=MAX_RETRIES,
+    checkpoint=checkpoint,
+)
+
+with dbapi.connect(conn_string) as conn, alive_bar(
+    len(tickers), force_tty=True, receipt_text=True
+) as progress:
+
+    def upsert_batch(history: dict[str, pl.DataFrame]):
+        """Upsert a downloaded batch into `ticker_history` table & price lake"""
+        global total_result
+        batch_frames = []
+        for ticker, data in history.items():
+            try:
+                batch_frames.append(prepare_ticker_history_table(data, ticker))
+            except YahooAPIError as e:
+                logger.warning(f"{e}, so skipping it.")
+        if batch_frames:
+            batch_result = upsert_ticker_history(conn, pl.concat(batch_frames))
+            total_result += batch_result
+            logger.info(
+                f"inserted {batch_result.inserted} rows, "
+                f"updated {batch_result.updated} rows"
+            )
+        if lake is not None:
+            lake.write(history, StockExchangeYahooIdentifier.nse.name)
+        progress(len(history))
+
+    report = downloader.run(units, upsert_batch)
+
+logger.info(
+    f"ingest complete, received {total_result.received} rows, inserted "
+    f"{total_result.inserted}, updated {total_result.updated} & "
+    f"{total_result.unchanged} were unchanged"
+)
+if report.failed:
+    logger.warning(
+        f"{len(report.failed)} tickers failed, re-run to resume: {report.failed}"
+    )
+else:
+    # every unit is complete, next run starts afresh
+    checkpoint.clear()
+
+# materializing configured SuperTrend parameters, corrected history invalidates the
+# stored states of its tickers so only they are recalculated entirely
+if settings.super_trend_params:
+    if total_result.updated_tickers:
+        logger.info(
+            f"history of {len(total_result.updated_tickers)} tickers was corrected, "
+            "recalculating their SuperTrend entirely"
+        )
+    with dbapi.connect(conn_string) as conn:
+        for lookback_periods, multiplier in settings.super_trend_params:
+            written = materialize_super_trend(
+                conn,
+                tickers,
+                lookback_periods,
+                multiplier,
+                full=total_result.updated_tickers,
+            )
+            logger.info(
+                f"SuperTrend({lookback_periods}, {multiplier}) materialized, "
+                f"wrote {written} rows"
+            )
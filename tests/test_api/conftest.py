@@ -0,0 +1,49 @@
+from datetime import date
+
+import polars as pl
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from investing.api.dependency.utils import ticker_universe, worker_pool
+from investing.api.worker_pool import WorkerPool
+from investing.core.data import StockData
+from investing.core.models import Upstream
+from investing.core.universe import TickerUniverse
+from main import app
+
+
+def fake_history(self, **kwargs):
+    """Two daily bars of every ticker, second one without close."""
+    return {
+        ticker: pl.DataFrame(
+            {
+                "date": [date(2024, 1, 1), date(2024, 1, 2)],
+                "open": [1.0, 2.0],
+                "high": [1.5, 2.5],
+                "low": [0.5, 1.5],
+                "close": [1.2, None],
+                "volume": [10.0, 20.0],
+            }
+        )
+        for ticker in self._ticker_data
+    }
+
+
+@pytest.fixture
+def api_client():
+    """API client with a worker pool & an empty ticker universe outside of lifespan,
+    serving history of the configured data provider."""
+    pool = WorkerPool(max_workers=1, upstream_limits={u: 1 for u in Upstream})
+    app.dependency_overrides[worker_pool] = lambda: pool
+    universe = TickerUniverse()
+    app.dependency_overrides[ticker_universe] = lambda: universe
+    yield AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    app.dependency_overrides.clear()
+    pool.shutdown()
+
+
+@pytest.fixture
+def client(monkeypatch, api_client):
+    """API client serving stubbed history."""
+    monkeypatch.setattr(StockData, "get_ticker_history", fake_history)
+    return api_client
@@ -0,0 +1,45 @@
+from datetime import date
+
+import polars as pl
+import pytest
+
+import investing.api.indicator
+from investing.api.dependency.utils import db_connection
+from main import app
+
+
+def fake_materialized(conn, tickers, *args, **kwargs):
+    """SuperTrend of `INFY` is materialized, other tickers are not."""
+    return {
+        ticker: pl.DataFrame(
+            {
+                "date": [date(2024, 1, 1)],
+                "close": [1.2],
+                "super_trend": [9.99],
+                "upper": [9.99],
+                "lower": [None],
+            },
+            schema_overrides={"lower": pl.Float64},
+        )
+        for ticker in tickers
+        if ticker == "INFY"
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_super_trend_reads_materialized_tickers(client, monkeypatch):
+    monkeypatch.setattr(
+        investing.api.indicator, "read_materialized_super_trend", fake_materialized
+    )
+    app.dependency_overrides[db_connection] = lambda: object()
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/indicator/super-trend",
+            json={"ticker": ["tcs", "infy"]},
+        )
+    assert response.status_code == 200, response.text
+    result = {item["ticker"]: item["indicator"] for item in response.json()}
+    assert list(result) == ["TCS", "INFY"]
+    assert result["INFY"][0]["super_trend"] == 9.99
+    # two bars aren't enough to calculate the indicator
+    assert result["TCS"] == []
@@ -0,0 +1,154 @@
+import io
+import json
+from dataclasses import replace
+
+import polars as pl
+import pytest
+
+import investing.api.response
+from investing.api.dependency.utils import response_format
+from investing.core.config import settings
+from investing.core.data import StockData
+from investing.core.models import ResponseFormat
+
+
+def test_response_format_negotiation():
+    assert response_format(None) == ResponseFormat.json
+    assert response_format("*/*") == ResponseFormat.json
+    assert response_format("application/x-ndjson") == ResponseFormat.ndjson
+    assert (
+        response_format(
+            "application/json;q=0.5, application/vnd.apache.arrow.stream;q=0.9"
+        )
+        == ResponseFormat.arrow
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_history_arrow_response(client):
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/history",
+            json={"ticker": ["infy", "tcs"]},
+            headers={"Accept": ResponseFormat.arrow.value},
+        )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == ResponseFormat.arrow.value
+    history = pl.read_ipc_stream(io.BytesIO(response.content))
+    assert history.columns[:3] == ["exchange", "ticker", "date"]
+    assert history["ticker"].to_list() == ["INFY", "INFY", "TCS", "TCS"]
+    assert history["close"].to_list() == [1.2, None, 1.2, None]
+
+
+@pytest.mark.asyncio
+async def test_bulk_history_ndjson_response_matches_json(client):
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/history",
+            json={"ticker": ["infy", "tcs"]},
+            headers={"Accept": ResponseFormat.ndjson.value},
+        )
+        json_response = await ac.post(
+            "/api/bulk/nse/history", json={"ticker": ["infy", "tcs"]}
+        )
+    assert response.headers["content-type"] == ResponseFormat.ndjson.value
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == json_response.json()
+
+
+@pytest.mark.asyncio
+async def test_bulk_history_ndjson_response_is_calculated_per_chunk(
+    client, monkeypatch
+):
+    monkeypatch.setattr(
+        investing.api.response, "settings", replace(settings, stream_chunk_size=2)
+    )
+    chunks = []
+    stubbed_history = StockData.get_ticker_history
+
+    def recording_history(self, **kwargs):
+        chunks.append(list(self._ticker_data))
+        return stubbed_history(self, **kwargs)
+
+    monkeypatch.setattr(StockData, "get_ticker_history", recording_history)
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/history",
+            json={"ticker": ["infy", "tcs", "wipro"]},
+            headers={"Accept": ResponseFormat.ndjson.value},
+        )
+    assert chunks == [["INFY", "TCS"], ["WIPRO"]]
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["ticker"] for line in lines] == ["INFY", "TCS", "WIPRO"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_super_trend_ndjson_response(client):
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/indicator/super-trend",
+            json={"ticker": ["infy"]},
+            headers={"Accept": ResponseFormat.ndjson.value},
+        )
+    assert response.status_code == 200
+    (line,) = response.text.splitlines()
+    assert json.loads(line)["ticker"] == "INFY"
+
+
+@pytest.mark.asyncio
+async def test_bulk_history_columns_orient(client):
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/history?orient=columns", json={"ticker": ["infy"]}
+        )
+        records = await ac.post("/api/bulk/nse/history", json={"ticker": ["infy"]})
+    assert response.status_code == 200
+    (columns,) = response.json()
+    (rows,) = records.json()
+    assert columns["ticker"] == "INFY"
+    assert columns["history"]["date"] == ["2024-01-01", "2024-01-02"]
+    assert columns["history"]["close"] == [1.2, None]
+    assert [
+        dict(zip(columns["history"], row)) for row in zip(*columns["history"].values())
+    ] == rows["history"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_history_escapes_tickers(client):
+    tickers = ["m&m", 'a"b\\c']
+    async with client as ac:
+        columns = await ac.post(
+            "/api/bulk/nse/history?orient=columns", json={"ticker": tickers}
+        )
+        ndjson = await ac.post(
+            "/api/bulk/nse/history",
+            json={"ticker": tickers},
+            headers={"Accept": ResponseFormat.ndjson.value},
+        )
+    expected = ["M&M", 'A"B\\C']
+    assert [item["ticker"] for item in columns.json()] == expected
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [line["ticker"] for line in lines] == expected
+    assert lines[0]["history"][0]["open"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_bulk_super_trend_sweep(client):
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/indicator/super-trend/sweep",
+            params={
+                "lookback_periods": [7, 10],
+                "multipliers": [2, 3],
+                "orient": "columns",
+            },
+            json={"ticker": ["tcs", "infy"]},
+        )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert [item["ticker"] for item in result] == ["TCS", "INFY"]
+    assert list(result[0]["indicator"])[:3] == [
+        "lookback_periods",
+        "multiplier",
+        "date",
+    ]
@@ -0,0 +1,44 @@
+import pytest
+
+from investing.core import data, provider
+from investing.core.provider import DatabaseProvider, LakeProvider, RecordReplayProvider
+
+
+@pytest.fixture(params=["database", "lake", "replay"])
+def empty_provider(request, monkeypatch, tmp_path):
+    """Provider of every non yahoo data source, having nothing of any ticker."""
+    if request.param == "database":
+        monkeypatch.setattr(provider, "read_ticker_history", lambda *args: {})
+        source = DatabaseProvider(connection=None)
+    elif request.param == "lake":
+        source = LakeProvider(tmp_path)
+    else:
+        source = RecordReplayProvider(tmp_path / "recording", LakeProvider(tmp_path))
+    monkeypatch.setattr(data, "default_data_provider", lambda: source)
+    return source
+
+
+@pytest.mark.asyncio
+async def test_per_security_unknown_ticker_has_empty_history(
+    api_client, empty_provider
+):
+    async with api_client as ac:
+        history = await ac.get("/api/per-security/nse/unknown/history")
+        indicator = await ac.get("/api/per-security/nse/unknown/indicator/super-trend")
+    assert history.status_code == 200, history.text
+    assert history.json()["history"] == []
+    assert indicator.status_code == 200, indicator.text
+    assert indicator.json()["indicator"] == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_unknown_ticker_has_empty_history(api_client, empty_provider):
+    async with api_client as ac:
+        history = await ac.post("/api/bulk/nse/history", json={"ticker": ["unknown"]})
+        indicator = await ac.post(
+            "/api/bulk/nse/indicator/super-trend", json={"ticker": ["unknown"]}
+        )
+    assert history.status_code == 200, history.text
+    assert history.json()[0]["history"] == []
+    assert indicator.status_code == 200, indicator.text
+    assert indicator.json()[0]["indicator"] == []
@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+import polars as pl
+import pytest
+
+from investing.api.routers.dataset.indicators import recent_n_screen
+
+
+def long_result(lower: dict[str, list[float | None]]) -> pl.DataFrame:
+    return pl.concat(
+        [
+            pl.DataFrame(
+                {
+                    "ticker": ticker,
+                    "date": [
+                        date(2024, 1, 1) + timedelta(days=i) for i in range(len(values))
+                    ],
+                    "close": [float(i) for i in range(len(values))],
+                    "super_trend": [1.0] * len(values),
+                    "upper": [None] * len(values),
+                    "lower": values,
+                },
+                schema_overrides={"upper": pl.Float64, "lower": pl.Float64},
+            )
+            for ticker, values in lower.items()
+        ]
+    )
+
+
+def test_recent_n_screen():
+    result = long_result(
+        {
+            "TCS": [1.0, 2.0, 3.0],
+            # null older than recent 2 rows doesn't reject it
+            "INFY": [None, 2.0, 3.0],
+            "WIPRO": [1.0, None, 3.0],
+        }
+    )
+    dataset, passed = recent_n_screen(result, ["WIPRO", "INFY", "EMPTY", "TCS"], 2)
+    assert passed == ["INFY", "EMPTY", "TCS"]
+    assert dataset.columns == [
+        "date",
+        "ticker",
+        "close",
+        "super_trend",
+        "upper",
+        "lower",
+    ]
+    assert dataset["ticker"].to_list() == ["INFY", "INFY", "TCS", "TCS"]
+    assert dataset["date"].to_list() == [date(2024, 1, 3), date(2024, 1, 2)] * 2
+
+    dataset, passed = recent_n_screen(result, ["WIPRO", "INFY", "TCS"], 3)
+    assert passed == ["TCS"]
+    assert dataset.height == 3
+
+
+@pytest.mark.asyncio
+async def test_super_trend_dataset_requires_tickers(client):
+    async with client as ac:
+        response = await ac.post("/api/dataset/indicator/nse/indicator/super-trend")
+        universe = await ac.post(
+            "/api/dataset/indicator/nse/indicator/super-trend?universe=true"
+        )
+        tickers = await ac.post(
+            "/api/dataset/indicator/nse/indicator/super-trend?result_format=tickers-only",
+            json={"ticker": ["infy", "tcs", "infy"]},
+        )
+    assert response.status_code == 400
+    # nothing is stored without database & price lake
+    assert universe.status_code == 400
+    assert tickers.json() == ["INFY", "TCS"]
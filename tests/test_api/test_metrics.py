@@ -0,0 +1,61 @@
+from dataclasses import replace
+
+import pytest
+
+from investing.core import timing
+from investing.core.config import settings
+
+
+@pytest.fixture
+def metrics_enabled(monkeypatch):
+    monkeypatch.setattr(timing, "settings", replace(settings, metrics_enabled=True))
+    monkeypatch.setattr(timing, "_default_stage_metrics", None)
+
+
+@pytest.mark.asyncio
+async def test_metrics_disabled(client) -> None:
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/indicator/super-trend", json={"ticker": ["TCS"]}
+        )
+        assert response.status_code == 200
+        assert "server-timing" not in response.headers
+        assert (await ac.get("/metrics")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_server_timing_and_metrics(client, metrics_enabled) -> None:
+    async with client as ac:
+        response = await ac.post(
+            "/api/bulk/nse/indicator/super-trend",
+            json={"ticker": ["TCS", "INFY"]},
+        )
+        assert response.status_code == 200
+        stages = {
+            entry.split(";")[0]
+            for entry in response.headers["server-timing"].split(", ")
+        }
+        assert {"queue", "indicator", "join", "serialize", "total"} <= stages
+
+        metrics = await ac.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    labels = (
+        'endpoint="/api/bulk/{exchange}/indicator/super-trend",exchange="nse",'
+        'tickers="2-10",stage="indicator"'
+    )
+    assert f"factor_investing_stage_duration_seconds_count{{{labels}}} 1" in (
+        metrics.text
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_bound_exchange_label(client, metrics_enabled) -> None:
+    async with client as ac:
+        for exchange in ["NSE", "unknown-1", "unknown-2"]:
+            assert (await ac.get(f"/api/per-security/{exchange}")).status_code == 200
+        metrics = await ac.get("/metrics")
+    endpoint = 'endpoint="/api/per-security/{exchange}"'
+    assert f'{endpoint},exchange="nse",' in metrics.text
+    assert f'{endpoint},exchange="other",' in metrics.text
+    assert "unknown" not in metrics.text
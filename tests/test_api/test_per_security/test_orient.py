@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_per_security_history_columns_orient(client):
+    async with client as ac:
+        response = await ac.get("/api/per-security/nse/infy/history?orient=columns")
+    assert response.status_code == 200, response.text
+    assert response.json()["history"]["open"] == [1.0, 2.0]
@@ -1,3 +1,7 @@
+import subprocess
+import sys
+from pathlib import Path
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 
@@ -12,3 +16,19 @@ async def test_root() -> None:
         response = await ac.get("/")
         assert response.status_code == 200
         assert response.json() == {"message": "Factor Investing API is running"}
+
+
+def test_heavy_dependencies_are_imported_lazily() -> None:
+    modules = ["yfinance", "pandas", "stock_indicators", "adbc_driver_manager.dbapi"]
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, main; print([m for m in {modules} if m in sys.modules])",
+        ],
+        cwd=Path(__file__).resolve().parents[2],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert loaded.stdout.strip() == "[]"
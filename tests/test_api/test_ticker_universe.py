@@ -0,0 +1,38 @@
+import pytest
+
+from investing.api.dependency.utils import ticker_universe
+from investing.core.universe import TickerListing, TickerUniverse
+from main import app
+
+universe = TickerUniverse(
+    [
+        TickerListing("NSE", "TCS", indices=("NIFTY 50",)),
+        TickerListing("NSE", "ABB"),
+        TickerListing("NYSE", "IBM"),
+    ]
+)
+
+
+@pytest.mark.asyncio
+async def test_list_ticker_from_universe(client):
+    app.dependency_overrides[ticker_universe] = lambda: universe
+    async with client as ac:
+        response = await ac.get("/api/per-security/nse")
+        members = await ac.get("/api/per-security/nse", params={"index": "NIFTY 50"})
+        unknown = await ac.get("/api/per-security/bse")
+    assert response.status_code == 200, response.text
+    assert response.json() == {"exchange": "NSE", "tickers": ["ABB", "TCS"]}
+    assert members.json()["tickers"] == ["TCS"]
+    assert unknown.json() == {"exchange": "BSE", "tickers": []}
+
+
+@pytest.mark.asyncio
+async def test_bulk_tickers_from_universe(client):
+    app.dependency_overrides[ticker_universe] = lambda: universe
+    async with client as ac:
+        response = await ac.post("/api/bulk/", json={"exchange": ["nse", "nyse"]})
+    assert response.status_code == 200, response.text
+    assert response.json() == [
+        {"exchange": "NSE", "tickers": ["ABB", "TCS"]},
+        {"exchange": "NYSE", "tickers": ["IBM"]},
+    ]
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from investing.api.worker_pool import WorkerPool
+from investing.core.models import Upstream
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_limits_upstream_concurrency():
+    pool = WorkerPool(
+        max_workers=4, upstream_limits={Upstream.yahoo: 1, Upstream.indicator: 2}
+    )
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(pool.run(Upstream.yahoo, time.sleep, 0.1) for _ in range(3))
+        )
+        elapsed = time.perf_counter() - start
+        assert elapsed >= 0.3
+
+        stats = pool.stats()
+        assert stats["yahoo"]["completed"] == 3
+        assert stats["yahoo"]["max_queued"] == 2
+        assert stats["yahoo"]["queued"] == 0
+        assert stats["yahoo"]["in_flight"] == 0
+        assert stats["indicator"]["completed"] == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_keeps_event_loop_responsive():
+    pool = WorkerPool(max_workers=2, upstream_limits={Upstream.yahoo: 1})
+    try:
+        slow_call = asyncio.create_task(pool.run(Upstream.yahoo, time.sleep, 0.3))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - start < 0.2
+        await slow_call
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_counts_failures():
+    pool = WorkerPool(max_workers=1, upstream_limits={Upstream.yahoo: 1})
+    try:
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(Upstream.yahoo, divmod, 1, 0)
+        assert pool.stats()["yahoo"]["failed"] == 1
+    finally:
+        pool.shutdown()
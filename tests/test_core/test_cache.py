@@ -0,0 +1,216 @@
+from datetime import date, datetime, timedelta
+
+import polars as pl
+
+from investing.core.cache import (
+    HistoryCache,
+    IndicatorCache,
+    TickerInfoCache,
+    data_fingerprint,
+)
+from investing.core.models import Interval, Period
+
+TODAY = date(2024, 6, 28)
+NOW = datetime(2024, 6, 28, 18, 0)
+FIRST_LISTED = date(2024, 1, 1)
+
+
+class FakeFetch:
+    """Serve one bar per day since `FIRST_LISTED` & record every download."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tickers, period, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        start = start or FIRST_LISTED
+        end = end or TODAY + timedelta(days=1)
+        dates = pl.date_range(start, end - timedelta(days=1), eager=True)
+        return {
+            ticker: pl.DataFrame(
+                {
+                    "date": dates,
+                    "open": float(len(self.calls)),
+                    "high": 2.0,
+                    "low": 0.5,
+                    "close": 1.0,
+                    "volume": 10.0,
+                }
+            )
+            for ticker in tickers
+        }
+
+
+def test_history_cache_downloads_only_missing_range(tmp_path):
+    cache = HistoryCache(tmp_path)
+    fetch = FakeFetch()
+    kwargs = dict(exchange="nse", interval=Interval.ONE_DAY, fetch=fetch, now=NOW)
+
+    result = cache.get_history(
+        ["INFY", "TCS"], start=date(2024, 3, 1), end=date(2024, 4, 1), **kwargs
+    )
+    assert fetch.calls == [(("INFY", "TCS"), date(2024, 3, 1), date(2024, 4, 1))]
+    assert result["INFY"]["date"].to_list()[0] == date(2024, 3, 1)
+    assert result["INFY"]["date"].to_list()[-1] == date(2024, 3, 31)
+
+    # fully covered request is served from cache
+    cache.get_history(["INFY"], start=date(2024, 3, 5), end=date(2024, 3, 9), **kwargs)
+    assert len(fetch.calls) == 1
+
+    # overlapping request only downloads the range after cached one
+    result = cache.get_history(
+        ["INFY"], start=date(2024, 3, 15), end=date(2024, 4, 11), **kwargs
+    )
+    assert fetch.calls[-1] == (("INFY",), date(2024, 4, 1), date(2024, 4, 11))
+    assert result["INFY"].height == 27
+
+    # entire history request downloads the range before cached one
+    result = cache.get_history(["INFY"], period=Period.MAX, **kwargs)
+    assert fetch.calls[-2:] == [
+        (("INFY",), None, None),
+        (("INFY",), date(2024, 4, 11), date(2024, 6, 29)),
+    ]
+    assert result["INFY"]["date"].is_unique().all()
+    assert result["INFY"].height == (TODAY - FIRST_LISTED).days + 1
+
+    assert cache.stats.misses == 2
+    assert cache.stats.hits == 1
+    assert cache.stats.partial_hits == 2
+
+    # cache is persisted on disk
+    reopened = HistoryCache(tmp_path)
+    reopened.get_history(["INFY"], period=Period.MAX, **kwargs)
+    assert reopened.stats.hits == 1
+
+
+def test_history_cache_refreshes_stale_recent_bars(tmp_path):
+    cache = HistoryCache(tmp_path)
+    fetch = FakeFetch()
+    kwargs = dict(exchange="nse", interval=Interval.ONE_DAY, fetch=fetch)
+
+    cache.get_history(["INFY"], period=Period.ONE_MONTH, now=NOW, **kwargs)
+    cache.get_history(
+        ["INFY"], period=Period.ONE_MONTH, now=NOW + timedelta(minutes=5), **kwargs
+    )
+    assert len(fetch.calls) == 1
+
+    result = cache.get_history(
+        ["INFY"], period=Period.ONE_MONTH, now=NOW + timedelta(hours=2), **kwargs
+    )
+    assert fetch.calls[-1] == (("INFY",), TODAY, TODAY + timedelta(days=1))
+    assert result["INFY"]["open"][-1] == 2.0
+    assert result["INFY"]["open"][-2] == 1.0
+
+
+def test_history_cache_records_ranges_without_bars(tmp_path):
+    cache = HistoryCache(tmp_path)
+    fetch = FakeFetch()
+    kwargs = dict(exchange="nse", interval=Interval.ONE_DAY)
+    cache.get_history(["INFY"], period=Period.ONE_MONTH, fetch=fetch, now=NOW, **kwargs)
+    written = (tmp_path / "nse" / "1d" / "INFY.parquet").stat().st_mtime_ns
+
+    # a weekend tail has no bars, yet it is not downloaded again
+    def empty_fetch(tickers, period, start, end):
+        fetch.calls.append((tuple(tickers), start, end))
+        return {ticker: None for ticker in tickers}
+
+    weekend = NOW + timedelta(days=2)
+    for _ in range(2):
+        result = cache.get_history(
+            ["INFY"], period=Period.ONE_MONTH, fetch=empty_fetch, now=weekend, **kwargs
+        )
+    assert fetch.calls[1:] == [(("INFY",), TODAY, weekend.date() + timedelta(days=1))]
+    assert result["INFY"]["date"][-1] == TODAY
+    assert cache._index["nse/1d/INFY"].end == weekend.date()
+    assert (tmp_path / "nse" / "1d" / "INFY.parquet").stat().st_mtime_ns == written
+
+
+def test_history_cache_misses_entry_of_deleted_file(tmp_path):
+    cache = HistoryCache(tmp_path)
+    fetch = FakeFetch()
+    kwargs = dict(exchange="nse", interval=Interval.ONE_DAY, fetch=fetch, now=NOW)
+    cache.get_history(["INFY"], period=Period.ONE_MONTH, **kwargs)
+    (tmp_path / "nse" / "1d" / "INFY.parquet").unlink()
+
+    result = cache.get_history(["INFY"], period=Period.ONE_MONTH, **kwargs)
+    assert fetch.calls[1] == fetch.calls[0]
+    assert result["INFY"].height == 31
+    assert cache.stats.misses == 2
+    assert cache.stats.hits == 0
+
+
+def test_history_cache_evicts_least_recently_used(tmp_path):
+    cache = HistoryCache(tmp_path)
+    fetch = FakeFetch()
+    kwargs = dict(exchange="nse", interval=Interval.ONE_DAY, fetch=fetch, now=NOW)
+    cache.get_history(["INFY"], period=Period.MAX, **kwargs)
+    cache.get_history(["TCS"], period=Period.MAX, **kwargs)
+    cache.get_history(["INFY"], period=Period.MAX, **kwargs)
+
+    cache.max_size_bytes = cache.size - 1
+    cache.get_history(["WIPRO"], period=Period.MAX, **kwargs)
+    assert cache.stats.evictions == 2
+    assert not (tmp_path / "nse" / "1d" / "TCS.parquet").exists()
+    assert not (tmp_path / "nse" / "1d" / "INFY.parquet").exists()
+    assert (tmp_path / "nse" / "1d" / "WIPRO.parquet").exists()
+
+
+def test_indicator_cache_evicts_least_recently_used():
+    frame = pl.DataFrame({"value": range(1000)}, schema={"value": pl.Float64})
+    cache = IndicatorCache(max_size_bytes=2 * frame.estimated_size())
+    calls = []
+
+    def calculate(key):
+        calls.append(key)
+        return frame
+
+    cache.get_or_calculate("a", lambda: calculate("a"))
+    cache.get_or_calculate("b", lambda: calculate("b"))
+    cache.get_or_calculate("a", lambda: calculate("a"))
+    cache.get_or_calculate("c", lambda: calculate("c"))
+    assert calls == ["a", "b", "c"]
+    assert cache.stats.evictions == 1
+
+    # `b` was least recently used
+    cache.get_or_calculate("a", lambda: calculate("a"))
+    cache.get_or_calculate("b", lambda: calculate("b"))
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.size <= cache.max_size_bytes
+
+
+def test_data_fingerprint_changes_with_recent_bars():
+    history = FakeFetch()(["INFY"], Period.MAX, None, date(2024, 2, 1))
+    stacked = history["INFY"].select(pl.lit("INFY").alias("ticker"), pl.all())
+    assert data_fingerprint(history) == data_fingerprint(stacked)
+
+    corrected = history["INFY"].with_columns(
+        pl.when(pl.col("date") == date(2024, 1, 31))
+        .then(pl.col("close") + 1)
+        .otherwise(pl.col("close"))
+    )
+    assert data_fingerprint({"INFY": corrected}) != data_fingerprint(history)
+    assert data_fingerprint({"INFY": history["INFY"].head(10)}) != data_fingerprint(
+        history
+    )
+
+
+def test_ticker_info_cache_downloads_missing_and_stale_info(tmp_path):
+    calls = []
+
+    def fetch(tickers):
+        calls.append(tickers)
+        return {
+            ticker: {"longName": ticker, "version": len(calls)} for ticker in tickers
+        }
+
+    cache = TickerInfoCache(tmp_path, ttl=timedelta(days=7))
+    cache.get_info(["INFY", "TCS"], "NSE", fetch, now=NOW)
+    result = cache.get_info(["TCS", "INFY"], "NSE", fetch, now=NOW + timedelta(days=1))
+    assert list(result) == ["TCS", "INFY"]
+    assert calls == [["INFY", "TCS"]]
+
+    # stale info & forced refresh are downloaded again
+    cache.get_info(["INFY"], "NSE", fetch, now=NOW + timedelta(days=8))
+    result = cache.get_info(["TCS"], "NSE", fetch, refresh=True, now=NOW)
+    assert calls[1:] == [["INFY"], ["TCS"]]
+    assert result["TCS"]["version"] == 3
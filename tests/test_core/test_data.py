@@ -1,15 +1,41 @@
 import polars as pl
 import yfinance as yf
 
+from investing.core.cache import TickerInfoCache
+
 from investing.core.data import Interval, Period, StockData
 
 unit_stock_data = StockData(ticker="INFY.NS")
 bulk_stock_data = StockData(ticker=["INFY", "TCS"])
 
 
-def test_stock_data_ticker_handler():
-    assert isinstance(unit_stock_data.ticker_handler, yf.ticker.Ticker)
-    assert isinstance(bulk_stock_data.ticker_handler, yf.tickers.Tickers)
+def test_stock_data_ticker_info_is_fetched_concurrently_through_cache(
+    monkeypatch, tmp_path
+):
+    fetched = []
+
+    def fake_get_info(self):
+        fetched.append(self.ticker)
+        return {"symbol": self.ticker}
+
+    monkeypatch.setattr(yf.Ticker, "get_info", fake_get_info)
+    stock_data = StockData(
+        ["INFY", "TCS", "WIPRO"], info_cache=TickerInfoCache(tmp_path)
+    )
+    result = stock_data.get_ticker_info()
+    assert {ticker: info["symbol"] for ticker, info in result.items()} == {
+        "INFY": "INFY.NS",
+        "TCS": "TCS.NS",
+        "WIPRO": "WIPRO.NS",
+    }
+
+    # fresh info is read from cache & only new tickers are downloaded
+    fetched.clear()
+    cache = TickerInfoCache(tmp_path)
+    result = StockData(["TCS", "HDFC"], info_cache=cache).get_ticker_info()
+    assert fetched == ["HDFC.NS"]
+    assert result["TCS"] == {"symbol": "TCS.NS"}
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
 
 
 def test_stock_data_get_ticker_info():
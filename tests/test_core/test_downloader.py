@@ -0,0 +1,147 @@
+from datetime import date, timedelta
+
+import polars as pl
+import pytest
+
+from investing.core.downloader import (
+    BatchDownloader,
+    DownloadCheckpoint,
+    DownloadUnit,
+    plan_download_units,
+)
+
+END = date(2024, 6, 28)
+
+
+def history(n: int = 3) -> pl.DataFrame:
+    return pl.DataFrame({"date": [date(2024, 6, d + 1) for d in range(n)]})
+
+
+class FlakyFetch:
+    """Fail `failures` times for every ticker in `flaky` & record every download."""
+
+    def __init__(self, flaky: set[str] = frozenset(), failures: int = 1):
+        self.flaky = flaky
+        self.failures = failures
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append(tuple(tickers))
+        attempts = sum(tickers[0] in call for call in self.calls)
+        return {
+            ticker: history()
+            for ticker in tickers
+            if ticker not in self.flaky or attempts > self.failures
+        }
+
+
+def test_downloader_retries_failed_tickers():
+    fetch = FlakyFetch(flaky={"TCS"}, failures=2)
+    persisted = {}
+    report = BatchDownloader(fetch, max_retries=2, backoff_seconds=0).run(
+        [DownloadUnit(("INFY", "TCS"), None, END)], persisted.update
+    )
+    assert fetch.calls == [("INFY", "TCS"), ("TCS",), ("TCS",)]
+    assert sorted(report.completed) == ["INFY", "TCS"]
+    assert sorted(persisted) == ["INFY", "TCS"]
+    assert not report.failed
+
+
+def test_downloader_reports_tickers_failing_every_retry():
+    def fetch(tickers, start, end):
+        raise ConnectionError("rate limited")
+
+    report = BatchDownloader(fetch, max_retries=1, backoff_seconds=0).run(
+        [DownloadUnit(("INFY",), None, END)], lambda history: None
+    )
+    assert "rate limited" in report.failed["INFY"]
+
+
+def test_downloader_retries_only_empty_entire_history():
+    calls = []
+
+    def fetch(tickers, start, end):
+        calls.append(tuple(tickers))
+        return {t: history(0 if t == "DLST" else 3) for t in tickers}
+
+    # tickers without new bars are accepted at once, even a batch of them
+    downloader = BatchDownloader(fetch, max_workers=1, backoff_seconds=0)
+    report = downloader.run(
+        [
+            DownloadUnit(("INFY", "DLST"), date(2024, 6, 27), END),
+            DownloadUnit(("DLST",), date(2024, 6, 20), END),
+        ],
+        lambda history: None,
+    )
+    assert calls == [("INFY", "DLST"), ("DLST",)]
+    assert report.empty == ["DLST", "DLST"]
+
+    # empty entire history is retried, yahoo drops tickers of throttled requests
+    calls.clear()
+    downloader.run([DownloadUnit(("INFY", "DLST"), None, END)], lambda history: None)
+    assert calls == [("INFY", "DLST"), ("DLST",), ("DLST",), ("DLST",)]
+
+
+def test_downloader_resumes_from_checkpoint(tmp_path):
+    units = [
+        DownloadUnit(("INFY", "TCS"), None, END),
+        DownloadUnit(("WIPRO",), None, END),
+    ]
+    checkpoint = DownloadCheckpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.save_units(units)
+
+    def crashing_sink(history):
+        if "WIPRO" in history:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        BatchDownloader(FlakyFetch(), max_workers=1, checkpoint=checkpoint).run(
+            units, crashing_sink
+        )
+
+    resumed = DownloadCheckpoint(tmp_path / "checkpoint.jsonl")
+    assert resumed.saved_units() == units
+    fetch = FlakyFetch()
+    report = BatchDownloader(fetch, checkpoint=resumed).run(
+        resumed.saved_units(), lambda history: None
+    )
+    assert fetch.calls == [("WIPRO",)]
+    assert sorted(report.skipped) == ["INFY", "TCS"]
+    assert report.completed == ["WIPRO"]
+
+    resumed.clear()
+    assert resumed.saved_units() is None
+    assert not resumed.is_done("INFY", None, END)
+
+
+def test_checkpoint_discards_stale_plan(tmp_path):
+    checkpoint = DownloadCheckpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.save_units([DownloadUnit(("INFY",), date(2024, 6, 20), END)])
+    checkpoint.mark_done(["INFY"], date(2024, 6, 20), END)
+
+    assert checkpoint.saved_units(END) is not None
+    assert checkpoint.saved_units(END + timedelta(days=1)) is None
+    assert checkpoint.saved_units() is None
+    assert not checkpoint.is_done("INFY", date(2024, 6, 20), END)
+
+
+def test_plan_download_units_groups_tickers_by_start():
+    # 2024-06-28 is a friday, so tickers stored up to thursday need friday's bar
+    watermarks = {
+        "INFY": date(2024, 6, 27),
+        "TCS": date(2024, 6, 20),
+        "WIPRO": date(2024, 6, 27),
+        "HDFC": None,
+        "ITC": date(2024, 6, 28),
+    }
+    units = plan_download_units(watermarks, END + timedelta(days=1), batch_size=1)
+    assert units == [
+        DownloadUnit(("HDFC",), None, date(2024, 6, 29)),
+        DownloadUnit(("TCS",), date(2024, 6, 21), date(2024, 6, 29)),
+        DownloadUnit(("INFY",), date(2024, 6, 28), date(2024, 6, 29)),
+        DownloadUnit(("WIPRO",), date(2024, 6, 28), date(2024, 6, 29)),
+    ]
+
+    # nothing to download over the weekend
+    friday_watermarks = dict.fromkeys(watermarks, END)
+    assert plan_download_units(friday_watermarks, date(2024, 7, 1), 20) == []
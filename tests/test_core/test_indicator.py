@@ -0,0 +1,312 @@
+import json
+from dataclasses import replace
+from datetime import date, timedelta
+
+import numpy as np
+import polars as pl
+import pytest
+
+from investing.core.cache import default_indicator_cache
+from investing.core.config import settings
+from investing.core.exception import InvestingIndicaError
+from investing.core.indicator import _base, _kernel, materialized, price_trend
+from investing.core.indicator.price_trend import SuperTrend, SuperTrendState
+from investing.core.indicator.process_pool import (
+    IndicatorProcessPool,
+    default_indicator_process_pool,
+    shutdown_default_indicator_process_pool,
+)
+from investing.core.indicator.warm_up import warm_up_indicators
+from investing.core.models import IndicatorEngine, Period, StockExchangeYahooIdentifier
+from investing.core.synthetic import synthetic_history
+from investing.core.utils import split_ticker_frame, stack_ticker_frames
+
+
+def random_walk_history(rows: int, seed: int) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    open_ = close * (1 + rng.normal(0, 0.005, rows))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, rows)))
+    return pl.DataFrame(
+        {
+            "date": [date(2000, 1, 1) + timedelta(days=i) for i in range(rows)],
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": rng.integers(1_000, 1_000_000, rows).astype(float),
+        }
+    ).with_columns(pl.col("open", "high", "low", "close").round(3))
+
+
+unit_history = random_walk_history(750, seed=7)
+bulk_history = {
+    "INFY": random_walk_history(500, seed=1),
+    "TCS": random_walk_history(120, seed=2),
+}
+
+
+@pytest.mark.parametrize(
+    ("lookback_periods", "multiplier"), [(10, 3), (7, 2.5), (14, 1)]
+)
+def test_super_trend_native_matches_stock_indicators(lookback_periods, multiplier):
+    expected = SuperTrend(unit_history).calculate_per_security(
+        lookback_periods, multiplier, engine=IndicatorEngine.stock_indicators
+    )
+    result = SuperTrend(unit_history).calculate_per_security(
+        lookback_periods, multiplier, engine=IndicatorEngine.native
+    )
+    assert result.columns == ["date", "close", "super_trend", "upper", "lower"]
+    assert result.equals(expected)
+
+
+def test_super_trend_bulk_native_matches_stock_indicators():
+    expected = SuperTrend(bulk_history, ["open", "high"]).calculate_bulk(
+        engine=IndicatorEngine.stock_indicators
+    )
+    result = SuperTrend(bulk_history, ["open", "high"]).calculate_bulk(
+        engine=IndicatorEngine.native
+    )
+    assert list(result) == ["INFY", "TCS"]
+    for ticker in result:
+        assert result[ticker].equals(expected[ticker])
+
+
+def with_missing_bars(df: pl.DataFrame, leading: int, interior: list[int]):
+    """Null OHLC of leading bars, like padding of batch downloads, & null close of
+    interior bars."""
+    row = pl.int_range(pl.len())
+    return df.with_columns(
+        pl.when(row < leading).then(None).otherwise(pl.col(c)).alias(c)
+        for c in ("open", "high", "low")
+    ).with_columns(
+        pl.when((row < leading) | row.is_in(interior))
+        .then(None)
+        .otherwise(pl.col("close"))
+        .alias("close")
+    )
+
+
+def test_super_trend_engines_skip_missing_bars(monkeypatch):
+    monkeypatch.setattr(_base, "default_indicator_cache", lambda: None)
+    unit = with_missing_bars(unit_history, leading=50, interior=[100, 400])
+    bulk = {
+        "INFY": with_missing_bars(bulk_history["INFY"], leading=50, interior=[100]),
+        "TCS": bulk_history["TCS"],
+        "WIPRO": with_missing_bars(random_walk_history(60, seed=3), 60, []),
+    }
+    complete = unit.drop_nulls(["high", "low", "close"])
+
+    native = SuperTrend(unit).calculate_per_security(engine=IndicatorEngine.native)
+    stock = SuperTrend(unit).calculate_per_security(
+        engine=IndicatorEngine.stock_indicators
+    )
+    assert native.height == complete.height - 10  # first lookback bars
+    assert native.equals(stock)
+    assert native.equals(SuperTrend(complete).calculate_per_security())
+
+    native_bulk = SuperTrend(bulk).calculate_bulk(engine=IndicatorEngine.native)
+    stock_bulk = SuperTrend(bulk).calculate_bulk(
+        engine=IndicatorEngine.stock_indicators
+    )
+    assert native_bulk["WIPRO"].is_empty()
+    for ticker in ("INFY", "TCS"):
+        assert native_bulk[ticker].equals(stock_bulk[ticker])
+
+    grid = SuperTrend(bulk).calculate_grid([10], [3])
+    assert grid.drop("lookback_periods", "multiplier").equals(
+        SuperTrend(bulk).calculate_long()
+    )
+
+    first, state = SuperTrend(unit.head(120)).resume_per_security()
+    rest, state = SuperTrend(unit).resume_per_security(state)
+    assert pl.concat([first, rest]).equals(native)
+
+
+def test_super_trend_native_invalid_parameters():
+    with pytest.raises(InvestingIndicaError):
+        SuperTrend(unit_history).calculate_per_security(lookback_periods=1)
+    with pytest.raises(InvestingIndicaError):
+        SuperTrend(unit_history).calculate_per_security(multiplier=0)
+
+
+def test_super_trend_long_format():
+    result = SuperTrend(bulk_history).calculate_long(engine=IndicatorEngine.native)
+    assert result.columns == [
+        "ticker",
+        "date",
+        "close",
+        "super_trend",
+        "upper",
+        "lower",
+    ]
+    assert set(result["ticker"]) == {"INFY", "TCS"}
+
+    # stacked input gives the same result as dict input
+    stacked = stack_ticker_frames(bulk_history)
+    assert SuperTrend(stacked).calculate_long().equals(result)
+
+    # splitting long result gives per ticker result
+    expected = SuperTrend(bulk_history).calculate_bulk(
+        engine=IndicatorEngine.stock_indicators
+    )
+    for ticker, df in split_ticker_frame(result).items():
+        assert df.equals(expected[ticker])
+
+
+def test_super_trend_bulk_keeps_empty_ticker():
+    data = {**bulk_history, "EMPTY": bulk_history["TCS"].clear()}
+    result = SuperTrend(data).calculate_bulk()
+    assert list(result) == ["INFY", "TCS", "EMPTY"]
+    assert result["EMPTY"].is_empty()
+    assert result["EMPTY"].columns == result["TCS"].columns
+
+
+@pytest.mark.parametrize("split_points", [[300], [5, 10, 11, 500], [1, 2, 749]])
+def test_super_trend_resume_matches_full_calculation(split_points):
+    expected = SuperTrend(unit_history).calculate_per_security()
+    chunks, state = [], None
+    for start, end in zip([0, *split_points], [*split_points, len(unit_history)]):
+        # history up to `end` is available, state skips the bars already consumed
+        result, state = SuperTrend(unit_history.head(end)).resume_per_security(state)
+        # state survives a JSON round-trip
+        state = SuperTrendState.from_dict(json.loads(json.dumps(state.to_dict())))
+        chunks.append(result)
+    assert pl.concat(chunks).equals(expected)
+    assert state.last_date == unit_history["date"][-1]
+
+
+def test_super_trend_resume_bulk():
+    expected = SuperTrend(bulk_history).calculate_bulk()
+    first = {ticker: df.head(100) for ticker, df in bulk_history.items()}
+    first_result, states = SuperTrend(first).resume_bulk()
+    second_result, states = SuperTrend(bulk_history).resume_bulk(states)
+    for ticker in bulk_history:
+        resumed = pl.concat([first_result[ticker], second_result[ticker]])
+        assert resumed.equals(expected[ticker])
+
+    # no new bars leave the state untouched
+    result, unchanged = SuperTrend(bulk_history).resume_bulk(states)
+    assert all(df.is_empty() for df in result.values())
+    assert unchanged == states
+
+    with pytest.raises(InvestingIndicaError):
+        SuperTrend(bulk_history).resume_bulk(states, lookback_periods=7)
+
+
+def test_materialized_super_trend_matches_calculation(monkeypatch):
+    history = synthetic_history(["INFY"], years=1, end=date.today())
+    stored, states = SuperTrend(
+        history, ["open", "high", "low", "close", "volume"]
+    ).resume_bulk()
+    monkeypatch.setattr(
+        materialized,
+        "read_super_trend_states",
+        lambda *args: {ticker: state.to_dict() for ticker, state in states.items()},
+    )
+    monkeypatch.setattr(materialized, "read_super_trend", lambda *args: stored)
+    nse = StockExchangeYahooIdentifier.nse
+
+    result = materialized.read_materialized_super_trend(object(), ["INFY"], nse, 10, 3)
+    assert result["INFY"].equals(SuperTrend(history).calculate_bulk()["INFY"])
+
+    # a range warms up from its own first bar, so it is calculated instead
+    assert (
+        materialized.read_materialized_super_trend(
+            object(), ["INFY"], nse, 10, 3, period=Period.ONE_YEAR
+        )
+        == {}
+    )
+
+
+def test_super_trend_grid_matches_individual_calculations():
+    result = SuperTrend(bulk_history).calculate_grid([7, 10, 7], [2, 3.5])
+    assert result.columns[:3] == ["lookback_periods", "multiplier", "ticker"]
+    assert result.select("lookback_periods", "multiplier").unique().height == 4
+    for lookback_periods in (7, 10):
+        for multiplier in (2, 3.5):
+            expected = SuperTrend(bulk_history).calculate_long(
+                lookback_periods, multiplier
+            )
+            combination = result.filter(
+                lookback_periods=lookback_periods, multiplier=multiplier
+            )
+            assert combination.drop("lookback_periods", "multiplier").equals(expected)
+
+    single = SuperTrend(unit_history).calculate_grid([10], [3])
+    assert single.drop("lookback_periods", "multiplier").equals(
+        SuperTrend(unit_history).calculate_per_security()
+    )
+    with pytest.raises(InvestingIndicaError):
+        SuperTrend(unit_history).calculate_grid([10, 1], [3])
+
+
+def test_super_trend_results_are_cached_per_data_and_parameters():
+    cache = default_indicator_cache()
+    cache.clear()
+    first = SuperTrend(bulk_history).calculate_long()
+    # another object over the same history is served from cache
+    assert SuperTrend(bulk_history).calculate_long() is first
+    hits = cache.stats.hits
+
+    # same object with other parameters, or changed history is recalculated
+    indicator = SuperTrend(bulk_history)
+    assert not indicator.calculate_long(lookback_periods=7).equals(first)
+    changed = {**bulk_history, "TCS": bulk_history["TCS"].head(-1)}
+    assert SuperTrend(changed).calculate_long() is not first
+    assert cache.stats.hits == hits
+
+    # repeated per security calculation doesn't evaluate a dataframe as bool
+    single = SuperTrend(unit_history)
+    assert single.calculate_per_security().equals(single.calculate_per_security())
+
+
+def test_warm_up_runs_every_engine():
+    assert set(warm_up_indicators()) == {engine.value for engine in IndicatorEngine}
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    pool = IndicatorProcessPool(processes=2, chunks_per_process=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_process_pool_chunks_at_ticker_boundaries(process_pool):
+    offsets = np.array([0, 10, 15, 40, 45, 50])
+    assert process_pool._chunk_bounds(offsets) == [(0, 40), (40, 50)]
+    assert process_pool._chunk_bounds(np.array([0, 50])) == [(0, 50)]
+
+
+def test_default_indicator_process_pool_shuts_down(monkeypatch):
+    monkeypatch.setattr(
+        "investing.core.indicator.process_pool.settings",
+        replace(settings, indicator_processes=1),
+    )
+    pool = default_indicator_process_pool()
+    assert default_indicator_process_pool() is pool
+
+    shutdown_default_indicator_process_pool()
+    with pytest.raises(RuntimeError):
+        pool._executor.submit(int)
+    assert default_indicator_process_pool() is not pool
+    shutdown_default_indicator_process_pool()
+
+
+@pytest.mark.parametrize("engine", list(IndicatorEngine))
+def test_super_trend_bulk_in_process_pool_matches_in_process(
+    monkeypatch, process_pool, engine
+):
+    history = {**bulk_history, "WIPRO": random_walk_history(300, seed=3)}
+    expected = SuperTrend(history, ["open", "close"]).calculate_bulk(engine=engine)
+
+    monkeypatch.setattr(_base, "default_indicator_cache", lambda: None)
+    monkeypatch.setattr(_kernel, "JIT", False)  # native engine holds the GIL
+    monkeypatch.setattr(
+        price_trend, "default_indicator_process_pool", lambda: process_pool
+    )
+    result = SuperTrend(history, ["open", "close"]).calculate_bulk(engine=engine)
+    assert list(result) == list(expected)
+    for ticker, df in expected.items():
+        assert result[ticker].equals(df)
@@ -0,0 +1,69 @@
+from datetime import date
+
+import polars as pl
+
+from investing.core.lake import PriceLake
+
+
+def history(start: date, end: date, price: float) -> pl.DataFrame:
+    dates = pl.date_range(start, end, eager=True)
+    return pl.DataFrame(
+        {
+            "date": dates,
+            "open": price,
+            "high": price,
+            "low": price,
+            "close": price,
+            "volume": 10.0,
+        }
+    )
+
+
+def test_price_lake_partitions_by_exchange_ticker_year(tmp_path):
+    lake = PriceLake(tmp_path)
+    written = lake.write(
+        {
+            "INFY": history(date(2023, 12, 30), date(2024, 1, 2), 1.0),
+            "500325": history(date(2024, 1, 1), date(2024, 1, 2), 2.0),
+        },
+        "nse",
+    )
+    assert written == 3
+    assert (tmp_path / "exchange=nse" / "ticker=INFY" / "year=2023").is_dir()
+    assert lake.tickers("nse") == ["500325", "INFY"]
+
+    result = lake.read_history(["INFY", "500325"], "nse", start=date(2024, 1, 1))
+    assert result["INFY"]["date"].to_list() == [date(2024, 1, 1), date(2024, 1, 2)]
+    assert result["500325"]["close"].to_list() == [2.0, 2.0]
+    assert result["INFY"].columns == ["date", "open", "high", "low", "close", "volume"]
+
+
+def test_price_lake_replaces_bars_of_same_dates(tmp_path):
+    lake = PriceLake(tmp_path)
+    lake.write({"INFY": history(date(2024, 1, 1), date(2024, 1, 3), 1.0)}, "nse")
+    lake.write({"INFY": history(date(2024, 1, 3), date(2024, 1, 4), 5.0)}, "nse")
+    result = lake.read_history(["INFY"], "nse")["INFY"]
+    assert result["close"].to_list() == [1.0, 1.0, 5.0, 5.0]
+
+
+def test_price_lake_scans_whole_universe_lazily(tmp_path):
+    lake = PriceLake(tmp_path)
+    assert lake.scan().collect().is_empty()
+
+    lake.write(
+        {
+            ticker: history(date(2024, 1, 1), date(2024, 1, 10), price)
+            for ticker, price in [("INFY", 1.0), ("TCS", 2.0), ("WIPRO", 3.0)]
+        },
+        "nse",
+    )
+    screen = (
+        lake.scan("nse", end=date(2024, 1, 5))
+        .group_by("ticker")
+        .agg(pl.col("date").max(), pl.col("close").last())
+        .filter(pl.col("close") > 1.5)
+        .sort("ticker")
+        .collect()
+    )
+    assert screen["ticker"].to_list() == ["TCS", "WIPRO"]
+    assert screen["date"].to_list() == [date(2024, 1, 5)] * 2
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from investing.core.db import ConnectionPool
+from investing.core.exception import DatabasePoolError
+
+
+class FakeConnection:
+    """Connection stub recording its lifecycle, `broken` ones fail every call."""
+
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+
+    def cursor(self):
+        if self.broken:
+            raise ConnectionError("server closed the connection")
+        return FakeCursor()
+
+    def rollback(self):
+        if self.broken:
+            raise ConnectionError("server closed the connection")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        pass
+
+    def fetchall(self):
+        return [(1,)]
+
+
+def make_pool(**kwargs) -> ConnectionPool:
+    return ConnectionPool(
+        "postgresql://test", connect=lambda uri: FakeConnection(), **kwargs
+    )
+
+
+def test_pool_reuses_released_connection():
+    pool = make_pool(min_size=1, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["acquired"] == 2
+    assert stats["in_use"] == 0
+
+
+def test_pool_times_out_when_exhausted():
+    pool = make_pool(min_size=0, max_size=1)
+    with pool.connection():
+        with pytest.raises(DatabasePoolError):
+            pool.acquire(timeout=0.05)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_hands_released_connection_to_waiting_caller():
+    pool = make_pool(min_size=1, max_size=1)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(conn,)).start()
+    assert pool.acquire(timeout=1) is conn
+
+
+def test_pool_replaces_broken_connection():
+    pool = make_pool(min_size=1, max_size=1, health_check_interval=0)
+    with pool.connection() as first:
+        pass
+    first.broken = True
+    with pool.connection() as second:
+        assert second is not first
+    assert first.closed
+    stats = pool.stats()
+    assert stats["discarded"] == 1
+    assert stats["size"] == 1
+
+
+def test_pool_rejects_checkout_once_closed():
+    pool = make_pool(min_size=2, max_size=2)
+    pool.close()
+    assert pool.stats()["size"] == 0
+    with pytest.raises(DatabasePoolError):
+        pool.acquire()
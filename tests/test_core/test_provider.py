@@ -0,0 +1,87 @@
+from datetime import date
+
+import polars as pl
+import pytest
+
+from investing.core.data import StockData
+from investing.core.exception import DataProviderError
+from investing.core.lake import PriceLake
+from investing.core.models import Interval, Period
+from investing.core.provider import (
+    LakeProvider,
+    RecordReplayProvider,
+    SyntheticProvider,
+)
+
+TODAY = date(2024, 6, 28)
+
+
+class CountingProvider(SyntheticProvider):
+    """Synthetic provider recording every requested ticker, with `GONE` unknown."""
+
+    def __init__(self):
+        super().__init__(years=2, end=TODAY)
+        self.calls = []
+
+    def history(self, tickers, *args, **kwargs):
+        self.calls.append(tickers)
+        history = super().history(tickers, *args, **kwargs)
+        return {**history, **({"GONE": None} if "GONE" in tickers else {})}
+
+
+def test_synthetic_provider_serves_requested_range():
+    provider = SyntheticProvider(years=2, end=TODAY)
+    history = StockData(["INFY", "TCS"], provider=provider).get_ticker_history(
+        period=Period.ONE_MONTH
+    )
+    assert list(history) == ["INFY", "TCS"]
+    assert history["INFY"]["date"].min() == date(2024, 5, 29)
+    assert history["INFY"]["date"].max() == TODAY
+    # a ticker's history doesn't depend on the other tickers of the request
+    single = StockData("TCS", provider=provider).get_ticker_history(
+        period=Period.ONE_MONTH
+    )
+    assert single["TCS"].equals(history["TCS"])
+    with pytest.raises(DataProviderError):
+        provider.history(
+            ["INFY"], StockData("INFY").exchange_market, interval=Interval.ONE_WEEK
+        )
+
+
+def test_record_replay_provider(tmp_path):
+    upstream = CountingProvider()
+    recorder = RecordReplayProvider(tmp_path, upstream)
+    recorded = StockData(["INFY", "GONE"], provider=recorder).get_ticker_history(
+        start="2024-01-01", end="2024-06-01"
+    )
+    StockData(["INFY", "TCS"], provider=recorder).get_ticker_history(
+        start="2024-01-01", end="2024-06-01"
+    )
+    # only tickers without recording are requested from upstream
+    assert upstream.calls == [["INFY", "GONE"], ["TCS"]]
+
+    replayer = RecordReplayProvider(tmp_path)
+    replayed = StockData(["GONE", "INFY"], provider=replayer).get_ticker_history(
+        start="2024-01-01", end="2024-06-01"
+    )
+    assert replayed["GONE"].is_empty()
+    assert replayed["INFY"].equals(recorded["INFY"])
+    with pytest.raises(DataProviderError):
+        StockData(["INFY"], provider=replayer).get_ticker_history(period=Period.MAX)
+
+
+def test_lake_provider(tmp_path):
+    history = SyntheticProvider(years=1, end=TODAY).history(
+        ["INFY", "TCS"], StockData("INFY").exchange_market
+    )
+    lake = PriceLake(tmp_path)
+    lake.write(history, "NSE")
+    result = StockData(
+        ["TCS", "WIPRO"], provider=LakeProvider(lake)
+    ).get_ticker_history(start="2024-03-01", end="2024-04-01")
+    assert result["WIPRO"].is_empty()
+    assert result["TCS"].equals(
+        history["TCS"].filter(
+            pl.col("date").is_between(date(2024, 3, 1), date(2024, 3, 31))
+        )
+    )
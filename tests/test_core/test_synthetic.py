@@ -0,0 +1,34 @@
+import polars as pl
+import pytest
+
+from investing.core.synthetic import synthetic_history
+
+
+def test_synthetic_history_is_seeded_per_ticker():
+    history = synthetic_history(3, years=2, seed=5)
+    assert list(history) == ["SYN0001", "SYN0002", "SYN0003"]
+    # a ticker doesn't depend on which other tickers are generated
+    assert synthetic_history(["SYN0002"], years=2, seed=5)["SYN0002"].equals(
+        history["SYN0002"]
+    )
+    assert not history["SYN0001"].equals(history["SYN0002"])
+    assert not synthetic_history(1, years=2, seed=6)["SYN0001"].equals(
+        history["SYN0001"]
+    )
+
+    df = history["SYN0002"]
+    assert df.columns == ["date", "open", "high", "low", "close", "volume"]
+    assert 500 < df.height < 530
+    assert df["date"].dt.weekday().max() <= 5
+    assert df.select(
+        (pl.col("high") >= pl.max_horizontal("open", "close")).all().alias("high"),
+        (pl.col("low") <= pl.min_horizontal("open", "close")).all().alias("low"),
+        (pl.col("low") > 0).all().alias("positive"),
+    ).row(0) == (True, True, True)
+
+
+def test_synthetic_history_limits():
+    with pytest.raises(ValueError):
+        synthetic_history(5001)
+    with pytest.raises(ValueError):
+        synthetic_history(1, years=31)
@@ -0,0 +1,63 @@
+from investing.core.timing import (
+    StageMetrics,
+    current_request_timing,
+    record_tickers,
+    stage,
+    start_request_timing,
+    stop_request_timing,
+    ticker_count_label,
+)
+
+
+def test_stage_outside_of_request_is_not_timed():
+    with stage("download"):
+        pass
+    record_tickers(3)
+    assert current_request_timing() is None
+
+
+def test_stages_are_summed_per_request():
+    timing, token = start_request_timing()
+    try:
+        for _ in range(2):
+            with stage("download"):
+                pass
+        record_tickers(3)
+        record_tickers(1)
+    finally:
+        stop_request_timing(token)
+    assert list(timing.stages) == ["download"]
+    assert timing.tickers == 3
+    assert current_request_timing() is None
+
+
+def test_ticker_count_label():
+    assert [ticker_count_label(n) for n in (None, 1, 2, 10, 11, 1000, 1001)] == [
+        "none",
+        "1",
+        "2-10",
+        "2-10",
+        "11-100",
+        "101-1000",
+        "1001+",
+    ]
+
+
+def test_stage_metrics_render_cumulative_buckets():
+    metrics = StageMetrics(buckets=(0.1, 1.0))
+    timing, token = start_request_timing()
+    stop_request_timing(token)
+    for seconds in (0.05, 0.5, 5.0):
+        timing.stages = {"download": seconds}
+        metrics.observe('/api/"x"', "nse", timing)
+    labels = 'endpoint="/api/\\"x\\"",exchange="nse",tickers="none",stage="download"'
+    name = "factor_investing_stage_duration_seconds"
+    lines = metrics.render().splitlines()
+    assert lines[1] == f"# TYPE {name} histogram"
+    assert lines[2:] == [
+        f'{name}_bucket{{{labels},le="0.1"}} 1',
+        f'{name}_bucket{{{labels},le="1"}} 2',
+        f'{name}_bucket{{{labels},le="+Inf"}} 3',
+        f"{name}_sum{{{labels}}} 5.55",
+        f"{name}_count{{{labels}}} 3",
+    ]
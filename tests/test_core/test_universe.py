@@ -0,0 +1,34 @@
+from datetime import date
+
+from investing.core.universe import TickerListing, TickerUniverse, read_listings_csv
+
+listings = [
+    TickerListing("NSE", "TCS", indices=("NIFTY 50", "NIFTY 500")),
+    TickerListing("NSE", "INFY", indices=("NIFTY 50",)),
+    TickerListing("NSE", "DELISTED", is_active=False, indices=("NIFTY 500",)),
+    TickerListing("NYSE", "IBM", listed_on=date(1915, 11, 11)),
+]
+
+
+def test_ticker_universe_index():
+    universe = TickerUniverse(listings)
+    assert len(universe) == 4
+    assert universe.exchanges() == ["NSE", "NYSE"]
+    assert universe.tickers("nse") == ["INFY", "TCS"]
+    assert universe.tickers("nse", active_only=False) == ["DELISTED", "INFY", "TCS"]
+    assert universe.tickers("NSE", "nifty 500") == ["TCS"]
+    assert universe.indices("nse") == ["NIFTY 50", "NIFTY 500"]
+    assert universe.listing("nyse", "ibm").listed_on == date(1915, 11, 11)
+    assert universe.listing("nse", "ibm") is None
+    assert universe.tickers("bse") == []
+
+
+def test_read_listings_csv(tmp_path):
+    path = tmp_path / "tickers.csv"
+    path.write_text("ticker\ntcs\n 500325\nTCS\n")
+    result = read_listings_csv(path, "nse", ("NIFTY 500",))
+    assert result.columns == ["exchange", "ticker", "indices"]
+    # NOTE - numeric looking tickers stay text
+    assert result["ticker"].to_list() == ["TCS", "500325"]
+    assert result["exchange"].unique().to_list() == ["NSE"]
+    assert result["indices"].to_list() == [["NIFTY 500"], ["NIFTY 500"]]